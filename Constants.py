@@ -1,124 +1,104 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-"""Constant variables with string values for license approval generation.
-
+"""Labels with string values for license approval generation.
 
+The labels are read once from a JSON file (labels.json) into frozen label
+sets, shared read-only by all documents, threads and worker processes of a
+run. The file holds named label sets, e.g. per language or per legal
+department; every set other than 'default' only lists the labels that
+differ and takes the rest from 'default'.
 """
-from typing import *
+import json
+import types
+from typing import Any, Dict, List, Mapping, Tuple
+
+# Label file of the license approvals
+LABELS_FILE: str = r"./labels.json"
+
+# Label set used unless a job or the command line selects another one
+DEFAULT_LABEL_SET: str = "default"
 
-class Constants:
+class Labels:
     """
-    Class contains getter methods to retrieve all
-    constants for the license approval composition.
+    One frozen set of labels, the property texts for the tables in the
+    DOCX file. The labels are attributes, e.g. labels.header_text, and
+    cannot be changed after loading.
 
-    The costants are the necessary properties text for the tables
-    in the DOCX file.
+    Keyword arguments:
+    name   -- name of the label set. E.g. default
+    labels -- text of every label in LABEL_NAMES
     """
 
-    def __init__(self):
-        self.HEADER_TEXT: str = ""
-        self.TITLE_MAIN_SECTION: str = ""
-        self.SENDER_FORM: str = ""
-        self.SUBMISSION_TEXT_PROPERTY: str = ""
-        self.SUBMISSION_TEXT_NAME: str = ""
-        self.SUBMISSION_TO: str = ""
-        self.APPT_OR_REJ_TEXT: str = ""
-        self.SUBM_DATE: str = ""
-        self.DATE_APPR_TEXT: str = ""
-        self.THIRD_PARTY_NAME_PROP: str = ""
-        self.VERSION_YEAR_PROP: str = ""
-        self.UPDATE_PROP: str = ""
-        self.SOFTW_DESC_PROP: str = ""
-        self.LINK_PROPERTY_PROP: str = ""
-        self.LICENSE_PROP: str = ""
-        self.LINK_LIC_PROP: str = ""
-        self.PROD_PROP: str = ""
-        self.TIME_VER_PROP: str = ""
-
-    # getter methods
-    # header section
-    def get_header_text(self) -> str:
-        self.HEADER_TEXT = "INTERNAL USE ONLY"
-        return self.HEADER_TEXT
-
-    def get_title_main_section(self) -> str:
-        self.TITLE_MAIN_SECTION = "THIRD PARTY SOFTWARE LICENSE APPROVAL FORM"    
-        return self.TITLE_MAIN_SECTION
-
-    # meta info section
-    def get_sender_form(self) -> str:
-        self.SENDER_FORM = "From: Christoph Hartleb (Dev)"
-        return self.SENDER_FORM
-
-    def get_submission_text_property(self) -> str:
-        self.SUBMISSION_TEXT_PROPERTY = "Submitted to Legal by:"
-        return self.SUBMISSION_TEXT_PROPERTY
-
-    def get_submission_text_name(self) -> str:
-        self.SUBMISSION_TEXT_NAME = "Christoph Hartleb"
-        return self.SUBMISSION_TEXT_NAME
-
-    def get_submission_to(self) -> str:
-        self.SUBMISSION_TO = "To: Lawyer"
-        return self.SUBMISSION_TO
-
-    def get_appt_or_rej_text(self) -> str:
-        self.APPT_OR_REJ_TEXT = "Approved/Rejected by Legal:"
-        return self.APPT_OR_REJ_TEXT
-
-    def get_sub_date(self) -> str:
-        self.SUBM_DATE = "Submission Date: "
-        return self.SUBM_DATE
-
-    def get_date_appr_text(self) -> str:
-        self.DATE_APPR_TEXT = "Date Approved:"
-        return self.DATE_APPR_TEXT
-
-    def get_date_format(self) -> str:
-        self.DATE_FORMAT = "MM/DD/YYYY"
-        return self.DATE_FORMAT
-
-    # main section
-    def get_third_party_name_prop(self) -> str:
-        self.THIRD_PARTY_NAME_PROP = "Name of third party software:"
-        return self.THIRD_PARTY_NAME_PROP
-
-    def get_version_year_prop(self) -> str:
-        self.VERSION_YEAR_PROP = "Version number or year:"
-        return self.VERSION_YEAR_PROP
-
-    def get_update_prop(self) -> str:
-        self.UPDATE_PROP = """Is this a version update of 
-previously approved software? If 
-Yes, reason for update?"""
-        return self.UPDATE_PROP
-
-    def get_softw_desc_prop(self) -> str:
-        self.SOFTW_DESC_PROP = "General description of software:"
-        return self.SOFTW_DESC_PROP
-
-    def get_link_property_prop(self) -> str:
-        self.LINK_PROPERTY_PROP = "Link to software homepage:"
-        return self.LINK_PROPERTY_PROP
-
-    def get_license_prop(self) -> str:
-        self.LICENSE_PROP = "License type (e.g. MIT, BSD, GPL)"
-        return self.LICENSE_PROP
-
-    def get_link_lic_prop(self) -> str:
-        self.LINK_LIC_PROP = "Link to website showing license:"
-        return self.LINK_LIC_PROP
-
-    def get_prod_prop(self) -> str:
-        self.ALTOVA_PROD_PROP = """Company products that will
-introduce license?"""
-        return self.PROD_PROP
-
-    def get_affected_products(self) -> str:
-        self.AFFECTED_PRODUCTS = """All products that support the packages."""
-        return self.AFFECTED_PRODUCTS
-
-    def get_time_ver_prop(self) -> str:
-        self.TIME_VER_PROP = "Approximate time/version?"
-        return self.TIME_VER_PROP
+    __slots__ = (
+        "name",
+        # header section
+        "header_text",
+        "title_main_section",
+        # meta info section
+        "sender_form",
+        "submission_text_property",
+        "submission_text_name",
+        "submission_to",
+        "appt_or_rej_text",
+        "sub_date",
+        "date_appr_text",
+        "date_format",
+        # main section
+        "third_party_name_prop",
+        "version_year_prop",
+        "update_prop",
+        "softw_desc_prop",
+        "link_property_prop",
+        "license_prop",
+        "link_lic_prop",
+        "prod_prop",
+        "affected_products",
+        "time_ver_prop")
+
+    LABEL_NAMES: Tuple[str, ...] = __slots__[1:]
+
+    def __init__(self, name: str, labels: Dict[str, str]):
+        missing: List[str] = [label for label in self.LABEL_NAMES if not isinstance(labels.get(label), str)]
+        if missing:
+            raise ValueError("label set '{}' lacks the labels: {}".format(name, ", ".join(missing)))
+        unknown: List[str] = sorted(set(labels) - set(self.LABEL_NAMES))
+        if unknown:
+            raise ValueError("label set '{}' has unknown labels: {}".format(name, ", ".join(unknown)))
+        object.__setattr__(self, "name", name)
+        label: str
+        for label in self.LABEL_NAMES:
+            object.__setattr__(self, label, labels[label])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("labels are read-only")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("labels are read-only")
+
+    def __reduce__(self) -> tuple:
+        # __setattr__ is blocked, so pickling goes through the constructor
+        return Labels, (self.name, self.as_dict())
+
+    def __repr__(self) -> str:
+        return "Labels({!r})".format(self.name)
+
+    def as_dict(self) -> Dict[str, str]:
+        """Return label name -> text, in document order"""
+        return {label: getattr(self, label) for label in self.LABEL_NAMES}
+
+def load_label_sets(labels_path: str = LABELS_FILE) -> Mapping[str, Labels]:
+    """
+    Return the label sets of a label file by name, as read-only mapping.
+    Keys starting with '_' (e.g. '_comment') are not label sets.
+
+    Keyword arguments:
+    labels_path -- path to the label file
+    """
+    with open(labels_path, "r", encoding="utf-8") as labels_file:
+        data: dict = json.load(labels_file)
+    if DEFAULT_LABEL_SET not in data:
+        raise ValueError("label file '{}' has no '{}' label set".format(labels_path, DEFAULT_LABEL_SET))
+    default: Dict[str, str] = data[DEFAULT_LABEL_SET]
+    return types.MappingProxyType({
+        name: Labels(name, dict(default, **labels)) for name, labels in data.items() if not name.startswith("_")})
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Long running generation server for license approvals.
+
+The server keeps labels, templates, logo and document skeleton loaded and
+renders approvals on request, with the same code as the command line.
+It listens on localhost only and accepts:
+
+POST /approvals  JSON body {"family": "eba", "version": "3.1", "save": false}
+                 returns the DOCX bytes, or with "save": true writes the
+                 file to the output folder and returns {"file_name", "path"}.
+                 An optional "labels" selects the label set. Unknown
+                 families and label sets answer 404, bodies without
+                 string "family" and "version" (and "labels" if given)
+                 and file names that would leave the output folder 400
+GET  /metrics    returns request count, errors and latencies as JSON
+
+Rendering is done by the function passed to the server, which is
+render_request() of gen_lic_approval.py for the command line. The functions
+request_approval() and get_metrics() are a small client based on urllib,
+e.g. for local testing.
+"""
+
+import json
+import threading
+import time
+import urllib.request
+from collections              import deque
+from http.server              import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing                   import Any, Callable, Dict, Tuple
+
+# Usage: py -3.7 gen_lic_approval.py --serve [--port=8765] [--max-concurrent=4]
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8765
+
+DOCX_CONTENT_TYPE: str = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+class RequestError(ValueError):
+    """A request that cannot be rendered as asked, answered with 400"""
+
+class NotFoundError(LookupError):
+    """A family or label set the render function does not know, answered with 404"""
+
+class ServerMetrics:
+    """
+    Request counters and latencies of the most recent requests.
+
+    Keyword arguments:
+    window -- number of latencies kept for the percentiles
+    """
+
+    def __init__(self, window: int = 1024):
+        self.requests: int = 0
+        self.errors: int = 0
+        self.in_flight: int = 0
+        self._latencies: deque = deque(maxlen=window)
+        self._lock: threading.Lock = threading.Lock()
+
+    def started(self) -> None:
+        """Count a request that started"""
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, seconds: float, failed: bool) -> None:
+        """Count a finished request and its latency"""
+        with self._lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.errors += failed
+            self._latencies.append(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        """Return the counters plus average, median, p95 and maximal latency in ms"""
+        with self._lock:
+            latencies: list = sorted(self._latencies)
+            summary: Dict[str, Any] = {"requests": self.requests, "errors": self.errors, "in_flight": self.in_flight}
+        if latencies:
+            summary["latency_ms"] = {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 3),
+                "p50": round(latencies[len(latencies) // 2] * 1000, 3),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3)}
+        return summary
+
+class ApprovalRequestHandler(BaseHTTPRequestHandler):
+    """Handles the requests of the generation server, see module docstring"""
+
+    server: "ApprovalServer"
+
+    def do_GET(self) -> None:
+        if self.path == "/metrics":
+            self.send_json(200, self.server.metrics.summary())
+        else:
+            self.send_json(404, {"error": "unknown path " + self.path})
+
+    def do_POST(self) -> None:
+        if self.path != "/approvals":
+            self.send_json(404, {"error": "unknown path " + self.path})
+            return
+        start: float = time.perf_counter()
+        self.server.metrics.started()
+        failed: bool = True
+        try:
+            request: dict = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            family: str = request["family"]
+            version: str = request["version"]
+            labels: str = request.get("labels")
+            if not (isinstance(family, str) and isinstance(version, str) and isinstance(labels, (str, type(None)))):
+                raise TypeError("'family' and 'version' must be strings, 'labels' a string or null")
+        except (ValueError, KeyError, TypeError) as e:
+            self.server.metrics.finished(time.perf_counter() - start, True)
+            self.send_json(400, {"error": "expected a JSON body with 'family' and 'version': " + repr(e)})
+            return
+
+        try:
+            with self.server.slots:
+                file_name, docx_bytes, docx_file_path = self.server.render(family, version, bool(request.get("save")), labels)
+            failed = False
+        except NotFoundError as e:
+            self.send_json(404, {"error": str(e)})
+        except RequestError as e:
+            self.send_json(400, {"error": str(e)})
+        except Exception as e:
+            self.send_json(500, {"error": repr(e)})
+        finally:
+            self.server.metrics.finished(time.perf_counter() - start, failed)
+        if failed:
+            return
+
+        if docx_file_path:
+            self.send_json(200, {"file_name": file_name, "path": docx_file_path})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", DOCX_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(docx_bytes)))
+        self.send_header("X-Approval-File-Name", file_name.encode("utf-8").decode("latin-1"))
+        self.end_headers()
+        self.wfile.write(docx_bytes)
+
+    def send_json(self, status: int, body: Dict[str, Any]) -> None:
+        """Send a JSON response"""
+        payload: bytes = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+# Renders an approval: (family, version, save, label set or None) -> (file name,
+# DOCX bytes, path of the saved file or None). Raises NotFoundError for unknown
+# families and label sets and RequestError for requests it rejects.
+RenderFunction = Callable[[str, str, bool, str], Tuple[str, bytes, str]]
+
+class ApprovalServer(ThreadingHTTPServer):
+    """
+    HTTP server rendering approvals with warm resources shared by all requests.
+
+    Keyword arguments:
+    render         -- function rendering one approval
+    host           -- interface to listen on
+    port           -- port to listen on, 0 picks a free one
+    max_concurrent -- number of approvals rendered at the same time
+    """
+
+    daemon_threads: bool = True
+
+    def __init__(self, render: RenderFunction, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_concurrent: int = 4):
+        super().__init__((host, port), ApprovalRequestHandler)
+        self.render: RenderFunction = render
+        self.metrics: ServerMetrics = ServerMetrics()
+        self.slots: threading.BoundedSemaphore = threading.BoundedSemaphore(max_concurrent)
+
+def serve(render: RenderFunction, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_concurrent: int = 4) -> None:
+    """Run the generation server until it is interrupted"""
+    server: ApprovalServer = ApprovalServer(render, host, port, max_concurrent)
+    print("Serving license approvals on http://{}:{}/approvals (Ctrl+C to stop)".format(*server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def request_approval(family: str, version: str, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, save: bool = False, labels: str = None) -> Any:
+    """
+    Request an approval from a running server. Return the DOCX bytes, or
+    with save the JSON answer holding file name and path.
+    """
+    request: urllib.request.Request = urllib.request.Request(
+        "http://{}:{}/approvals".format(host, port),
+        data=json.dumps({"family": family, "version": version, "save": save, "labels": labels}).encode("utf-8"),
+        headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request) as response:
+        body: bytes = response.read()
+    return json.loads(body) if save else body
+
+def get_metrics(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> Dict[str, Any]:
+    """Return the metrics of a running server"""
+    with urllib.request.urlopen("http://{}:{}/metrics".format(host, port)) as response:
+        return json.loads(response.read())
@@ -0,0 +1,688 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Benchmarks for the license approval generation.
+
+Every benchmark renders license approvals in memory and prints the
+average time per document, so changes of the generator can be compared
+against each other on the same machine.
+"""
+
+import argparse
+from concurrent.futures       import ProcessPoolExecutor
+import contextlib
+import copy
+import datetime
+import functools
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing                   import Any, Callable, Dict, List, Tuple
+import xml.etree.ElementTree  as ET
+from docx                     import Document
+from docx.image.image         import Image
+import gen_lic_approval       as gen
+
+try:
+    import resource # peak RSS, not available on Windows
+except ImportError:
+    resource = None
+
+# Usage: py -3.7 benchmark.py [-family="eba"] [-version="3.1"] [-n=200]
+
+def main() -> None:
+    """Entry point of program"""
+    argp: argparse.ArgumentParser = argparse.ArgumentParser(description='Benchmark the license approval generation.')
+    argp.add_argument('-family', '--family', default="eba", help='The taxonomy\'s family name used for rendering')
+    argp.add_argument('-version', '--version', default="3.1", help='The taxonomy\'s version used for rendering')
+    argp.add_argument('-n', '--n', type=int, default=200, help='Number of documents rendered per benchmark')
+    argp.add_argument('--templates-dir', default=r"./templates", help='Folder with the JSON templates')
+    argp.add_argument('--bench', choices=BENCHMARKS, nargs='+', default=list(BENCHMARKS), help='Benchmarks to run')
+    argp.add_argument('--artifact-db-mb', type=int, nargs='+', default=[50, 300], help='Sizes of the synthetic ArtifactDatabase.xml in MB')
+    argp.add_argument('--startup-budget-ms', type=float, default=STARTUP_BUDGET_MS, help='Cold start budget of the non-rendering commands in ms')
+    argp.add_argument('--logo-dpi', type=int, default=96, help='Resolution the logo is downsampled to by the media benchmark')
+    argp.add_argument('--memory-docs', type=int, nargs='+', default=[100, 1000, 10000], help='Batch sizes of the streaming memory benchmark')
+    argp.add_argument('--memory-backend', choices=gen.BACKENDS, default="fast", help='Document writer used for the streaming memory benchmark')
+    argp.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE, help='Allowed growth of the peak memory from the smallest to the largest batch')
+    argp.add_argument('--corpus-families', type=int, nargs='+', default=[10, 100, 1000, 10000], help='Numbers of families of the synthetic template corpora')
+    argp.add_argument('--corpus-max-versions', type=int, default=50, help='Longest list of versions of a synthetic template')
+    argp.add_argument('--corpus-docs', type=int, default=100, help='Number of documents rendered per corpus and mode')
+    argp.add_argument('--corpus-backend', choices=gen.BACKENDS, default="docx", help='Document writer used for the corpus benchmark')
+    argp.add_argument('--corpus-workers', type=int, default=os.cpu_count(), help='Number of worker processes of the parallel mode')
+    argp.add_argument('--search-families', type=int, default=10000, help='Number of families of the synthetic corpus of the search benchmark')
+    argp.add_argument('--search-budget-ms', type=float, default=SEARCH_BUDGET_MS, help='Budget of one search query in ms')
+    argp.add_argument('--store-families', type=int, default=10000, help='Number of families of the synthetic corpus of the template store benchmark')
+    argp.add_argument('--results-json', help='File the corpus results are written to. Default: ' + CORPUS_RESULTS_DIR + '/corpus-<commit>.json')
+    argp.add_argument('--compare-json', help='Corpus results of an earlier run, e.g. of another commit, to compare with')
+    args: argparse.Namespace = argp.parse_args()
+
+    resources: gen.ApprovalResources = gen.load_resources(args.templates_dir, backend="fast")
+    if "skeleton" in args.bench:
+        bench_skeleton(args.family, args.version, args.n, resources)
+    if "backends" in args.bench:
+        bench_backends(args.family, args.version, args.n, resources)
+    if "artifactdb" in args.bench:
+        bench_artifact_database(args.artifact_db_mb, args.memory_tolerance)
+    if "startup" in args.bench:
+        bench_startup(args.family, args.version, args.startup_budget_ms)
+    if "timings" in args.bench:
+        bench_timings(args.family, args.version, args.n, resources)
+    if "media" in args.bench:
+        bench_media(args.family, args.version, args.n, args.templates_dir, args.logo_dpi, resources)
+    if "memory" in args.bench:
+        bench_memory(args.memory_docs, args.memory_backend, args.memory_tolerance)
+    if "corpus" in args.bench:
+        bench_corpus(args.corpus_families, args.corpus_max_versions, args.corpus_docs, args.corpus_backend, args.corpus_workers, args.results_json, args.compare_json)
+    if "search" in args.bench:
+        bench_search(args.search_families, args.search_budget_ms)
+    if "reproducible" in args.bench:
+        bench_reproducible(args.family, args.version, args.templates_dir)
+    if "store" in args.bench:
+        bench_store(args.store_families, args.corpus_max_versions)
+
+# Names of all benchmarks
+BENCHMARKS: Tuple[str, ...] = ("skeleton", "backends", "artifactdb", "startup", "timings", "media", "memory", "corpus", "search", "reproducible", "store")
+
+# Wall time budget of a non-rendering command, incl. interpreter start
+STARTUP_BUDGET_MS: float = 150.0
+
+# Number of runs per command, the fastest one counts
+STARTUP_RUNS: int = 5
+
+def skeleton_document(family: str, version: str, resources: gen.ApprovalResources) -> Document:
+    """Return the python-docx document of an approval, filled into a copy of the prebuilt skeleton"""
+    doc: Document = copy.deepcopy(resources.skeleton)
+    gen.fill_approval(doc, gen.compose_approval(family, version, resources))
+    return doc
+
+def bench_skeleton(family: str, version: str, n: int, resources: gen.ApprovalResources) -> None:
+    """
+    Compare building every document from scratch with filling a copy of the
+    prebuilt skeleton. Both variants include saving the document.
+
+    Keyword arguments:
+    family    -- the taxonomy's family name
+    version   -- the taxonomy's version
+    n         -- number of documents rendered per variant
+    resources -- static resources loaded via load_resources()
+    """
+    def from_scratch() -> None:
+        content: gen.ApprovalContent = gen.compose_approval(family, version, resources)
+        doc: Document = Document()
+        gen.build_static_sections(doc, resources.labels, resources.logo)
+        gen.fill_approval(doc, content)
+        doc.save(io.BytesIO())
+
+    def from_skeleton() -> None:
+        skeleton_document(family, version, resources).save(io.BytesIO())
+
+    scratch_seconds: float = time_per_call(from_scratch, n)
+    skeleton_seconds: float = time_per_call(from_skeleton, n)
+    print("document from scratch:  {:.2f} ms/doc".format(scratch_seconds * 1000))
+    print("document from skeleton: {:.2f} ms/doc ({:.1f}x)".format(skeleton_seconds * 1000, scratch_seconds / skeleton_seconds))
+
+def bench_backends(family: str, version: str, n: int, resources: gen.ApprovalResources) -> None:
+    """
+    Compare the render time incl. saving of the python-docx backend and the
+    fast backend. tests/test_backends.py checks that they write equivalent
+    documents.
+
+    Keyword arguments:
+    family    -- the taxonomy's family name
+    version   -- the taxonomy's version
+    n         -- number of documents rendered per backend
+    resources -- static resources loaded via load_resources(backend="fast")
+    """
+    def docx_backend() -> bytes:
+        docx_bytes: io.BytesIO = io.BytesIO()
+        skeleton_document(family, version, resources).save(docx_bytes)
+        return docx_bytes.getvalue()
+
+    def fast_backend() -> bytes:
+        return resources.writer.render(gen.compose_approval(family, version, resources))
+
+    docx_seconds: float = time_per_call(docx_backend, n)
+    fast_seconds: float = time_per_call(fast_backend, n)
+    print("python-docx backend:    {:.2f} ms/doc".format(docx_seconds * 1000))
+    print("fast backend:           {:.2f} ms/doc ({:.1f}x)".format(fast_seconds * 1000, docx_seconds / fast_seconds))
+
+def bench_artifact_database(sizes_mb: List[int], tolerance: float) -> None:
+    """
+    Compare reading the approximate version by parsing the whole artifact
+    database (the former implementation) with the streaming lookup, on
+    synthetic databases whose version element is at the very end. The full
+    parse holds the whole tree in memory, so it only runs on the smallest
+    database. Reports the growth of the peak of the streaming lookup from
+    the smallest to the largest database against the tolerance;
+    tests/test_artifact_database.py checks it.
+
+    Keyword arguments:
+    sizes_mb  -- sizes of the synthetic databases in MB, e.g. [50, 300]
+    tolerance -- allowed growth of the streaming peak, 0.1 = 10%
+    """
+    peaks: List[int] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        size_mb: int
+        for size_mb in sorted(sizes_mb):
+            database_path: str = os.path.join(tmp_dir, "ArtifactDatabase-{}.xml".format(size_mb))
+            write_artifact_database(database_path, size_mb)
+            lookups: List[Tuple[str, Callable[[str], str]]] = [("streaming:      ", gen.get_approximate_version)]
+            if size_mb == min(sizes_mb):
+                lookups.insert(0, ("full parse:     ", parse_whole_artifact_database))
+            for label, lookup in lookups:
+                tracemalloc.start()
+                start: float = time.perf_counter()
+                version: str = lookup(database_path)
+                seconds: float = time.perf_counter() - start
+                peak: int = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print("artifact db {} MB, {} {:.2f} s, peak {:.1f} MB -> {}".format(size_mb, label, seconds, peak / 2**20, version))
+            peaks.append(peak)
+
+            start = time.perf_counter()
+            gen.get_approximate_version(database_path)
+            print("artifact db {} MB, cached lookup:  {:.3f} ms".format(size_mb, (time.perf_counter() - start) * 1000))
+            os.remove(database_path)
+    growth: float = peaks[-1] / peaks[0] - 1
+    print("streaming peak growth from {} to {} MB: {:+.1f}% (tolerance {:.0f}%){}".format(
+        min(sizes_mb), max(sizes_mb), growth * 100, tolerance * 100, " EXCEEDED" if growth > tolerance else ""))
+
+def write_artifact_database(database_path: str, size_mb: int) -> None:
+    """Write a synthetic artifact database of about size_mb MB"""
+    artifact: str = '  <Artifact Name="component-{}" Path="C:/Projects/build/component/artifact.dll" Checksum="0123456789abcdef"/>\n'
+    with open(database_path, "w") as database:
+        database.write("<ArtifactDatabase>\n <Artifacts>\n")
+        i: int = 0
+        while database.tell() < size_mb * 2**20:
+            database.write("".join(artifact.format(i + j) for j in range(1000)))
+            i += 1000
+        database.write(' </Artifacts>\n <ProductVersion MajorVersionYear="2025" MinorVersion="1"/>\n</ArtifactDatabase>\n')
+
+def parse_whole_artifact_database(path_to_artifact_database: str) -> str:
+    """The former get_approximate_version(): parse the whole tree, then search it"""
+    root: ET.Element = ET.parse(path_to_artifact_database).getroot()
+    for elem in root.iter():
+        if 'Version' in elem.tag and "MajorVersionYear" in elem.attrib:
+            return elem.attrib["MajorVersionYear"]
+
+def bench_startup(family: str, version: str, budget_ms: float) -> None:
+    """
+    Report the cold start of the commands that do not render a document:
+    their wall time (fastest of STARTUP_RUNS, incl. interpreter start)
+    against the budget and whether they import python-docx. The import time
+    is taken from 'python -X importtime'.
+
+    Keyword arguments:
+    family    -- the taxonomy's family name used for --dry-run
+    version   -- the taxonomy's version used for --dry-run
+    budget_ms -- wall time budget per command in ms
+    """
+    commands: Dict[str, List[str]] = {
+        "--help": ["--help"],
+        "--list-families": ["--list-families"],
+        "--show-template": ["--show-template", family],
+        "--dry-run": ["-family", family, "-version", version, "--dry-run"]}
+    label: str
+    for label, command_args in commands.items():
+        command: List[str] = [sys.executable, "gen_lic_approval.py"] + command_args
+        wall_seconds: float = min(time_command(command) for _ in range(STARTUP_RUNS))
+        modules, import_us = import_times([sys.executable, "-X", "importtime"] + command[1:])
+        print("startup {:<16} {:6.1f} ms wall, {:6.1f} ms imports (budget {:.0f} ms){}{}".format(
+            label, wall_seconds * 1000, import_us / 1000, budget_ms,
+            " EXCEEDED" if wall_seconds * 1000 > budget_ms else "",
+            ", imports python-docx" if "docx" in modules else ""))
+
+def bench_timings(family: str, version: str, n: int, resources: gen.ApprovalResources) -> None:
+    """
+    Compare the render time of the fast backend (the cheapest document, so
+    the hooks weigh most) with timings disabled and enabled, and the cost of
+    a single disabled stage hook.
+
+    Keyword arguments:
+    family    -- the taxonomy's family name
+    version   -- the taxonomy's version
+    n         -- number of documents rendered per variant
+    resources -- static resources loaded via load_resources(backend="fast")
+    """
+    def fast_document() -> None:
+        with gen._timings.document(family, version):
+            with gen._timings.stage("compose"):
+                content: gen.ApprovalContent = gen.compose_approval(family, version, resources)
+            gen.render_approval(content, resources)
+
+    def disabled_hook() -> None:
+        with gen._timings.stage("hook"):
+            pass
+
+    gen.set_timings(gen.NullTimings())
+    disabled_seconds: float = time_per_call(fast_document, n)
+    hook_seconds: float = time_per_call(disabled_hook, n * 100)
+    gen.set_timings(gen.StageTimings())
+    enabled_seconds: float = time_per_call(fast_document, n)
+    gen.set_timings(gen.NullTimings())
+    print("timings disabled:       {:.3f} ms/doc, {:.3f} us per stage hook".format(disabled_seconds * 1000, hook_seconds * 1e6))
+    print("timings enabled:        {:.3f} ms/doc ({:+.1f}%)".format(enabled_seconds * 1000, (enabled_seconds / disabled_seconds - 1) * 100))
+
+# Logo of the header section, as loaded by load_resources()
+LOGO_PATH: str = r"img/logo.png"
+
+def bench_media(family: str, version: str, n: int, templates_dir: str, logo_dpi: int, resources: gen.ApprovalResources) -> None:
+    """
+    Report the time Run.add_picture() spends per document on reading, hashing
+    and inspecting the logo, which the prepared image part saves, and the
+    size of a document with the logo downsampled.
+
+    Keyword arguments:
+    family        -- the taxonomy's family name
+    version       -- the taxonomy's version
+    n             -- number of documents, the logo is inspected n * 10 times
+    templates_dir -- folder with the JSON templates
+    logo_dpi      -- resolution the logo is downsampled to
+    resources     -- static resources loaded via load_resources(backend="fast")
+    """
+    def inspect_logo() -> None:
+        # the work Run.add_picture() repeats per document, creating the picture element is the same for both
+        Image.from_file(LOGO_PATH)
+
+    inspect_seconds: float = time_per_call(inspect_logo, n * 10)
+    print("logo via add_picture(): {:.3f} ms/doc reading and inspecting the image, saved by the prepared image part".format(inspect_seconds * 1000))
+
+    downsampled: gen.ApprovalResources = gen.load_resources(templates_dir, backend="fast", logo_dpi=logo_dpi)
+    docx_bytes: int = len(gen.generate_approval(family, version, resources)[1])
+    downsampled_bytes: int = len(gen.generate_approval(family, version, downsampled)[1])
+    print("logo {} -> {} bytes at {} dpi, document {} -> {} bytes ({} bytes saved per document)".format(
+        resources.logo.source_bytes, len(downsampled.logo.blob), logo_dpi, docx_bytes, downsampled_bytes, docx_bytes - downsampled_bytes))
+
+# Allowed growth of the peak traced memory of a streaming run from the
+# smallest to the largest batch, 0.1 = 10%
+MEMORY_TOLERANCE: float = 0.1
+
+# Families of the template corpus of the memory benchmark, more than the
+# template cache holds, so templates are evicted during the run
+MEMORY_FAMILIES: int = 300
+
+def bench_memory(batch_sizes: List[int], backend: str, tolerance: float) -> None:
+    """
+    Check that the peak memory of a streaming run stays flat as the batch
+    grows. Every batch is rendered by run_stream() in a fresh process, with
+    the jobs spread over a synthetic corpus of MEMORY_FAMILIES families and
+    a template cache of a third of them. Reports the growth of the peak of
+    the traced memory from the smallest to the largest batch against the
+    tolerance; tests/test_stream.py checks it.
+
+    Keyword arguments:
+    batch_sizes -- numbers of documents, one streaming run each
+    backend     -- document writer, one of gen.BACKENDS
+    tolerance   -- allowed growth of the peak, 0.1 = 10%
+    """
+    spawn_context: Any = multiprocessing.get_context("spawn")
+    peaks: List[float] = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        templates_dir: str = os.path.join(tmp_dir, "templates")
+        jobs: List[gen.ApprovalJob] = write_template_corpus(templates_dir, MEMORY_FAMILIES, 5)
+        docs: int
+        for docs in sorted(batch_sizes):
+            manifest_path: str = os.path.join(tmp_dir, "jobs-{}.jsonl".format(docs))
+            with open(manifest_path, "w") as manifest_file:
+                for i in range(docs):
+                    manifest_file.write(json.dumps(jobs[i % len(jobs)]._asdict()) + "\n")
+            output_dir: str = os.path.join(tmp_dir, "out-{}".format(docs))
+            os.mkdir(output_dir)
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn_context) as executor:
+                result: Dict[str, Any] = executor.submit(measure_stream, templates_dir, output_dir, manifest_path, backend, MEMORY_FAMILIES // 3).result()
+            peaks.append(result["peak_mb"])
+            print("stream {:>6} docs: peak traced memory {:6.2f} MB, peak RSS {} MB, {:7.1f} docs/s".format(
+                docs, result["peak_mb"], result["peak_rss_mb"], docs / result["seconds"]))
+    growth: float = peaks[-1] / peaks[0] - 1
+    print("peak growth from {} to {} docs: {:+.1f}% (tolerance {:.0f}%){}".format(
+        min(batch_sizes), max(batch_sizes), growth * 100, tolerance * 100, " EXCEEDED" if growth > tolerance else ""))
+
+def measure_stream(templates_dir: str, output_dir: str, manifest_path: str, backend: str, max_templates: int) -> Dict[str, Any]:
+    """Run one batch of the memory benchmark via run_stream(), in a fresh process, and return peak memory and duration"""
+    tracemalloc.start()
+    gen.set_template_loader(gen.TemplateLoader(max_templates, disk_cache=None))
+    resources: gen.ApprovalResources = gen.load_resources(templates_dir, backend=backend)
+    start: float = time.perf_counter()
+    stats: gen.StreamStats = gen.run_stream(gen.iter_manifest(manifest_path), resources, gen.BuildManifest(output_dir), force=True)
+    seconds: float = time.perf_counter() - start
+    if stats.failed:
+        raise AssertionError("{} jobs of the memory benchmark failed".format(stats.failed))
+    return {"peak_mb": stats.peak_bytes / 1024 / 1024, "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF) if resource else None, "seconds": seconds}
+
+# Default folder of the corpus results, one file per commit
+CORPUS_RESULTS_DIR: str = "benchmark-results"
+
+# Generation modes of the corpus benchmark: single documents via
+# write_approval(), a batch in one process, a batch with worker processes,
+# the asyncio pipeline with worker processes
+CORPUS_MODES: Tuple[str, ...] = ("single", "batch", "parallel", "pipeline")
+
+def bench_corpus(family_counts: List[int], max_versions: int, docs: int, backend: str, workers: int, results_path: str, compare_path: str) -> None:
+    """
+    Measure how the generator scales with the number of templates: for
+    synthetic corpora of family_counts families, every mode is run in a
+    fresh process to measure registry build, template lookup, render time
+    per document, throughput and peak RSS. The results are written as JSON
+    and compared with the results of an earlier run if given.
+
+    Keyword arguments:
+    family_counts -- numbers of families, one corpus each
+    max_versions  -- longest list of versions of a template, see write_template_corpus()
+    docs          -- number of documents rendered per corpus and mode
+    backend       -- document writer, one of gen.BACKENDS
+    workers       -- number of worker processes of the parallel mode
+    results_path  -- JSON file of the results, None for CORPUS_RESULTS_DIR/corpus-<commit>.json
+    compare_path  -- JSON file of earlier results or None
+    """
+    commit: str = git_commit()
+    results: List[Dict[str, Any]] = []
+    # spawned processes start without the memory of this one
+    spawn_context: Any = multiprocessing.get_context("spawn")
+    families: int
+    for families in family_counts:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            templates_dir: str = os.path.join(tmp_dir, "templates")
+            jobs: List[gen.ApprovalJob] = write_template_corpus(templates_dir, families, max_versions)
+            jobs = [jobs[i * len(jobs) // docs % len(jobs)] for i in range(docs)] # spread over the corpus
+            mode: str
+            for mode in CORPUS_MODES:
+                output_dir: str = os.path.join(tmp_dir, mode)
+                os.mkdir(output_dir)
+                with ProcessPoolExecutor(max_workers=1, mp_context=spawn_context) as executor:
+                    result: Dict[str, Any] = executor.submit(measure_corpus, templates_dir, output_dir, jobs, mode, backend, workers).result()
+                result = dict({"families": families, "mode": mode}, **result)
+                results.append(result)
+                print("corpus {:>6} families {:<8} registry {:8.1f} ms, lookup {:5.2f} us, {:7.2f} ms/doc (p95 {:7.2f}), {:7.1f} docs/s, peak RSS {} MB{}".format(
+                    families, mode, result["registry_ms"], result["lookup_us"], result["per_doc_ms"]["mean"], result["per_doc_ms"]["p95"],
+                    result["docs_per_sec"], result["peak_rss_mb"],
+                    " (workers {} MB)".format(result["peak_rss_workers_mb"]) if result["peak_rss_workers_mb"] else ""))
+
+    results_path = results_path or os.path.join(CORPUS_RESULTS_DIR, "corpus-" + (commit or "unknown")[:12] + ".json")
+    os.makedirs(os.path.dirname(results_path) or ".", exist_ok=True)
+    with open(results_path, "w") as results_file:
+        json.dump({
+            "commit": commit,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "backend": backend,
+            "docs": docs,
+            "workers": workers,
+            "max_versions": max_versions,
+            "results": results}, results_file, indent=1)
+    print("corpus results written to " + results_path)
+    if compare_path:
+        compare_corpus_results(compare_path, results)
+
+# Budget of one query of the search benchmark
+SEARCH_BUDGET_MS: float = 10.0
+
+@contextlib.contextmanager
+def kept_template_loader() -> Any:
+    """Restore the template loader of the process on exit, for modes that use their own on a temporary corpus"""
+    previous: gen.TemplateLoader = gen.get_template_loader()
+    try:
+        yield
+    finally:
+        gen.set_template_loader(previous)
+
+def bench_search(families: int, budget_ms: float) -> None:
+    """
+    Measure the template search index on a synthetic corpus: building it,
+    loading it when nothing changed, updating it after one template
+    changed, and queries matching one, a few and all templates against the
+    budget.
+
+    Keyword arguments:
+    families  -- number of templates of the corpus
+    budget_ms -- budget of one query in ms
+    """
+    queries: List[List[str]] = [["tag=family00042"], ["name=family0004*"], ["licweb=www.eba.europa.eu/legal-notice"], ["provider=eba.europa.eu", "tag=family0001*"]]
+    with tempfile.TemporaryDirectory() as tmp_dir, kept_template_loader():
+        templates_dir: str = os.path.join(tmp_dir, "templates")
+        write_template_corpus(templates_dir, families, 1)
+        gen.set_template_loader(gen.TemplateLoader(disk_cache=None))
+        start: float = time.perf_counter()
+        gen.TemplateSearchIndex(templates_dir).refresh()
+        print("search index of {} templates: built in {:.1f} ms".format(families, (time.perf_counter() - start) * 1000))
+        start = time.perf_counter()
+        index: gen.TemplateSearchIndex = gen.TemplateSearchIndex(templates_dir)
+        index.refresh()
+        print("search index of {} templates: loaded unchanged in {:.1f} ms".format(families, (time.perf_counter() - start) * 1000))
+        template_path: str = os.path.join(templates_dir, "family00007.json")
+        with open(template_path, "r") as template_file:
+            template: dict = json.load(template_file)
+        with open(template_path, "w") as template_file:
+            json.dump(dict(template, lictype="Changed"), template_file)
+        start = time.perf_counter()
+        index = gen.TemplateSearchIndex(templates_dir)
+        index.refresh()
+        print("search index of {} templates: loaded and updated 1 template in {:.1f} ms".format(families, (time.perf_counter() - start) * 1000))
+        query: List[str]
+        for query in queries:
+            conditions: List[Tuple[str, str]] = gen.parse_search_query(query)
+            matches: int = len(index.search(conditions))
+            query_ms: float = time_per_call(functools.partial(index.search, conditions), 20) * 1000
+            print("search {:<60} {:>6} matches in {:6.3f} ms{}".format(" ".join(query), matches, query_ms, " EXCEEDED" if query_ms > budget_ms else ""))
+
+# Seconds between the two renderings of the reproducibility check, more than
+# the 2 second resolution of zip entry times
+REPRODUCIBLE_PAUSE: float = 2.1
+
+def bench_reproducible(family: str, version: str, templates_dir: str) -> None:
+    """
+    Report whether reproducible mode writes byte-identical documents: render
+    the family twice per backend, each time with freshly loaded resources
+    and some seconds apart, and compare the hashes.
+
+    Keyword arguments:
+    family        -- the taxonomy's family name
+    version       -- the taxonomy's version
+    templates_dir -- folder with the JSON templates
+    """
+    backend: str
+    for backend in gen.BACKENDS:
+        hashes: List[str] = []
+        for run in range(2):
+            if run:
+                time.sleep(REPRODUCIBLE_PAUSE)
+            resources: gen.ApprovalResources = gen.load_resources(templates_dir, backend=backend, reproducible=True)
+            docx_file_name, docx_bytes = gen.generate_approval(family, version, resources)
+            hashes.append(hashlib.sha1(docx_bytes).hexdigest())
+        print("reproducible {} backend: {} {}{}".format(backend, *hashes, "" if hashes[0] == hashes[1] else " DIFFERENT"))
+
+def bench_store(families: int, max_versions: int) -> None:
+    """
+    Compare the JSON files with the SQLite template store on a synthetic
+    corpus: registry build, loading the template of a family and listing
+    its versions, plus the bulk import and the import when nothing changed.
+    Both read paths are measured without the on-disk template cache, and
+    must list the same families and versions.
+
+    Keyword arguments:
+    families     -- number of templates of the corpus
+    max_versions -- longest list of versions of a template, see write_template_corpus()
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir, kept_template_loader():
+        templates_dir: str = os.path.join(tmp_dir, "templates")
+        jobs: List[gen.ApprovalJob] = write_template_corpus(templates_dir, families, max_versions)
+        sample: List[str] = [job.family for job in jobs[::max(1, families // 1000)]]
+        store_path: str = os.path.join(tmp_dir, "templates.sqlite")
+        results: Dict[str, List[str]] = {}
+        mode: str
+        for mode in ("json", "store"):
+            if mode == "store":
+                start: float = time.perf_counter()
+                loader: gen.TemplateLoader = gen.StoredTemplateLoader(store_path, templates_dir, max_templates=1)
+                stats: Any = loader.store.sync()
+                print("store: bulk import of {} templates in {:.2f} s, {:.1f} MB".format(
+                    stats.added, time.perf_counter() - start, os.path.getsize(store_path) / 1024 / 1024))
+                start = time.perf_counter()
+                loader.store.sync()
+                print("store: import with nothing changed in {:.1f} ms".format((time.perf_counter() - start) * 1000))
+            else:
+                loader = gen.TemplateLoader(max_templates=1, disk_cache=None)
+            # one record kept: every template is read from its source
+            gen.set_template_loader(loader)
+            start = time.perf_counter()
+            registry: gen.TemplateRegistry = gen.get_template_registry(templates_dir)
+            print("{:<5}: registry of {} templates built in {:8.1f} ms".format(mode, families, (time.perf_counter() - start) * 1000))
+            load_ms: float = time_per_call(lambda: [registry.template(family) for family in sample], 3) / len(sample) * 1000
+            versions_ms: float = time_per_call(lambda: [registry.versions(family, "2.0") for family in sample], 3) / len(sample) * 1000
+            print("{:<5}: template of a family loaded in {:.3f} ms, versions since 2.0 listed in {:.3f} ms".format(mode, load_ms, versions_ms))
+            results[mode] = registry.families() + [version for family in sample for version in registry.versions(family)]
+        loader.store.close()
+        if results["json"] != results["store"]:
+            raise AssertionError("the template store lists other families or versions than the JSON files")
+
+def write_template_corpus(templates_dir: str, families: int, max_versions: int) -> List[gen.ApprovalJob]:
+    """
+    Write synthetic templates based on 'templates/eba.json' and return one
+    job per family. Family i is named 'family<i>' with the tag 'FAMILY<i>'
+    and lists 1 + i % max_versions versions.
+    """
+    with open(os.path.join("templates", "eba.json"), "r") as template_file:
+        base: dict = json.load(template_file)
+    base_instance: dict = base["instances"][0]
+    os.makedirs(templates_dir)
+    jobs: List[gen.ApprovalJob] = []
+    i: int
+    for i in range(families):
+        name: str = "family{:05d}".format(i)
+        instances: List[dict] = [dict(base_instance, _semver="{}.{}.0".format(1 + v // 10, v % 10), version="{}.{}.0.1".format(1 + v // 10, v % 10),
+                                      major_version="{}.{}".format(1 + v // 10, v % 10), files=[name.upper() + "::{}.{}".format(1 + v // 10, v % 10)])
+                                 for v in range(1 + i % max_versions)]
+        template: dict = dict(base, _name=name, _tags=[name.upper()], name=name.upper(), swname=name.upper() + " Reporting Framework", instances=instances)
+        with open(os.path.join(templates_dir, name + ".json"), "w") as template_file:
+            json.dump(template, template_file)
+        jobs.append(gen.ApprovalJob(name, instances[-1]["major_version"]))
+    return jobs
+
+def measure_corpus(templates_dir: str, output_dir: str, jobs: List[gen.ApprovalJob], mode: str, backend: str, workers: int) -> Dict[str, Any]:
+    """
+    Run one mode of the corpus benchmark, in a fresh process, and return its
+    measurements. Templates are parsed without the on-disk cache.
+
+    Keyword arguments:
+    templates_dir -- folder of the synthetic corpus
+    output_dir    -- folder the documents are written to
+    jobs          -- documents to render
+    mode          -- one of CORPUS_MODES
+    backend       -- document writer, one of gen.BACKENDS
+    workers       -- number of worker processes of the parallel mode
+    """
+    gen.set_template_loader(gen.TemplateLoader(max_templates=len(os.listdir(templates_dir)), disk_cache=None))
+    start: float = time.perf_counter()
+    registry: gen.TemplateRegistry = gen.get_template_registry(templates_dir)
+    registry_seconds: float = time.perf_counter() - start
+
+    # exact names and tags of all families, each looked up 10 times
+    keys: List[str] = [key for family in registry.families() for key in (family, family.upper())]
+    start = time.perf_counter()
+    for _ in range(10):
+        for key in keys:
+            registry.resolve(key)
+    lookup_seconds: float = (time.perf_counter() - start) / (10 * len(keys))
+
+    resources: gen.ApprovalResources = gen.load_resources(templates_dir, backend=backend)
+    per_doc: List[float] = []
+    start = time.perf_counter()
+    if mode == "single":
+        job: gen.ApprovalJob
+        for job in jobs:
+            doc_start: float = time.perf_counter()
+            gen.write_approval(job.family, job.version, resources, output_dir)
+            per_doc.append(time.perf_counter() - doc_start)
+    else:
+        if mode == "pipeline":
+            results, pipeline_stats = gen.run_pipeline(jobs, resources, workers, build_manifest=gen.BuildManifest(output_dir), force=True)
+        else:
+            results: List[gen.JobResult] = gen.run_batch(jobs, resources, workers if mode == "parallel" else 1, build_manifest=gen.BuildManifest(output_dir), force=True)
+        errors: List[str] = [result.error for result in results if result.error]
+        if errors:
+            raise RuntimeError("corpus jobs failed: " + errors[0])
+        per_doc = [result.seconds for result in results]
+    total_seconds: float = time.perf_counter() - start
+
+    per_doc.sort()
+    return {
+        "registry_ms": round(registry_seconds * 1000, 3),
+        "lookup_us": round(lookup_seconds * 1e6, 3),
+        "per_doc_ms": {
+            "mean": round(statistics.mean(per_doc) * 1000, 3),
+            "p50": round(per_doc[len(per_doc) // 2] * 1000, 3),
+            "p95": round(per_doc[min(len(per_doc) - 1, int(len(per_doc) * 0.95))] * 1000, 3)},
+        "docs_per_sec": round(len(per_doc) / total_seconds, 1),
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        "peak_rss_workers_mb": peak_rss_mb(resource.RUSAGE_CHILDREN) if resource and mode in ("parallel", "pipeline") else None}
+
+def peak_rss_mb(who: int) -> float:
+    """Return the peak resident set size of this process or of its largest child in MB"""
+    max_rss: int = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(max_rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+def compare_corpus_results(compare_path: str, results: List[Dict[str, Any]]) -> None:
+    """Print throughput and median render time of the results relative to earlier results"""
+    with open(compare_path, "r") as compare_file:
+        earlier: Dict[str, Any] = json.load(compare_file)
+    earlier_results: Dict[Tuple[int, str], Dict[str, Any]] = {(result["families"], result["mode"]): result for result in earlier["results"]}
+    print("compared with " + compare_path + " (commit " + str(earlier.get("commit")) + ")")
+    result: Dict[str, Any]
+    for result in results:
+        before: Dict[str, Any] = earlier_results.get((result["families"], result["mode"]))
+        if before:
+            print("corpus {:>6} families {:<8} docs/s {:+6.1f}%, p50 ms/doc {:+6.1f}%, registry {:+6.1f}%".format(
+                result["families"], result["mode"],
+                (result["docs_per_sec"] / before["docs_per_sec"] - 1) * 100,
+                (result["per_doc_ms"]["p50"] / before["per_doc_ms"]["p50"] - 1) * 100,
+                (result["registry_ms"] / before["registry_ms"] - 1) * 100))
+
+def git_commit() -> str:
+    """Return the commit of the working tree, None outside of a git repository"""
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def time_command(command: List[str]) -> float:
+    """Return the wall time in seconds of running a command"""
+    start: float = time.perf_counter()
+    subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def import_times(command: List[str]) -> Tuple[set, int]:
+    """Return the names of all modules a 'python -X importtime' command imports and their total import time in us"""
+    stderr: str = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True).stderr
+    modules: set = set()
+    total_us: int = 0
+    line: str
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if not name.startswith("  "): # nested imports are indented, top level ones hold their time
+            total_us += int(cumulative_us)
+    return modules, total_us
+
+def time_per_call(function: Callable[[], Any], n: int) -> float:
+    """Return the average CPU time in seconds of n calls after one warm up call"""
+    function()
+    start: float = time.process_time()
+    for _ in range(n):
+        function()
+    return (time.process_time() - start) / n
+
+if __name__ == "__main__":
+    main()
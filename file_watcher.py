@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Watches input files of the license approval generation for changes.
+
+On Linux the watcher uses inotify (via ctypes, no extra package), so it
+sleeps until the kernel reports a change. Everywhere else, or if inotify
+is not available, it polls the modification time and size of the watched
+files. Bursts of changes, e.g. an editor writing a file in several steps
+or a checkout touching many templates, are debounced: changes are
+collected until no new change arrived for the debounce time and then
+reported together.
+
+The watcher does not know what the files are used for, the mapping of
+changed files to approvals is done by watch_approvals() of
+gen_lic_approval.py.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing                   import Dict, Iterator, List, Set, Tuple
+
+# inotify event masks, see 'man 7 inotify'
+IN_ATTRIB: int = 0x00000004
+IN_CLOSE_WRITE: int = 0x00000008
+IN_MOVED_FROM: int = 0x00000040
+IN_MOVED_TO: int = 0x00000080
+IN_CREATE: int = 0x00000100
+IN_DELETE: int = 0x00000200
+IN_Q_OVERFLOW: int = 0x00004000
+IN_ISDIR: int = 0x40000000
+WATCH_MASK: int = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# wd, mask, cookie, length of the name that follows
+INOTIFY_EVENT: struct.Struct = struct.Struct("iIII")
+
+# State of a file when polled: (modification time, size)
+FileState = Tuple[int, int]
+
+class FileWatcher:
+    """
+    Reports changed files below a set of paths, see module docstring.
+
+    Keyword arguments:
+    paths         -- files and directories to watch. Directories are watched
+                     recursively, for files ending in one of the suffixes
+    suffixes      -- file name endings of interest inside watched directories.
+                     Hidden files (starting with '.') are always ignored there
+    debounce      -- seconds without new changes before a burst is reported
+    poll_interval -- seconds between two polls of the polling fallback
+    use_inotify   -- False always polls
+    """
+
+    def __init__(
+        self,
+        paths: List[str],
+        suffixes: Tuple[str, ...] = ("",),
+        debounce: float = 0.3,
+        poll_interval: float = 0.5,
+        use_inotify: bool = True):
+        self.files: Set[str] = {os.path.abspath(path) for path in paths if not os.path.isdir(path)}
+        self.directories: List[str] = [os.path.abspath(path) for path in paths if os.path.isdir(path)]
+        self.suffixes: Tuple[str, ...] = suffixes
+        self.debounce: float = debounce
+        self.poll_interval: float = poll_interval
+        self._inotify_fd: int = None
+        self._watch_dirs: Dict[int, str] = {} # inotify watch descriptor -> directory
+        self._states: Dict[str, FileState] = {}
+        if use_inotify and sys.platform.startswith("linux"):
+            self._start_inotify()
+        if self._inotify_fd is None:
+            self._states = self._poll_states()
+
+    @property
+    def backend(self) -> str:
+        """Return 'inotify' or 'polling'"""
+        return "polling" if self._inotify_fd is None else "inotify"
+
+    def changes(self) -> Iterator[Tuple[Set[str], float]]:
+        """
+        Yield the absolute paths of every debounced burst of changes plus the
+        time.perf_counter() its first change was seen. Blocks until changes
+        happen, runs until the caller stops iterating.
+        """
+        while True:
+            changed: Set[str] = self._wait(None)
+            first_seen: float = time.perf_counter()
+            while True:
+                more: Set[str] = self._wait(self.debounce)
+                if not more:
+                    break
+                changed |= more
+            yield changed, first_seen
+
+    def close(self) -> None:
+        """Stop watching"""
+        if self._inotify_fd is not None:
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    def is_watched(self, path: str) -> bool:
+        """Return True if a changed path is of interest: a watched file or a matching file in a watched directory"""
+        if path in self.files:
+            return True
+        name: str = os.path.basename(path)
+        return (not name.startswith(".") and name.endswith(self.suffixes)
+                and any(path.startswith(directory + os.sep) for directory in self.directories))
+
+    def _wait(self, timeout: float) -> Set[str]:
+        """Return the changes seen within timeout seconds, wait for the first change if timeout is None"""
+        if self._inotify_fd is None:
+            while True:
+                time.sleep(self.poll_interval if timeout is None else timeout)
+                changed: Set[str] = self._poll()
+                if changed or timeout is not None:
+                    return changed
+        while True:
+            readable: list = select.select([self._inotify_fd], [], [], timeout)[0]
+            if not readable:
+                return set()
+            changed = self._read_events()
+            if changed or timeout is not None:
+                return changed
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # inotify
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def _start_inotify(self) -> None:
+        """Watch the directories and the parent directories of the files, editors often replace files instead of writing them"""
+        try:
+            self._libc: ctypes.CDLL = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd: int = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return # no inotify, e.g. not glibc: poll
+        if fd < 0:
+            return
+        self._inotify_fd = fd
+        directory: str
+        for directory in {os.path.dirname(path) for path in self.files}:
+            self._add_watch(directory)
+        for directory in self.directories:
+            for root, _, _ in os.walk(directory):
+                self._add_watch(root)
+
+    def _add_watch(self, directory: str) -> None:
+        wd: int = self._libc.inotify_add_watch(self._inotify_fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self._watch_dirs[wd] = directory
+
+    def _read_events(self) -> Set[str]:
+        """Return the watched paths of all pending inotify events"""
+        changed: Set[str] = set()
+        try:
+            buffer: bytes = os.read(self._inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset: int = 0
+        while offset < len(buffer):
+            wd, mask, _, name_length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT.size
+            name: str = os.fsdecode(buffer[offset:offset + name_length].rstrip(b"\0"))
+            offset += name_length
+            if mask & IN_Q_OVERFLOW:
+                # events were lost: report the watched directories, i.e. everything in them
+                changed.update(self.files)
+                changed.update(self.directories)
+                continue
+            directory: str = self._watch_dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path: str = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and any(path.startswith(root + os.sep) for root in self.directories):
+                    # new folder below a watched directory: watch it and report what it holds already
+                    for root, _, files in os.walk(path):
+                        self._add_watch(root)
+                        changed.update(file_path for file_path in (os.path.join(root, file) for file in files) if self.is_watched(file_path))
+                continue
+            if self.is_watched(path):
+                changed.add(path)
+        return changed
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # polling fallback
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def _poll(self) -> Set[str]:
+        """Return the paths added, removed or modified since the last poll"""
+        states: Dict[str, FileState] = self._poll_states()
+        changed: Set[str] = {path for path in states.keys() | self._states.keys() if states.get(path) != self._states.get(path)}
+        self._states = states
+        return changed
+
+    def _poll_states(self) -> Dict[str, FileState]:
+        """Return modification time and size of all watched files"""
+        states: Dict[str, FileState] = {}
+        path: str
+        for path in self.files:
+            try:
+                stat: os.stat_result = os.stat(path)
+                states[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                pass # removed, reported as change
+        directory: str
+        for directory in self.directories:
+            for root, _, files in os.walk(directory):
+                for name in files:
+                    path = os.path.join(root, name)
+                    if self.is_watched(path):
+                        try:
+                            stat = os.stat(path)
+                            states[path] = (stat.st_mtime_ns, stat.st_size)
+                        except OSError:
+                            pass
+        return states
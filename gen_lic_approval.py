@@ -10,31 +10,52 @@ information and can be submitted e.g a lawyer of a company. The script
 allows generation of license approval for different providers, though only
 a JSON sample concerning the European Banking Authority (EBA) is provided
 at the moment.
+
+python-docx, the XML parser, the color modules and the fast writer are
+imported by the functions that need them, so commands that do not render
+a document (--list-families, --show-template, --dry-run, argument errors)
+start without loading them. See 'benchmark.py --bench startup'.
 """
 
+from __future__ import annotations
+
 import argparse
+import bisect
+import contextlib
+import copy
+from collections              import OrderedDict
+import csv
 import datetime
-from docx                     import Document
-from docx.enum.dml            import MSO_THEME_COLOR_INDEX
-from docx.enum.text           import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
-from docx.opc.constants       import RELATIONSHIP_TYPE as RT
-from docx.oxml.shared         import OxmlElement, qn, CT_String
-from docx.oxml.text.font      import CT_RPr
-from docx.oxml.text.run       import CT_R
-from docx.parts.document      import DocumentPart
-from docx.shared              import Inches, Pt, RGBColor
-from docx.styles.style        import _ParagraphStyle
-from docx.table               import _Cell
-from docx.text.run            import Run
-from docx.text.paragraph      import Paragraph
-from docx.text.parfmt         import ParagraphFormat
+import functools
+import gc
+import hashlib
+import io
 import json
+import operator
 import os
-from typing                   import Any, MutableMapping, Tuple
-import xml.etree.ElementTree  as ET
-from colorama                 import init
-from termcolor                import colored
-from Constants                import Constants
+import pickle
+import re
+import string
+import sys
+import threading
+import time
+from typing                   import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Tuple
+from Constants                import DEFAULT_LABEL_SET, LABELS_FILE, Labels, load_label_sets
+
+if TYPE_CHECKING:
+    from concurrent.futures       import Future
+    from docx.document            import Document
+    from docx.oxml.shared         import CT_String
+    from docx.oxml.text.font      import CT_RPr
+    from docx.oxml.text.run       import CT_R
+    from docx.parts.document      import DocumentPart
+    from docx.styles.style        import _ParagraphStyle
+    from docx.table               import _Cell
+    from docx.text.run            import Run
+    from docx.text.paragraph      import Paragraph
+    from docx.text.parfmt         import ParagraphFormat
+    from ooxml_writer             import FastApprovalWriter
+    from template_store           import ImportStats, StoredTemplate, TemplateStore
 
 # Usage: py -3.7 gen_lic_approval.py [-family='EBA'] [-version="3.2"]
 #        py -3.7 gen_lic_approval.py [-family="lei"] [-version="2022-07-02 (REC)"]
@@ -44,409 +65,2077 @@ def main() -> None:
     argp: argparse.ArgumentParser = argparse.ArgumentParser(description='Generate license approval file to submit it to lawyer.')
     argp.add_argument('-family', '--family', help='The taxonomy\'s family name. E.g. EBA, BBK, ...')
     argp.add_argument('-version', '--version', help='The taxonomy\'s version')
+    argp.add_argument('-manifest', '--manifest', help='JSONL or CSV file with one family/version job per line. E.g. jobs.jsonl')
+    argp.add_argument('-jobs', '--jobs', type=int, default=1, help='Number of worker processes rendering a manifest in parallel')
+    argp.add_argument('--fail-fast', action='store_true', help='Stop a manifest run at the first failing job')
+    argp.add_argument('--pipeline', action='store_true', help='Render a manifest in an asyncio pipeline overlapping template reads, rendering and writes')
+    argp.add_argument('--queue-size', type=int, default=8, help='Capacity of the queues between the pipeline stages')
+    argp.add_argument('--stream', action='store_true', help='Render a manifest job by job with memory bounded by one document, see run_stream()')
+    argp.add_argument('--memory-limit', type=float, metavar='MB', help='Ceiling of the traced memory of --stream, the run stops above it')
+    argp.add_argument('--max-templates', type=int, default=256, help='Number of parsed templates and render plans kept in memory')
+    argp.add_argument('--all-versions', action='store_true', help='Render -family for every version listed in the instances of its template')
+    argp.add_argument('--since', metavar='SEMVER', help='Like --all-versions, but only versions whose _semver is this one or newer. E.g. 3.0')
+    argp.add_argument('--zip', metavar='FILE', help='Write all approvals of the run into one zip archive instead of single files, one folder per family. Renders every job')
+    argp.add_argument('--watch', action='store_true', help='Render -family or -manifest, then render again the approvals affected by changes of templates, logo, rules or labels until Ctrl+C')
+    argp.add_argument('--debounce-ms', type=float, default=WATCH_DEBOUNCE * 1000, help='Quiet time after a change before --watch renders, bursts of changes are rendered once')
+    argp.add_argument('--poll', action='store_true', help='Let --watch poll the inputs instead of using inotify')
+    argp.add_argument('--templates-dir', default=r"./templates", help='Folder with the JSON templates')
+    argp.add_argument('--rules', default=RULES_FILE, help='Rules file with the family specific content of the approvals')
+    argp.add_argument('--cache-dir', default=TEMPLATE_CACHE_DIR, help='Folder of the on-disk template cache')
+    argp.add_argument('--rebuild-cache', action='store_true', help='Drop the on-disk template cache before loading templates')
+    argp.add_argument('--cache-stats', action='store_true', help='Print template cache hits and misses at the end of the run')
+    argp.add_argument('--template-store', nargs='?', const=TEMPLATE_STORE_FILE, metavar='DB', help='Read the templates from the SQLite template store instead of the JSON files, changed files are imported first. Default DB: ' + TEMPLATE_STORE_FILE)
+    argp.add_argument('--import-templates', action='store_true', help='Import the templates folder into the template store (--template-store) and exit')
+    argp.add_argument('--backend', choices=BACKENDS, default="docx", help='Document writer: python-docx (reference) or the fast OOXML writer')
+    argp.add_argument('--labels', default=DEFAULT_LABEL_SET, help='Label set of the approvals, unless a manifest job selects one ("labels" key or column)')
+    argp.add_argument('--labels-file', default=LABELS_FILE, help='Label file with the named label sets, see Constants.py')
+    argp.add_argument('--logo-dpi', type=int, help='Downsample the logo to this resolution of its display size, if it has more pixels (needs Pillow)')
+    argp.add_argument('--reproducible', action='store_true', help='Write byte-identical files for identical content: fixed zip times and order, core properties and hyperlink ids. Honors SOURCE_DATE_EPOCH, also as submission date')
+    argp.add_argument('--submission-date', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD', help='Submission date shown in the approvals instead of the date of the run')
+    argp.add_argument('--force', action='store_true', help='Render approvals even if their inputs did not change since the last run')
+    argp.add_argument('--artifact-db', help='ArtifactDatabase.xml to read the approximate version from. Default: ' + ARTIFACT_DATABASE)
+    argp.add_argument('--approximate-version', help='Approximate time/version shown in the form, instead of the one of the artifact database')
+    argp.add_argument('--serve', action='store_true', help='Run the generation server on localhost, see approval_server.py')
+    argp.add_argument('--port', type=int, default=8765, help='Port of the generation server')
+    argp.add_argument('--max-concurrent', type=int, default=4, help='Number of approvals the generation server renders at the same time')
+    argp.add_argument('--list-families', action='store_true', help='List the families of all templates and exit')
+    argp.add_argument('--show-template', metavar='FAMILY', help='Show the fields of the template of a family and exit')
+    argp.add_argument('--search', nargs='+', metavar='FIELD=VALUE', help='List the templates matching all conditions and exit. Fields: ' + ', '.join(SEARCH_FIELDS) + '; a VALUE alone matches any field, VALUE* by prefix')
+    argp.add_argument('--validate', action='store_true', help='Check all templates against the template schema and the family rules. Before a manifest or family run, errors stop the run')
+    argp.add_argument('--schema', default=TEMPLATE_SCHEMA_FILE, help='Schema of the templates used by --validate')
+    argp.add_argument('--dry-run', action='store_true', help='Show the file name the approval of -family/-version would be written to, without rendering it')
+    argp.add_argument('--timings-json', metavar='FILE', help='Write wall/CPU time per stage and document plus peak memory as JSON lines, see StageTimings')
+    argp.add_argument('--profile', metavar='FILE', help='Write cProfile stats of this process, view them with: python -m pstats FILE')
     args: argparse.Namespace = argp.parse_args()
+    if args.pipeline and args.fail_fast:
+        argp.error("--fail-fast is not supported with --pipeline, jobs of all stages run at the same time")
+    if args.stream and (args.jobs > 1 or args.pipeline or args.zip):
+        argp.error("--stream renders in this process one job at a time, it does not support --jobs, --pipeline or --zip")
+    if args.watch and (args.jobs > 1 or args.pipeline or args.stream or args.zip or args.serve or args.dry_run):
+        argp.error("--watch renders in this process with warm resources, it does not support --jobs, --pipeline, --stream, --zip, --serve or --dry-run")
+    if args.watch and not (args.manifest or args.family):
+        argp.error("--watch needs -family or -manifest")
+    if (args.all_versions or args.since) and not args.family:
+        argp.error("--all-versions and --since need -family")
+    if args.import_templates and not args.template_store:
+        args.template_store = TEMPLATE_STORE_FILE
 
-    objConsts: Constants = Constants()
+    if args.timings_json or args.stream:
+        # started first, so the memory of the static resources is traced as well
+        import tracemalloc
+        tracemalloc.start()
+    if args.timings_json:
+        set_timings(StageTimings(open(args.timings_json, "w")))
+    if args.profile:
+        import cProfile
+        profiler: cProfile.Profile = cProfile.Profile()
+        profiler.enable()
 
-    init() # Initialize modules for colors
+    disk_cache: TemplateDiskCache = TemplateDiskCache(args.cache_dir)
+    if args.rebuild_cache:
+        disk_cache.clear()
+    if args.template_store:
+        set_template_loader(StoredTemplateLoader(args.template_store, args.templates_dir, args.max_templates))
+    else:
+        set_template_loader(TemplateLoader(args.max_templates, disk_cache))
 
-    taxonomy_family_name: str = args.family
-    taxonomy_version: str = args.version
-
-    if taxonomy_family_name:
-        # Find requested template via family
-        located_json_file: str = ""
-        for i in range(len(get_all_templates())):
-            if taxonomy_family_name.lower() in get_all_templates()[i]:
-                located_json_file = get_all_templates()[i]
-
-        # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-        # <LICENSE APPROVAL DOCUMENT>
-        # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-        
-        # Customize document
-        doc: Document = Document()
-        section_style: _ParagraphStyle = doc.styles['Normal']
-        section_style.font.name = 'Calibri (Body)'
-        section_style.font.size = Pt(12)
-        section = doc.sections[0] # provide access to first section
-
-        # ------------------------------------------------------------------------------------------------------------------
-        # header section:
-        # ------------------------------------------------------------------------------------------------------------------
-        header: section._Header = section.header
-        # table contains 1 row and 2 cells
-        header_table: Any = header.add_table(1, 2, Inches(12))
-        cell: _Cell
-        for cell in header_table.columns[1].cells:
-            cell.width = Inches(1)
-        # left cell wih internal refernces internal usage
-        para_l_cell: _Cell = set_paragraph(header_table, 0, 0, 0)
-        run_l_cell: Run = para_l_cell.add_run(objConsts.get_header_text())
-        run_l_cell.font.size = Pt(11)
-        # right cell displays logo pict
-        para_r_cell: _Cell = set_paragraph(header_table, 0, 1, 0)
-        run_r_cell = para_r_cell.add_run()
-
-        run_r_cell.add_picture(r"img/logo.png", width=1380000, height=520000)
-
-        set_title(doc, WD_ALIGN_PARAGRAPH.CENTER, objConsts.get_title_main_section(), True, 13)
-
-        # ------------------------------------------------------------------------------------------------------------------
-        # meta info section about the document
-        # ------------------------------------------------------------------------------------------------------------------
-        doc_info_section: Any = doc.add_table(rows=3, cols=3)
-        # row = 0, cells = 0,1
-        set_pargraph_meta_section(doc_info_section, 0, 0, 0, WD_LINE_SPACING.SINGLE, objConsts.get_sender_form(), WD_ALIGN_PARAGRAPH.LEFT)
-        set_pargraph_meta_section(doc_info_section, 0, 1, 0, WD_LINE_SPACING.SINGLE, objConsts.get_submission_text_property(), WD_ALIGN_PARAGRAPH.RIGHT)
-        set_pargraph_meta_section(doc_info_section, 0, 2, 0, WD_LINE_SPACING.SINGLE, objConsts.get_submission_text_name(), WD_ALIGN_PARAGRAPH.LEFT)
-        # row = 1, cells = 0,1
-        set_pargraph_meta_section(doc_info_section, 1, 0, 0, WD_LINE_SPACING.SINGLE, objConsts.get_submission_to(), WD_ALIGN_PARAGRAPH.LEFT)
-        set_pargraph_meta_section(doc_info_section, 1, 1, 0, WD_LINE_SPACING.SINGLE, objConsts.get_appt_or_rej_text(), WD_ALIGN_PARAGRAPH.RIGHT)
-        set_pargraph_meta_section(doc_info_section, 1, 2, 0, WD_LINE_SPACING.SINGLE, "", WD_ALIGN_PARAGRAPH.LEFT)
-        # row = 2, cells = 0,1                                                                                                                     # american date format
-        set_pargraph_meta_section(doc_info_section, 2, 0, 0, WD_LINE_SPACING.SINGLE, objConsts.get_sub_date() + str(datetime.datetime.now().strftime("%m/%d/%Y")), WD_ALIGN_PARAGRAPH.LEFT)
-        set_pargraph_meta_section(doc_info_section, 2, 1, 0, WD_LINE_SPACING.SINGLE, objConsts.get_date_appr_text(), WD_ALIGN_PARAGRAPH.RIGHT)
-        set_pargraph_meta_section(doc_info_section, 2, 2, 0, WD_LINE_SPACING.SINGLE, objConsts.get_date_format(), WD_ALIGN_PARAGRAPH.LEFT)
-        # set width for cells
-        set_meta_section_table_cell_width(doc_info_section, 0, 3.6)
-        set_meta_section_table_cell_width(doc_info_section, 1, 3.0)
-        set_meta_section_table_cell_width(doc_info_section, 2, 2.2)
-
-        set_sep_line(doc, "________________________________________________________________________", False)
-
-        # ------------------------------------------------------------------------------------------------------------------
-        # main section of the document (deals with meta information about the taxonomy)
-        # ------------------------------------------------------------------------------------------------------------------
-        main_table: Any = doc.add_table(rows=9, cols=2)
-        set_main_section_paragraph(main_table, 0, 0, objConsts.get_third_party_name_prop())
-
-        # Name of third party software
-        # ----------------------------
-        col_name_h: _Cell = main_table.rows[0].cells[1]
-        if "-" not in taxonomy_family_name and taxonomy_family_name != "eba":
-            col_name_h.text = iterate_over_json_file(located_json_file, "swname")
+    # list, show, search, validate and dry run do not render documents and never load python-docx
+    valid: bool = True
+    try:
+        if args.import_templates:
+            print_import_report(get_template_loader().store)
+        elif args.list_families:
+            print_families(get_template_registry(args.templates_dir))
+        elif args.show_template:
+            print_template(get_template_registry(args.templates_dir).template(args.show_template))
+        elif args.search:
+            print_search_results(args.templates_dir, args.search)
         else:
-            if taxonomy_family_name == "acpr-corep":
-                col_name_h.text = taxonomy_family_name.replace("-"," / ").upper() + " XBRLTaxonomy"
-            elif taxonomy_family_name == "us-gaap":
-                col_name_h.text = "FASB " + taxonomy_version + " SEC and US GAAP Reporting Taxonomy"
-                prov_taxonomy_family_name = "FASB " + taxonomy_version + " SEC and US GAAP Reporting Taxonomy"
+            if args.validate:
+                validation_start: float = time.perf_counter()
+                template_count, issues = validate_templates(args.templates_dir, args.jobs, args.schema, args.rules)
+                valid = print_validation_report(template_count, issues, time.perf_counter() - validation_start)
+            # with a manifest or family the validation is a pre-step of the run
+            if valid and (args.manifest or args.family or args.serve or not args.validate):
+                if args.dry_run:
+                    valid = print_file_names(args)
+                else:
+                    # failed jobs of a batch fail the run, also without --fail-fast
+                    valid = render_approvals(args) == 0
+    except LookupError as e:
+        print(colored("ERROR: " + str(e), 'red'))
+        valid = False
+    except MemoryError as e:
+        print(colored("ERROR: " + str(e), 'red'))
+        valid = False
+
+    if args.profile:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+    _timings.close()
+
+    if args.cache_stats:
+        # worker processes of a parallel run keep their own counters
+        print("Template cache: {} hits, {} misses".format(disk_cache.hits, disk_cache.misses))
+    if not valid:
+        sys.exit(1)
+
+def print_file_names(args: argparse.Namespace) -> bool:
+    """Print the file paths the approvals requested on the command line would be written to, return False if a job failed"""
+    resources: ApprovalResources = load_resources(args.templates_dir, rules_path=args.rules, approximate_version=args.approximate_version or DEFAULT_APPROXIMATE_VERSION, render=False,
+                                                  labels_path=args.labels_file, label_set=args.labels, reproducible=args.reproducible, submission_date=args.submission_date)
+    jobs: List[ApprovalJob] = requested_jobs(args, resources.templates)
+    valid: bool = True
+    job: ApprovalJob
+    for job in jobs:
+        try:
+            print(os.path.join(OUTPUT_DIR, compose_approval(job.family, job.version, resources_for_labels(resources, job.labels)).file_name))
+        except LookupError as e:
+            print(colored("ERROR: " + str(e), 'red'))
+            valid = False
+    return valid
+
+def render_approvals(args: argparse.Namespace) -> int:
+    """Render the approvals requested on the command line: server, watch mode, manifest, all versions of a family or a single family.
+    Return the number of failed and skipped jobs"""
+    approximate_version: str = resolve_approximate_version(args.approximate_version, args.artifact_db)
+
+    if args.serve:
+        from approval_server import serve
+        resources: ApprovalResources = load_resources(args.templates_dir, rules_path=args.rules, backend=args.backend, approximate_version=approximate_version, logo_dpi=args.logo_dpi, labels_path=args.labels_file, label_set=args.labels, reproducible=args.reproducible, submission_date=args.submission_date)
+        serve(functools.partial(render_request, resources), port=args.port, max_concurrent=args.max_concurrent)
+    elif args.watch:
+        watch_approvals(args, approximate_version, args.debounce_ms / 1000, not args.poll)
+    elif args.stream:
+        resources = load_resources(args.templates_dir, rules_path=args.rules, backend=args.backend, approximate_version=approximate_version, logo_dpi=args.logo_dpi, labels_path=args.labels_file, label_set=args.labels, reproducible=args.reproducible, submission_date=args.submission_date)
+        build_manifest: BuildManifest = BuildManifest(OUTPUT_DIR)
+        stream_start: float = time.perf_counter()
+        try:
+            stats: StreamStats = run_stream(iter_manifest(args.manifest) if args.manifest else requested_jobs(args, resources.templates),
+                                            resources, build_manifest, args.force, args.memory_limit)
+        finally:
+            # the files rendered until the ceiling was hit are recorded as well
+            build_manifest.save()
+        print_stream_summary(stats, time.perf_counter() - stream_start)
+        return stats.failed
+    elif args.manifest or args.all_versions or args.since or (args.zip and args.family):
+        # Static resources are loaded once and shared by all jobs of the batch,
+        # the versions of a family share its parsed template and render plan
+        resources = load_resources(args.templates_dir, rules_path=args.rules, backend=args.backend, approximate_version=approximate_version, logo_dpi=args.logo_dpi, labels_path=args.labels_file, label_set=args.labels, reproducible=args.reproducible, submission_date=args.submission_date)
+        jobs: List[ApprovalJob] = requested_jobs(args, resources.templates)
+        # the archive is written as a whole, so it does not use the build manifest
+        build_manifest: BuildManifest = None if args.zip else BuildManifest(OUTPUT_DIR)
+        batch_start: float = time.perf_counter()
+        with ApprovalArchive(args.zip, zip_date_time(resources.fixed_time)) if args.zip else contextlib.nullcontext() as archive:
+            if args.pipeline:
+                results, pipeline_stats = run_pipeline(jobs, resources, args.jobs, args.queue_size, build_manifest, args.force, archive)
+                _timings.emit(dict({"type": "pipeline"}, **pipeline_stats.summary()))
             else:
-                col_name_h.text = iterate_over_json_file(located_json_file, "swname") # respect families with topics
-
-        # Version number or year
-        # -----------------------
-        set_main_section_paragraph(main_table, 1, 0, objConsts.get_version_year_prop())
-        if taxonomy_family_name == "bdp":
-            # two different versions for the taxonomies provided by the Bank of Portugal.
-            # therefore script call : py -3.7 gen_lic_approval.py -family="bdp" -version="2.10.1 5.0.0"
-            set_main_section_paragraph(main_table, 1, 1, taxonomy_version.split(" ")[0]+" bdp v"+taxonomy_version.split(" ")[1])
-        else:
-            set_main_section_paragraph(main_table, 1, 1, taxonomy_version)
-
-        # Is this a version update of 
-        # previously approved software? If 
-        # Yes, reason for update?
-        # --------------------------------
-        set_main_section_paragraph(main_table, 2, 0, objConsts.get_update_prop())
-        updateOfVersion: list[str] = ["Yes","No","YES","Yes, update of the ESMA ESEF Common Recommendation (CR) version"]
-        if taxonomy_family_name == "dnb-dict":
-            set_main_section_paragraph(main_table, 2, 1, updateOfVersion[1])
-        elif taxonomy_family_name == "us-gaap" or taxonomy_family_name == "ifrs" or taxonomy_family_name == "xbrlgl":
-            set_main_section_paragraph(main_table, 2, 1, updateOfVersion[2])
-        elif taxonomy_family_name == "lei":
-            set_main_section_paragraph(main_table, 2, 1, updateOfVersion[3])
-        else:
-            set_main_section_paragraph(main_table, 2, 1, updateOfVersion[0])
-
-        # General description of software
-        # -------------------------------
-        set_main_section_paragraph(main_table, 3, 0, objConsts.get_softw_desc_prop())
-        set_main_section_paragraph(main_table, 3, 1, iterate_over_json_file(located_json_file, "swdescription"))
-        
-        # Link to software homepage
-        # -------------------------
-        set_main_section_paragraph(main_table, 4, 0, objConsts.get_link_property_prop())
-        homepage_hyperlink = set_paragraph(main_table, 4, 1, 0)
-        if taxonomy_family_name == "us-gaap":
-            add_hyperlink(homepage_hyperlink, iterate_over_json_file(located_json_file, "fasbhome"), "SEC and US GAAP Taxonomies")
-        elif taxonomy_family_name == "bbk":
-            add_hyperlink(homepage_hyperlink, iterate_over_json_file(located_json_file, "homepage"), "Reporting - Formats(XML and XBRL)")
-        elif taxonomy_family_name == "boe-banking":
-            add_hyperlink(homepage_hyperlink, iterate_over_json_file(located_json_file, "homepage"), "Regulatory Reporting for the Banking Sector")
-        elif taxonomy_family_name == "cipc":
-            add_hyperlink(homepage_hyperlink, iterate_over_json_file(located_json_file, "homepage"), "XBRL Programs")
-        elif taxonomy_family_name == "dnb-ftk":
-            add_hyperlink(homepage_hyperlink, iterate_over_json_file(located_json_file, "homepage"), "Pensionsfondsen")
-        elif taxonomy_family_name == "sfrdp":
-            add_hyperlink(homepage_hyperlink, iterate_over_json_file(located_json_file, "home"), iterate_over_json_file(located_json_file, "home"))
-        else:
-            add_hyperlink(homepage_hyperlink, iterate_over_json_file(located_json_file, "homepage"), iterate_over_json_file(located_json_file, "homepage"))
-
-        # License type (e.g. MIT, BSD, GPL)
-        # ---------------------------------
-        set_main_section_paragraph(main_table, 5, 0, objConsts.get_license_prop())
-        str_prep_lic_type = iterate_over_json_file(located_json_file, "lictype")
-        if taxonomy_family_name == "dnb-biscbs" or taxonomy_family_name == "dnb-dict" or taxonomy_family_name == "dnb-ftk":
-            lic_type_hyperlink = set_paragraph(main_table, 5, 1, 0)
-            add_hyperlink(lic_type_hyperlink, iterate_over_json_file(located_json_file, "lictype"), "CC-BY-4.0" )
-        else:
-            set_main_section_paragraph(main_table, 5, 1, str_prep_lic_type)
-
-        # Link to website showing license:
-        # --------------------------------
-        set_main_section_paragraph(main_table, 6, 0, objConsts.get_link_lic_prop())
-        licweb_hyperlink = set_paragraph(main_table, 6, 1, 0)
-        if taxonomy_family_name == "us-gaap":
-            add_hyperlink(licweb_hyperlink, iterate_over_json_file(located_json_file, "licweb"), "Terms and Conditions")
-        elif taxonomy_family_name == "acpr-corep" or taxonomy_family_name == "acpr-creditimmo":
-            licweb_hyperlink.add_run(iterate_over_json_file(located_json_file, "licweb"))
-        elif taxonomy_family_name == "bdp":
-            add_hyperlink(licweb_hyperlink, iterate_over_json_file(located_json_file, "licweb"), "Disclaimer and Copyright")
+                results: List[JobResult] = run_batch(jobs, resources, args.jobs, args.fail_fast, build_manifest, args.force, archive)
+        if build_manifest:
+            build_manifest.save()
+        result: JobResult
+        for result in results:
+            _timings.emit(result.timings)
+        failed: int = print_batch_summary(results, time.perf_counter() - batch_start)
+        if args.pipeline:
+            print_pipeline_summary(pipeline_stats)
+        if args.zip:
+            print("Approvals written to the archive: " + colored(args.zip, 'yellow'))
+        return failed
+    elif args.family:
+        build_manifest = BuildManifest(OUTPUT_DIR)
+        resources = load_resources(args.templates_dir, rules_path=args.rules, backend=args.backend, approximate_version=approximate_version, logo_dpi=args.logo_dpi, labels_path=args.labels_file, label_set=args.labels, reproducible=args.reproducible, submission_date=args.submission_date)
+        with _timings.document(args.family, args.version) as timings:
+            written: WrittenApproval = write_approval(args.family, args.version, resources, OUTPUT_DIR, build_manifest, args.force)
+        _timings.emit(timings)
+        docx_file_name: str = written.file_name
+        if written.unchanged:
+            print("Inputs unchanged, kept: "+colored(docx_file_name, 'yellow') + " (use --force to render it again)")
+            return 0
+        build_manifest.record(written)
+        build_manifest.save()
+        print(colored("\nDocument successfully generated!", 'green')+"\n"+colored("-" * 32, 'green')+"\n"+"Your generated file: "+colored(docx_file_name, 'yellow') + " can be found at './YYYY-MM-DD/'")
+    return 0
+
+def print_families(registry: TemplateRegistry) -> None:
+    """Print the family name and tags of every template"""
+    family: str
+    for family in registry.families():
+        tags: List[str] = registry.template(family).get("_tags") or []
+        print(family + ("  (" + ", ".join(tags) + ")" if tags else ""))
+
+def print_import_report(store: "TemplateStore") -> None:
+    """Import the changed templates of the folder into the template store and print what changed"""
+    import_start: float = time.perf_counter()
+    stats: "ImportStats" = store.sync()
+    path: str
+    for path, error in sorted(stats.invalid.items()):
+        print(colored("WARNING: skipped unreadable template " + os.path.join(store.templates_dir, path) + ": " + error, 'yellow'))
+    for path, positions in sorted(stats.skipped_versions.items()):
+        print(colored("WARNING: skipped versions without '_semver' or 'major_version' in " + os.path.join(store.templates_dir, path) + ": "
+                      + ", ".join("instances[{}]".format(position) for position in positions), 'yellow'))
+    print("Template store {}: {} added, {} updated, {} removed, {} unchanged, {} unreadable in {:.2f}s".format(
+        colored(store.db_path, 'yellow'), stats.added, stats.updated, stats.removed, stats.unchanged, len(stats.invalid), time.perf_counter() - import_start))
+
+def print_template(template: TemplateRecord) -> None:
+    """Print the path and the fields of a template, nested lists and objects shortened"""
+    print(template.path)
+    key: str
+    for key, value in template.data.items():
+        if isinstance(value, list):
+            value = ", ".join(value) if all(isinstance(item, str) for item in value) else "[" + str(len(value)) + " items]"
+        elif isinstance(value, dict):
+            value = "{" + ", ".join(value) + "}"
+        print("  " + key + ": " + str(value))
+
+@functools.lru_cache(maxsize=None)
+def get_colored() -> Any:
+    """Return termcolor's colored(), colorama and termcolor are loaded on first use"""
+    from colorama import init
+    from termcolor import colored
+    init() # Initialize modules for colors
+    return colored
+
+def colored(text: str, color: str) -> str:
+    """Return the text in a terminal color"""
+    return get_colored()(text, color)
+
+def resolve_approximate_version(approximate_version: str, artifact_db: str) -> str:
+    """
+    Return the approximate version shown in the form: the given one, else the
+    one of the artifact database, else DEFAULT_APPROXIMATE_VERSION. A missing
+    default database is expected on most machines and reported only if the
+    database was given explicitly.
+
+    Keyword arguments:
+    approximate_version -- version given on the command line or None
+    artifact_db         -- path to the 'ArtifactDatabase.xml' given on the command line or None
+    """
+    if approximate_version:
+        return approximate_version
+    if artifact_db or os.path.exists(ARTIFACT_DATABASE):
+        with _timings.stage("artifact_db"):
+            return get_approximate_version(artifact_db or ARTIFACT_DATABASE) or DEFAULT_APPROXIMATE_VERSION
+    return DEFAULT_APPROXIMATE_VERSION
+
+class ApprovalJob(NamedTuple):
+    """One license approval to generate: taxonomy family plus version, and optionally the label set"""
+    family: str
+    version: str
+    labels: str = None # label set, None for the one the resources were loaded with
+
+class JobResult(NamedTuple):
+    """Outcome of one batch job. 'error' is empty on success"""
+    job: ApprovalJob
+    file_name: str
+    seconds: float
+    error: str
+    inputs_hash: str = ""
+    unchanged: bool = False # True if the existing file was kept as its inputs did not change
+    timings: dict = None    # document record of StageTimings, None if timings are disabled
+    docx_bytes: bytes = None # rendered document of jobs run in memory, see ApprovalArchive
+
+class WrittenApproval(NamedTuple):
+    """Outcome of write_approval()"""
+    file_name: str
+    inputs_hash: str
+    unchanged: bool
+
+# Output folder of the license approvals
+OUTPUT_DIR: str = r"./YYYY-MM-DD"
+
+# Default location of the artifact database of the installer
+ARTIFACT_DATABASE: str = r"C:/Projects/installer/ArtifactDatabase.xml"
+
+# Approximate version used if the artifact database is not available
+DEFAULT_APPROXIMATE_VERSION: str = "2024r2"
+
+# Rules file with the family specific content of the approvals, see FamilyRules
+RULES_FILE: str = r"./rules.json"
+
+# Time of zip entries and core properties of reproducible documents, unless
+# SOURCE_DATE_EPOCH is set. See reproducible_time()
+REPRODUCIBLE_TIME: datetime.datetime = datetime.datetime(1980, 1, 1)
+
+# Default location of the logo shown in the header section
+LOGO_FILE: str = r"img/logo.png"
+
+# Version of the generator, part of the inputs of every approval.
+# Increase it whenever a change of the code changes the generated documents.
+GENERATOR_VERSION: str = "1"
+
+class BuildManifest:
+    """
+    Records for every approval in an output folder the hash of its inputs:
+    template content, family, version, labels, logo, backend and generator
+    version. The submission date is not an input: a kept approval keeps the
+    date it was rendered on.
+    An approval whose inputs hash matches the recorded one (and whose file
+    still exists) does not need to be rendered again.
+
+    Keyword arguments:
+    save_file_path -- output folder, holding the manifest as '.build-manifest.json'
+    """
+
+    def __init__(self, save_file_path: str = OUTPUT_DIR):
+        self.save_file_path: str = save_file_path
+        self.path: str = os.path.join(save_file_path, ".build-manifest.json")
+        self.entries: Dict[str, str] = {} # file name -> inputs hash
+        if os.path.exists(self.path):
+            with open(self.path, "r") as manifest_file:
+                self.entries = json.load(manifest_file)
+
+    def is_current(self, docx_file_name: str, inputs_hash: str) -> bool:
+        """Return True if the file exists and was rendered from the same inputs"""
+        return self.entries.get(docx_file_name) == inputs_hash and os.path.exists(os.path.join(self.save_file_path, docx_file_name))
+
+    def record(self, written: "WrittenApproval") -> None:
+        """Record the inputs hash of a rendered approval"""
+        self.entries[written.file_name] = written.inputs_hash
+
+    def save(self) -> None:
+        """Write the manifest to the output folder"""
+        tmp_path: str = self.path + "." + str(os.getpid())
+        with open(tmp_path, "w") as manifest_file:
+            json.dump(self.entries, manifest_file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+# Error text of jobs not run because an earlier job failed in fail fast mode
+SKIPPED_JOB_ERROR: str = "skipped (fail fast)"
+
+# Document writers: 'docx' fills the skeleton via python-docx, 'fast' writes
+# the OOXML directly (see ooxml_writer.py)
+BACKENDS: Tuple[str, str] = ("docx", "fast")
+
+# Display size of the logo in the header section, in EMU
+LOGO_SIZE: Tuple[int, int] = (1380000, 520000)
+
+EMU_PER_INCH: int = 914400
+
+class MediaImage(NamedTuple):
+    """Static image, e.g. the logo, read and inspected once and added to every document as ready-made image part"""
+    blob: bytes
+    sha1: str
+    content_type: str
+    ext: str
+    px_width: int
+    px_height: int
+    display_size: Tuple[int, int] # width and height in EMU
+    source_bytes: int             # size of the image file, before downsampling
+
+class ApprovalResources(NamedTuple):
+    """
+    Static resources shared by all approvals generated in one process. Skeleton,
+    writer and inputs hash belong to the label set, see resources_for_labels().
+    """
+    labels: Labels
+    templates: "TemplateRegistry"
+    logo: MediaImage           # None if not loaded for rendering
+    skeleton: Document
+    backend: str
+    writer: FastApprovalWriter # None unless backend is 'fast'
+    static_inputs_hash: str    # hash of generator version, labels, logo, approximate version and family rules
+    approximate_version: str
+    rules: "FamilyRules"
+    logo_dpi: int              # resolution the logo is downsampled to, None keeps it as is
+    label_sets: Mapping[str, Labels]
+    labels_path: str
+    shared_inputs_hash: str    # static_inputs_hash without the labels
+    variants: Dict[str, "ApprovalResources"] # resources of the other label sets, built on first use
+    fixed_time: datetime.datetime # time of reproducible documents, None unless reproducible
+    submission_date: datetime.date # shown in the documents, None for the date each one is rendered on
+
+def load_resources(
+    templates_dir: str = r"./templates",
+    logo_path: str = LOGO_FILE,
+    backend: str = "docx",
+    approximate_version: str = DEFAULT_APPROXIMATE_VERSION,
+    render: bool = True,
+    rules_path: str = RULES_FILE,
+    logo_dpi: int = None,
+    labels_path: str = LABELS_FILE,
+    label_set: str = DEFAULT_LABEL_SET,
+    reproducible: bool = False,
+    submission_date: datetime.date = None) -> ApprovalResources:
+    """Return labels, template registry, logo and document skeleton, loaded once per process
+
+    Keyword arguments:
+    templates_dir       -- folder with the JSON templates
+    logo_path           -- path to the logo shown in the header section
+    backend             -- document writer, one of BACKENDS
+    approximate_version -- approximate time/version shown in the form, see resolve_approximate_version()
+    render              -- False skips logo, skeleton and writer (all None): enough for compose_approval()
+                           and without loading python-docx
+    rules_path          -- rules file with the family specific content, see FamilyRules
+    logo_dpi            -- downsample a logo with more pixels than its display size needs at
+                           this resolution, see prepare_media_image()
+    labels_path         -- label file, see load_label_sets()
+    label_set           -- label set of jobs that do not select one
+    reproducible        -- byte-identical documents for identical content: fixed zip
+                           times and part order, fixed core properties, hyperlink
+                           relationship ids derived from the URL. See reproducible_time()
+    submission_date     -- date shown in the documents. None for the date of SOURCE_DATE_EPOCH if
+                           reproducible and set, else the date each document is rendered on
+    """
+    with open(logo_path, "rb") as logo_file:
+        logo_blob: bytes = logo_file.read()
+    label_sets: Mapping[str, Labels] = load_label_sets(labels_path)
+    if label_set not in label_sets:
+        raise LookupError("No label set '{}' in '{}'".format(label_set, labels_path))
+    logo: MediaImage = None
+    if render:
+        with _timings.stage("skeleton"):
+            logo = prepare_media_image(logo_blob, LOGO_SIZE, logo_dpi)
+    # plans are kept for as many templates as the loader keeps
+    rules: FamilyRules = FamilyRules(rules_path, get_template_loader().max_templates)
+    logo_key: str = hashlib.sha1(logo_blob).hexdigest() + ("@{}dpi".format(logo_dpi) if logo_dpi else "")
+    fixed_time: datetime.datetime = reproducible_time() if reproducible else None
+    shared_inputs_hash: str = hashlib.sha1(json.dumps(
+        [GENERATOR_VERSION, logo_key, approximate_version, rules.sha1, fixed_time.isoformat() if fixed_time else None]).encode("utf-8")).hexdigest()
+    resources: ApprovalResources = apply_labels(ApprovalResources(None, get_template_registry(templates_dir), logo, None, backend, None, None, approximate_version,
+                                                                  rules, logo_dpi, label_sets, labels_path, shared_inputs_hash, {}, fixed_time,
+                                                                  submission_date or (source_date() if reproducible else None)), label_sets[label_set])
+    resources.variants[label_set] = resources
+    return resources
+
+def apply_labels(resources: ApprovalResources, labels: Labels) -> ApprovalResources:
+    """Return the resources with a label set: its skeleton, writer and inputs hash. Resources without logo get no skeleton"""
+    skeleton: Document = None
+    writer: FastApprovalWriter = None
+    if resources.logo:
+        with _timings.stage("skeleton"):
+            skeleton = build_skeleton(labels, resources.logo, resources.fixed_time)
+            if resources.backend == "fast":
+                from ooxml_writer import FastApprovalWriter
+                writer = FastApprovalWriter(build_slotted_skeleton(skeleton), zip_date_time(resources.fixed_time))
+    static_inputs_hash: str = hashlib.sha1(json.dumps([resources.shared_inputs_hash, labels.as_dict()]).encode("utf-8")).hexdigest()
+    return resources._replace(labels=labels, skeleton=skeleton, writer=writer, static_inputs_hash=static_inputs_hash)
+
+def resources_for_labels(resources: ApprovalResources, label_set: str = None) -> ApprovalResources:
+    """
+    Return the resources of a label set. Each label set gets its skeleton
+    once per process, later jobs of the set reuse it.
+
+    Keyword arguments:
+    resources -- static resources loaded via load_resources()
+    label_set -- name of the label set, None for the one of the resources
+    """
+    if not label_set or label_set == resources.labels.name:
+        return resources
+    variant: ApprovalResources = resources.variants.get(label_set)
+    if variant is None:
+        if label_set not in resources.label_sets:
+            raise LookupError("No label set '{}', known: {}".format(label_set, ", ".join(sorted(resources.label_sets))))
+        # threads may build a set twice, the last one is kept
+        variant = resources.variants[label_set] = apply_labels(resources, resources.label_sets[label_set])
+    return variant
+
+def prepare_media_image(blob: bytes, display_size: Tuple[int, int], dpi: int = None) -> MediaImage:
+    """
+    Return an image with its SHA1, content type and pixel size, inspected
+    once for all documents.
+
+    Keyword arguments:
+    blob         -- bytes of the image file
+    display_size -- width and height the image is shown with, in EMU
+    dpi          -- downsample an image with more pixels than the display size needs
+                    at this resolution first. None keeps the image as is
+    """
+    from docx.image.image import Image
+    source_bytes: int = len(blob)
+    if dpi:
+        blob = downsample_image(blob, (round(display_size[0] / EMU_PER_INCH * dpi), round(display_size[1] / EMU_PER_INCH * dpi)))
+    image: Image = Image.from_blob(blob)
+    return MediaImage(blob, image.sha1, image.content_type, image.ext, image.px_width, image.px_height, display_size, source_bytes)
+
+def downsample_image(blob: bytes, max_px: Tuple[int, int]) -> bytes:
+    """
+    Return the image scaled down to at most max_px (width, height) pixels.
+    Both axes are scaled on their own, the image is stretched to its display
+    size anyway. The image is returned unchanged if it is small enough, if
+    scaling does not make the file smaller or if Pillow is not installed.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        print(colored("WARNING: Pillow is not installed, the logo is not downsampled", 'yellow'))
+        return blob
+    image: Image.Image = Image.open(io.BytesIO(blob))
+    if image.width <= max_px[0] and image.height <= max_px[1]:
+        return blob
+    image_format: str = image.format
+    if image.mode == "P":
+        # palette images can only be scaled with nearest neighbour
+        image = image.convert("RGBA")
+    image = image.resize((min(image.width, max_px[0]), min(image.height, max_px[1])), Image.LANCZOS)
+    scaled: io.BytesIO = io.BytesIO()
+    image.save(scaled, format=image_format, optimize=True)
+    return scaled.getvalue() if scaled.tell() < len(blob) else blob
+
+def load_manifest(manifest_path: str) -> List[ApprovalJob]:
+    """
+    Return all jobs of a batch manifest. A '.csv' manifest needs a header
+    row with the columns 'family' and 'version'. Any other file is read as
+    JSON lines, e.g. {"family": "eba", "version": "3.1"}. An optional column
+    or key 'labels' selects the label set of a job.
+
+    Keyword arguments:
+    manifest_path -- path to the manifest file
+    """
+    return list(iter_manifest(manifest_path))
+
+def iter_manifest(manifest_path: str) -> Iterator[ApprovalJob]:
+    """Yield the jobs of a batch manifest one by one while reading it, see load_manifest()"""
+    with open(manifest_path, "r", newline="") as manifest_file:
+        if manifest_path.lower().endswith(".csv"):
+            row: dict
+            for row in csv.DictReader(manifest_file):
+                yield ApprovalJob(row["family"].strip(), row["version"].strip(), (row.get("labels") or "").strip() or None)
         else:
-            add_hyperlink(licweb_hyperlink, iterate_over_json_file(located_json_file, "licweb"), iterate_over_json_file(located_json_file, "licweb"))
-        
-        if taxonomy_family_name == "boe-statistics" or taxonomy_family_name == "boe-banking" or taxonomy_family_name == "boe-insurance":
-            add_hyperlink(licweb_hyperlink, iterate_over_json_file(located_json_file, "licweb1"), iterate_over_json_file(located_json_file, "licweb1"))
-        # elif taxonomy_family_name == "us-gaap":
-        #     add_hyperlink(licweb_hyperlink, iterate_over_json_file(located_json_file, "licweb1"), "Terms and Conditions")
-        
-        # Products that will introduce license?
-        # --------------------------------------------
-        set_main_section_paragraph(main_table, 7, 0, objConsts.get_prod_prop())
-        set_main_section_paragraph(main_table, 7, 1, objConsts.get_affected_products())
-
-        # Approximate time/version?
-        # -------------------------
-        set_main_section_paragraph(main_table, 8, 0, objConsts.get_time_ver_prop())
-        set_main_section_paragraph(main_table, 8, 1, "2024r2")
-
-        # ------------------------------------------------------------------------------------------------------------------
-        # final section of the document
-        # ------------------------------------------------------------------------------------------------------------------
-        doc.add_paragraph().add_run("\nADDITIONAL COMMENTS:")
-        if taxonomy_family_name == "dnb-biscbs" or taxonomy_family_name == "us gaap":
-            set_additional_comment(
-                doc,
-                WD_ALIGN_PARAGRAPH.LEFT,
-                iterate_over_json_file(located_json_file, "comment"),
-                10,
-                82,
-                82,
-                82,
-                True,
-                False)
-        elif taxonomy_family_name == "us-gaap":
-            set_additional_comment(
-                doc,
-                WD_ALIGN_PARAGRAPH.LEFT,
-                iterate_over_json_file(located_json_file, "comment"),
-                8,
-                82,
-                82,
-                82,
-                True,
-                False)
-        elif taxonomy_family_name == "bbk":
-            add_hyperlink(
-                set_additional_comment(doc, WD_ALIGN_PARAGRAPH.LEFT, "", 8, 82, 82, 82, True, False),
-                iterate_over_json_file(located_json_file, "comment"),
-                iterate_over_json_file(located_json_file, "comment"))
-        elif taxonomy_family_name == "bdp":
-            add_hyperlink(
-                set_additional_comment(doc, WD_ALIGN_PARAGRAPH.LEFT, "", 8, 82, 82, 82, True, False),
-                "Add direct download link", "Add direct download link")
-            set_additional_comment(
-                doc, WD_ALIGN_PARAGRAPH.LEFT,
-                iterate_over_json_file(located_json_file, "comment"),
-                10,
-                82,
-                82,
-                82,
-                True,
-                False)
-        elif taxonomy_family_name == "cipc":
-            set_additional_comment(
-                doc,
-                WD_ALIGN_PARAGRAPH.LEFT,
-                iterate_over_json_file(located_json_file, "comment"),
-                7,
-                82,
-                82,
-                82,
-                True,
-                False)
-            add_hyperlink(
-                set_additional_comment(doc, WD_ALIGN_PARAGRAPH.LEFT, "", 8, 82, 82, 82, True, False),
-                "Add direct download link",
-                "Add direct download link")
-        elif taxonomy_family_name == "edinet":
-            add_hyperlink(
-                set_additional_comment(doc, WD_ALIGN_PARAGRAPH.LEFT, "", 8, 82, 82, 82, True, False),
-                iterate_over_json_file(located_json_file, "comment"),
-                iterate_over_json_file(located_json_file, "comment"))
+            line: str
+            for line in manifest_file:
+                if line.strip():
+                    entry: dict = json.loads(line)
+                    yield ApprovalJob(entry["family"], entry["version"], entry.get("labels"))
+
+def expand_versions(registry: "TemplateRegistry", taxonomy_family_name: str, since: str = None) -> List[ApprovalJob]:
+    """
+    Return one job per version in the 'instances' of the template of a
+    family, in template order, see TemplateRegistry.versions().
+
+    Keyword arguments:
+    registry             -- registry of the templates
+    taxonomy_family_name -- the taxonomy's family name the jobs are created for
+    since                -- only versions whose '_semver' is this one or newer. E.g. 3.0 or 3.0.0
+    """
+    return [ApprovalJob(taxonomy_family_name, version) for version in registry.versions(taxonomy_family_name, since)]
+
+def semver_key(semver: str) -> Tuple[int, ...]:
+    """Return the comparable numbers of a version like '3.1.0'. Missing parts count as 0, so '3.1' equals '3.1.0'"""
+    numbers: List[int] = [int(re.match(r"\d*", part).group() or 0) for part in semver.split(".")]
+    return tuple(numbers + [0] * (3 - len(numbers)))
+
+def requested_jobs(args: argparse.Namespace, registry: "TemplateRegistry") -> List[ApprovalJob]:
+    """Return the jobs requested on the command line: a manifest, all or the newer versions of a family, or one family/version"""
+    if args.manifest:
+        return load_manifest(args.manifest)
+    if not args.family:
+        return []
+    if args.all_versions or args.since:
+        return expand_versions(registry, args.family, args.since)
+    return [ApprovalJob(args.family, args.version)]
+
+def run_batch(
+    jobs: List[ApprovalJob],
+    resources: ApprovalResources,
+    workers: int = 1,
+    fail_fast: bool = False,
+    build_manifest: "BuildManifest" = None,
+    force: bool = False,
+    archive: "ApprovalArchive" = None) -> List[JobResult]:
+    """
+    Generate the license approvals of all jobs and return one result per job,
+    in the order of the jobs. A failing job is recorded in its result. With
+    fail_fast the batch stops at the first failing job (in job order) and all
+    later jobs are reported as skipped, no matter how many workers are used.
+    Jobs whose inputs did not change since the build manifest recorded them
+    are not rendered again, unless force is set.
+
+    Keyword arguments:
+    jobs           -- approvals to generate
+    resources      -- static resources shared by all jobs (sequential runs only)
+    workers        -- number of worker processes. 1 renders in this process
+    fail_fast      -- stop at the first failing job
+    build_manifest -- manifest of the output folder, updated with every rendered job
+    force          -- render all jobs, even unchanged ones
+    archive        -- archive the approvals are added to instead of writing
+                      single files. Use it without build manifest
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    results: List[JobResult] = []
+    job: ApprovalJob
+    if workers <= 1:
+        for job in jobs:
+            if fail_fast and results and results[-1].error:
+                results.append(JobResult(job, "", 0.0, SKIPPED_JOB_ERROR))
+                continue
+            results.append(archive_result(run_job(job, resources, build_manifest, force, archive is not None), archive))
+        record_results(results, build_manifest)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=worker_initargs(resources, build_manifest, force)) as executor:
+        futures: List[Future] = [executor.submit(run_worker_job, job, archive is not None) for job in jobs]
+        i: int
+        for i, future in enumerate(futures):
+            if fail_fast and results and results[-1].error:
+                for pending in futures[i:]:
+                    pending.cancel()
+                results.extend(JobResult(job, "", 0.0, SKIPPED_JOB_ERROR) for job in jobs[i:])
+                break
+            try:
+                results.append(archive_result(future.result(), archive))
+            except Exception as e:
+                # a worker that died (BrokenProcessPool) or a result that cannot be
+                # unpickled fails this job, the jobs after it report their own errors
+                results.append(JobResult(jobs[i], "", 0.0, repr(e)))
+    record_results(results, build_manifest)
+    return results
+
+def archive_result(result: JobResult, archive: "ApprovalArchive") -> JobResult:
+    """
+    Add the document of an in-memory job to the archive and return its
+    result without the document. A document the archive cannot take fails
+    the job, see ApprovalArchive.add()
+    """
+    if archive and result.docx_bytes is not None:
+        try:
+            result = result._replace(file_name=archive.add(result.job, result.file_name, result.docx_bytes), docx_bytes=None)
+        except OSError as e:
+            result = result._replace(error=repr(e), docx_bytes=None)
+    return result
+
+class ApprovalArchive:
+    """
+    Zip archive the approvals of a run are streamed into as they are
+    rendered, instead of writing one file each. The documents are stored
+    uncompressed as they are compressed zips already. Each family gets a
+    folder, as the file names of different families can be the same.
+
+    Keyword arguments:
+    target    -- path or writable binary stream of the archive
+    date_time -- zip time of all approvals, None for the current time
+    """
+
+    def __init__(self, target: Any, date_time: Tuple[int, ...] = None):
+        import zipfile
+        self._zip: zipfile.ZipFile = zipfile.ZipFile(target, "w", zipfile.ZIP_STORED)
+        self._names: set = set()
+        self._date_time: Tuple[int, ...] = date_time or time.localtime()[:6]
+
+    def add(self, job: ApprovalJob, file_name: str, docx_bytes: bytes) -> str:
+        """Add the approval of a job and return its name in the archive, e.g. 'eba/EBA 3.1 ....docx'. Raise FileExistsError if the name is taken"""
+        import zipfile
+        archive_name: str = job.family.lower() + "/" + file_name
+        if archive_name in self._names:
+            raise FileExistsError("'" + archive_name + "' is already in the archive")
+        self._names.add(archive_name)
+        self._zip.writestr(zipfile.ZipInfo(archive_name, self._date_time), docx_bytes)
+        return archive_name
+
+    def close(self) -> None:
+        """Write the central directory of the archive"""
+        self._zip.close()
+
+    def __enter__(self) -> "ApprovalArchive":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+def record_results(results: List[JobResult], build_manifest: "BuildManifest") -> None:
+    """Record the inputs hash of all rendered jobs in the build manifest"""
+    if build_manifest:
+        result: JobResult
+        for result in results:
+            if result.inputs_hash and not result.unchanged:
+                build_manifest.record(WrittenApproval(result.file_name, result.inputs_hash, False))
+
+# Number of jobs of a streaming run after which all generations are collected
+STREAM_GC_INTERVAL: int = 100
+
+class StreamStats:
+    """Counters of a streaming run, kept instead of one result per job"""
+
+    def __init__(self):
+        self.rebuilt: int = 0
+        self.unchanged: int = 0
+        self.failed: int = 0
+        self.cache_releases: int = 0 # times the caches were released to get below the memory ceiling
+        self.peak_bytes: int = 0     # peak of traced memory
+
+    def add(self, result: JobResult) -> None:
+        """Count the outcome of a job"""
+        if result.error:
+            self.failed += 1
+        elif result.unchanged:
+            self.unchanged += 1
         else:
-            set_additional_comment(
-                doc,
-                WD_ALIGN_PARAGRAPH.LEFT,
-                iterate_over_json_file(located_json_file, "comment"),
-                11,
-                82,
-                82,
-                82,
-                True,
-                False)
-
-        # ------------------------------------------------------------------------------------------------------------------
-        # footer section
-        # ------------------------------------------------------------------------------------------------------------------
-        footer: Paragraph = section.footer
-        set_footer(footer, 0, "Ver: 01/2022", 10)
-
-        # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-        # </LICENSE APPROVAL DOCUMENT>
-        # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
-
-        # ------------------------------------------------------------------------------------------------------------------
-        # Compose filename and write to file
-        # ------------------------------------------------------------------------------------------------------------------
-        
-        # Refine approval names according to updated family
-        if taxonomy_family_name == "dnb-dict":
-            taxonomy_family_name = "Full " + iterate_over_json_file(located_json_file, "name").split("-")[0].replace(" DICT","") + " Data Dictionary"
-        elif taxonomy_family_name == "acpr-corep":
-            taxonomy_family_name = iterate_over_json_file(located_json_file, "name")+"_SUBCON"
-
-        # Compose total filename of license approval
-        if taxonomy_family_name == "Full DNB Data Dictionary":
-            docx_file_name = compose_docx_file_name(
-                taxonomy_family_name,
-                " ",
-                taxonomy_version,
-                " ",
-                " - Third Party Software License Approval Form ",
-                " ",
-                "YYYYMMDD",
-                ".docx"
-           )
-        elif "FASB " in taxonomy_family_name:
-            docx_file_name = compose_docx_file_name(
-                taxonomy_family_name,
-                "",
-                "",
-                "",
-                " Reporting Taxonomy - Third Party Software License Approval Form ",
-                " ",
-                "YYYYMMDD",
-                ".docx"
-           )
-        elif "us-gaap" in taxonomy_family_name:
-            docx_file_name = compose_docx_file_name(
-                prov_taxonomy_family_name,
-                "",
-                "",
-                "",
-                "",
-                "",
-                " - Third Party Software License Approval Form YYYYMMDD", ".docx"
-           )    
-        elif "boe-insurance" in taxonomy_family_name:
-            docx_file_name = compose_docx_file_name(
-                iterate_over_json_file(located_json_file, "name").replace(" INSURANCE",""),
-                " ",
-                taxonomy_version,
-                " ",
-                "Insurance Taxonomy - Third Party Software License Approval Form ",
-                " ",
-                "YYYYMMDD",
-                ".docx"
-           )
-        elif "LEI" in taxonomy_family_name:
-            docx_file_name = compose_docx_file_name(
-                taxonomy_family_name,
-                " ",
-                taxonomy_version.split("-")[0],
-                " ",
-                "(REC) Taxonomy - Third Party Software License Approval Form",
-                " ",
-                "YYYYMMDD",
-                ".docx"
-           )            
-        elif "BDP" in taxonomy_family_name:
-            docx_file_name = compose_docx_file_name(
-                iterate_over_json_file(located_json_file, "swname").replace(" XBRL Taxonomy",""),
-                " ",
-                taxonomy_version.split(" ")[1],
-                " ",
-                " XBRL Taxonomy - Third Party Software License Approval Form",
-                " ",
-                "YYYYMMDD",
-                ".docx"
-           )
-        elif "bbk" in taxonomy_family_name:
-            docx_file_name = compose_docx_file_name(
-                iterate_over_json_file(located_json_file, "name"),
-                " ",
-                taxonomy_version,
-                " ",
-                " German Base XBRL Taxonomy - Third Party Software License Approval Form",
-                " ",
-                "YYYYMMDD",
-                ".docx"
-           )
-        elif "EDINET" in taxonomy_family_name or "SFRDP" in taxonomy_family_name or "BOE BANKING" in taxonomy_family_name or "cmf-cl-ci" in taxonomy_family_name or "ifrs" in taxonomy_family_name:
-            docx_file_name = compose_docx_file_name(
-                iterate_over_json_file(located_json_file, "name"),
-                " ",
-                taxonomy_version,
-                " ",
-                "XBRL Taxonomy - Third Party Software License Approval Form",
-                " ",
-                "YYYYMMDD",
-                ".docx"
-           )
-        elif "Eurofiling" in taxonomy_family_name or "EDINET" in taxonomy_family_name or "cipc" in taxonomy_family_name:
-            docx_file_name = compose_docx_file_name(
-                iterate_over_json_file(located_json_file, "swname"),
-                " ",
-                taxonomy_version,
-                " ",
-                "XBRL Taxonomy - Third Party Software License Approval Form",
-                " ",
-                "YYYYMMDD",
-                ".docx"
-           )
+            self.rebuilt += 1
+
+def run_stream(
+    jobs: Iterable[ApprovalJob],
+    resources: ApprovalResources,
+    build_manifest: "BuildManifest" = None,
+    force: bool = False,
+    memory_limit_mb: float = None) -> StreamStats:
+    """
+    Generate the license approvals of all jobs with memory bounded by the
+    current job instead of the batch size: jobs are read lazily, every
+    document is rendered, saved and released before the next one starts,
+    and only counters are kept, no result per job. Failed jobs are printed
+    as they happen. Traced memory is checked after every job. Above the
+    ceiling the template and plan caches are released; if that does not
+    help, the largest allocations are printed and MemoryError is raised.
+
+    Keyword arguments:
+    jobs            -- approvals to generate, e.g. iter_manifest()
+    resources       -- static resources shared by all jobs
+    build_manifest  -- manifest of the output folder, updated with every rendered job
+    force           -- render all jobs, even unchanged ones
+    memory_limit_mb -- ceiling of the traced memory in MB, None only reports the peak
+    """
+    import tracemalloc
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    limit_bytes: float = memory_limit_mb * 1024 * 1024 if memory_limit_mb else None
+    stats: StreamStats = StreamStats()
+    job_num: int
+    job: ApprovalJob
+    for job_num, job in enumerate(jobs, 1):
+        result: JobResult = run_job(job, resources, build_manifest, force)
+        _timings.emit(result.timings)
+        stats.add(result)
+        if result.error:
+            print(colored("FAILED ", 'red') + job.family + " " + job.version + " ({:.3f}s): ".format(result.seconds) + result.error)
+        record_results([result], build_manifest)
+        del result
+        if job_num % STREAM_GC_INTERVAL == 0:
+            # parts of the documents outlive the young generations, see run_job()
+            gc.collect()
+        if limit_bytes and tracemalloc.get_traced_memory()[0] > limit_bytes:
+            stats.cache_releases += 1
+            resources.templates.loader.clear()
+            resources.rules.clear()
+            gc.collect()
+            if tracemalloc.get_traced_memory()[0] > limit_bytes:
+                print_memory_report(tracemalloc.take_snapshot())
+                raise MemoryError("memory ceiling of {} MB exceeded after {} {}: {:.1f} MB traced".format(
+                    memory_limit_mb, job.family, job.version, tracemalloc.get_traced_memory()[0] / 1024 / 1024))
+    stats.peak_bytes = tracemalloc.get_traced_memory()[1]
+    return stats
+
+def print_memory_report(snapshot: Any, limit: int = 10) -> None:
+    """Print the source lines holding most of the traced memory of a tracemalloc snapshot"""
+    print("Largest allocations:")
+    for stat in snapshot.statistics("lineno")[:limit]:
+        print("  {:>9.1f} KB  {}".format(stat.size / 1024, stat.traceback))
+
+def print_stream_summary(stats: StreamStats, total_seconds: float) -> None:
+    """Print the totals and the peak of traced memory of a streaming run"""
+    print(colored("-" * 32, 'green'))
+    print("{} rebuilt, {} unchanged, {} failed, total {:.3f}s".format(stats.rebuilt, stats.unchanged, stats.failed, total_seconds))
+    print("peak traced memory {:.1f} MB, caches released {} times".format(stats.peak_bytes / 1024 / 1024, stats.cache_releases))
+
+# Seconds without further changes before the watch mode renders, see FileWatcher
+WATCH_DEBOUNCE: float = 0.3
+
+def watch_approvals(args: argparse.Namespace, approximate_version: str, debounce: float = WATCH_DEBOUNCE, use_inotify: bool = True) -> None:
+    """
+    Render the approvals requested on the command line, then watch their
+    inputs and render again only the approvals a change affects, until
+    interrupted. Labels, templates, skeleton and plans stay loaded between
+    changes:
+
+    - a template: the jobs of its family, plus jobs whose family now
+      resolves to another template (e.g. '_tags' edited). Only the
+      changed templates are parsed again.
+    - logo, rules file or label file: all jobs, with the static
+      resources loaded again
+
+    Jobs whose inputs hash did not change, e.g. a file saved without edits,
+    are kept as usual. A change that breaks a template or the label file is
+    reported and the previous state is kept.
+
+    Keyword arguments:
+    args                -- command line arguments: jobs, folders and backend
+    approximate_version -- approximate time/version shown in the form
+    debounce            -- seconds without further changes before rendering
+    use_inotify         -- False polls the inputs, see FileWatcher
+    """
+    from file_watcher import FileWatcher
+    load: Callable[[], ApprovalResources] = functools.partial(
+        load_resources, args.templates_dir, LOGO_FILE, args.backend, approximate_version,
+        rules_path=args.rules, logo_dpi=args.logo_dpi, labels_path=args.labels_file, label_set=args.labels, reproducible=args.reproducible, submission_date=args.submission_date)
+    resources: ApprovalResources = load()
+    build_manifest: BuildManifest = BuildManifest(OUTPUT_DIR)
+    jobs: List[ApprovalJob] = requested_jobs(args, resources.templates)
+    template_paths: Dict[ApprovalJob, str] = resolve_job_templates(jobs, resources.templates)
+    batch_start: float = time.perf_counter()
+    print_batch_summary(watch_render(jobs, resources, build_manifest, args.force), time.perf_counter() - batch_start)
+
+    static_paths: set = {os.path.abspath(LOGO_FILE), os.path.abspath(args.rules), os.path.abspath(args.labels_file)}
+    watcher: FileWatcher = FileWatcher([args.templates_dir, *static_paths], (".json",), debounce, use_inotify=use_inotify)
+    print("Watching {} and {} for changes ({}, Ctrl+C to stop)".format(args.templates_dir, ", ".join(sorted(os.path.relpath(path) for path in static_paths)), watcher.backend))
+    try:
+        changed: set
+        first_seen: float
+        for changed, first_seen in watcher.changes():
+            change_start: float = time.perf_counter()
+            try:
+                if changed & static_paths:
+                    resources = load()
+                # a changed template can add, remove or rename families: index again, parsing the changed files only.
+                # The resources of other label sets hold the previous index, they are built again on first use
+                _template_registries.pop(args.templates_dir, None)
+                resources = resources._replace(templates=get_template_registry(args.templates_dir), variants={})
+                resources.variants[resources.labels.name] = resources
+                jobs = requested_jobs(args, resources.templates)
+            except Exception as e:
+                print(colored("ERROR: " + repr(e), 'red') + " (kept the previous state)")
+                continue
+            new_paths: Dict[ApprovalJob, str] = resolve_job_templates(jobs, resources.templates)
+            # an overflow of the change events reports the watched folders themselves
+            affected: List[ApprovalJob] = jobs if changed & static_paths or any(os.path.isdir(path) for path in changed) else [
+                job for job in jobs if new_paths[job] in changed or new_paths[job] != template_paths.get(job)]
+            template_paths = new_paths
+            results: List[JobResult] = watch_render(affected, resources, build_manifest, args.force)
+            print_watch_report(changed, results, first_seen, change_start)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+def watch_render(jobs: List[ApprovalJob], resources: ApprovalResources, build_manifest: "BuildManifest", force: bool) -> List[JobResult]:
+    """Render jobs of the watch mode in this process and save the build manifest"""
+    results: List[JobResult] = run_batch(jobs, resources, build_manifest=build_manifest, force=force)
+    build_manifest.save()
+    result: JobResult
+    for result in results:
+        _timings.emit(result.timings)
+    return results
+
+def resolve_job_templates(jobs: List[ApprovalJob], registry: "TemplateRegistry") -> Dict[ApprovalJob, str]:
+    """Return the absolute template path of every job, None for jobs whose family is unknown"""
+    paths: Dict[ApprovalJob, str] = {}
+    job: ApprovalJob
+    for job in jobs:
+        try:
+            paths[job] = os.path.abspath(registry.resolve(job.family))
+        except LookupError:
+            paths[job] = None
+    return paths
+
+def print_watch_report(changed: set, results: List[JobResult], first_seen: float, change_start: float) -> None:
+    """Print the outcome of one change of the watch mode and its latency: from the first change seen to the last document saved"""
+    finished: float = time.perf_counter()
+    result: JobResult
+    for result in results:
+        if result.error:
+            print(colored("FAILED ", 'red') + result.job.family + " " + result.job.version + ": " + result.error)
+        elif not result.unchanged:
+            print(colored("OK     ", 'green') + result.job.family + " " + result.job.version + ": " + colored(result.file_name, 'yellow'))
+    failed: int = sum(1 for result in results if result.error)
+    unchanged: int = sum(1 for result in results if result.unchanged)
+    print("{} changed: {} rebuilt, {} unchanged, {} failed; latency {:.0f} ms ({:.0f} ms debounce, {:.0f} ms rendering)".format(
+        ", ".join(sorted(os.path.relpath(path) for path in changed)), len(results) - failed - unchanged, unchanged, failed,
+        (finished - first_seen) * 1000, (change_start - first_seen) * 1000, (finished - change_start) * 1000))
+    _timings.emit({"type": "watch", "changed": sorted(changed), "rebuilt": len(results) - failed - unchanged, "unchanged": unchanged,
+                   "failed": failed, "latency_ms": round((finished - first_seen) * 1000, 3), "render_ms": round((finished - change_start) * 1000, 3)})
+
+def run_job(job: ApprovalJob, resources: ApprovalResources, build_manifest: "BuildManifest" = None, force: bool = False, in_memory: bool = False) -> JobResult:
+    """Generate and save the license approval of one job and return its result. In memory the result holds the document instead"""
+    job_start: float = time.perf_counter()
+    # the timings record is completed when the block is left, before the result is returned to the caller
+    with _timings.document(job.family, job.version) as timings:
+        try:
+            if in_memory:
+                file_name, docx_bytes = generate_approval(job.family, job.version, resources, job.labels)
+                return JobResult(job, file_name, time.perf_counter() - job_start, "", timings=timings, docx_bytes=docx_bytes)
+            save_file_path: str = build_manifest.save_file_path if build_manifest else OUTPUT_DIR
+            written: WrittenApproval = write_approval(job.family, job.version, resources, save_file_path, build_manifest, force, job.labels)
+            return JobResult(job, written.file_name, time.perf_counter() - job_start, "", written.inputs_hash, written.unchanged, timings)
+        except Exception as e:
+            if timings is not None:
+                timings["error"] = repr(e)
+            return JobResult(job, "", time.perf_counter() - job_start, repr(e), timings=timings)
+        finally:
+            if not resources.writer:
+                # the python-docx object graph of a document is cyclic, it and its lxml
+                # trees are freed by the garbage collector only. Collecting the young
+                # generations right away keeps dead documents from piling up.
+                gc.collect(1)
+
+# Resources and settings of a worker process of the batch pool, set by init_worker()
+_worker_resources: ApprovalResources = None
+_worker_build_manifest: "BuildManifest" = None
+_worker_force: bool = False
+
+def worker_initargs(resources: ApprovalResources, build_manifest: "BuildManifest", force: bool) -> tuple:
+    """Return the arguments of init_worker(): workers load their own resources and label sets once"""
+    loader: TemplateLoader = resources.templates.loader
+    cache_dir: str = loader.disk_cache.cache_dir if loader.disk_cache else None
+    store_path: str = loader.store.db_path if isinstance(loader, StoredTemplateLoader) else None
+    # workers only read the manifest, the results are recorded by the parent process
+    manifest_dir: str = build_manifest.save_file_path if build_manifest else None
+    return (resources.templates.templates_dir, cache_dir, resources.backend, resources.approximate_version, manifest_dir, force, _timings.enabled,
+            resources.rules.rules_path, resources.logo_dpi, loader.max_templates, resources.labels_path, resources.labels.name,
+            resources.fixed_time is not None, store_path, resources.submission_date)
+
+def init_worker(
+    templates_dir: str,
+    cache_dir: str,
+    backend: str,
+    approximate_version: str,
+    manifest_dir: str,
+    force: bool,
+    timings: bool,
+    rules_path: str,
+    logo_dpi: int,
+    max_templates: int,
+    labels_path: str,
+    label_set: str,
+    reproducible: bool,
+    store_path: str,
+    submission_date: datetime.date) -> None:
+    """Load the static resources once when a worker process of the pool starts"""
+    global _worker_resources, _worker_build_manifest, _worker_force
+    if timings:
+        # workers only collect, their records are written by the parent process
+        import tracemalloc
+        tracemalloc.start()
+        set_timings(StageTimings())
+    if store_path:
+        set_template_loader(StoredTemplateLoader(store_path, templates_dir, max_templates))
+    else:
+        set_template_loader(TemplateLoader(max_templates, TemplateDiskCache(cache_dir) if cache_dir else None))
+    _worker_resources = load_resources(templates_dir, backend=backend, approximate_version=approximate_version, rules_path=rules_path, logo_dpi=logo_dpi,
+                                       labels_path=labels_path, label_set=label_set, reproducible=reproducible,
+                                       submission_date=submission_date)
+    _worker_build_manifest = BuildManifest(manifest_dir) if manifest_dir else None
+    _worker_force = force
+
+def run_worker_job(job: ApprovalJob, in_memory: bool = False) -> JobResult:
+    """Run one job inside a worker process with the pre-loaded resources"""
+    return run_job(job, _worker_resources, _worker_build_manifest, _worker_force, in_memory)
+
+def render_worker_content(content: "ApprovalContent") -> bytes:
+    """Render composed content inside a worker process with the pre-loaded resources"""
+    return render_approval(content, _worker_resources)
+
+# Stages of the pipeline mode, see run_pipeline()
+PIPELINE_STAGES: Tuple[str, str, str] = ("load", "render", "save")
+
+class PipelineStats:
+    """Latencies per stage and queue depths of a pipeline run"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {stage: [] for stage in PIPELINE_STAGES}
+        self.depths: Dict[str, List[int]] = {"render": [], "save": []} # queue depth after every put, by consuming stage
+
+    def summary(self) -> Dict[str, Any]:
+        """Return avg/p50/p95/max latency in ms per stage and max/avg depth per queue"""
+        summary: Dict[str, Any] = {"stages": {}, "queues": {}}
+        stage: str
+        for stage, latencies in self.latencies.items():
+            latencies = sorted(latencies)
+            if latencies:
+                summary["stages"][stage] = {
+                    "count": len(latencies),
+                    "avg_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+                    "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+                    "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+                    "max_ms": round(latencies[-1] * 1000, 3)}
+        queue: str
+        for queue, depths in self.depths.items():
+            if depths:
+                summary["queues"][queue] = {"max": max(depths), "avg": round(sum(depths) / len(depths), 2)}
+        return summary
+
+def run_pipeline(
+    jobs: List[ApprovalJob],
+    resources: ApprovalResources,
+    workers: int = 1,
+    queue_size: int = 8,
+    build_manifest: "BuildManifest" = None,
+    force: bool = False,
+    archive: "ApprovalArchive" = None) -> Tuple[List[JobResult], PipelineStats]:
+    """
+    Generate the license approvals of all jobs in an asyncio pipeline and
+    return one result per job, in the order of the jobs, plus the pipeline
+    statistics. Three stages connected by bounded queues overlap I/O with
+    rendering, while at most queue_size documents wait between two stages:
+
+    load   -- template lookup and composition, in a thread
+    render -- rendering in an executor: a thread, or with workers > 1 a
+              pool of worker processes with one render task each
+    save   -- writing the file, or adding it to the archive, in a thread
+
+    Unchanged jobs (see write_approval()) end after the load stage.
+
+    Keyword arguments:
+    jobs           -- approvals to generate
+    resources      -- static resources shared by all jobs
+    workers        -- number of worker processes rendering. 1 renders in a thread of this process
+    queue_size     -- capacity of each queue between two stages
+    build_manifest -- manifest of the output folder, updated with every rendered job
+    force          -- render all jobs, even unchanged ones
+    archive        -- archive the approvals are added to instead of writing
+                      single files. Use it without build manifest
+    """
+    import asyncio
+    results, stats = asyncio.run(pipeline(jobs, resources, workers, queue_size, build_manifest, force, archive))
+    record_results(results, build_manifest)
+    return results, stats
+
+async def pipeline(
+    jobs: List[ApprovalJob],
+    resources: ApprovalResources,
+    workers: int,
+    queue_size: int,
+    build_manifest: "BuildManifest",
+    force: bool,
+    archive: "ApprovalArchive") -> Tuple[List[JobResult], PipelineStats]:
+    """The stages of run_pipeline(), see there"""
+    import asyncio
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    stats: PipelineStats = PipelineStats()
+    results: List[JobResult] = [None] * len(jobs)
+    stage_times: List[Dict[str, Tuple[float, float]]] = [{} for _ in jobs] # (wall, cpu) seconds by stage, per job
+    render_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    save_queue: asyncio.Queue = asyncio.Queue(queue_size)
+    save_file_path: str = build_manifest.save_file_path if build_manifest else OUTPUT_DIR
+    render_tasks: int = max(1, workers)
+    if workers > 1:
+        render_executor: Any = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=worker_initargs(resources, build_manifest, force))
+        render_function: Callable[[ApprovalContent], bytes] = render_worker_content
+    else:
+        render_executor = ThreadPoolExecutor(max_workers=1)
+        render_function = functools.partial(render_approval, resources=resources)
+
+    def job_timings(i: int, start: float, error: str = None) -> Dict[str, Any]:
+        return _timings.document_record(jobs[i].family, jobs[i].version, time.perf_counter() - start, stage_times[i], error)
+
+    async def load() -> None:
+        i: int
+        for i, job in enumerate(jobs):
+            start: float = time.perf_counter()
+            try:
+                prepared, wall, cpu = await loop.run_in_executor(None, timed_call, prepare_approval, job.family, job.version, resources, build_manifest, force, job.labels)
+            except Exception as e:
+                results[i] = JobResult(job, "", time.perf_counter() - start, repr(e), timings=job_timings(i, start, repr(e)))
+                continue
+            content, inputs_hash, unchanged = prepared
+            stage_times[i]["load"] = (wall, cpu)
+            stats.latencies["load"].append(time.perf_counter() - start)
+            if unchanged:
+                results[i] = JobResult(job, content.file_name, time.perf_counter() - start, "", inputs_hash, True, job_timings(i, start))
+                continue
+            await render_queue.put((i, start, content, inputs_hash))
+            stats.depths["render"].append(render_queue.qsize())
+        for _ in range(render_tasks):
+            await render_queue.put(None)
+
+    async def render() -> None:
+        while True:
+            item: tuple = await render_queue.get()
+            if item is None:
+                return
+            i, start, content, inputs_hash = item
+            stage_start: float = time.perf_counter()
+            try:
+                docx_bytes, wall, cpu = await loop.run_in_executor(render_executor, timed_call, render_function, content)
+            except Exception as e:
+                results[i] = JobResult(jobs[i], "", time.perf_counter() - start, repr(e), timings=job_timings(i, start, repr(e)))
+                continue
+            stage_times[i]["render"] = (wall, cpu)
+            stats.latencies["render"].append(time.perf_counter() - stage_start)
+            await save_queue.put((i, start, content.file_name, inputs_hash, docx_bytes))
+            stats.depths["save"].append(save_queue.qsize())
+
+    async def save() -> None:
+        while True:
+            item: tuple = await save_queue.get()
+            if item is None:
+                return
+            i, start, file_name, inputs_hash, docx_bytes = item
+            stage_start: float = time.perf_counter()
+            try:
+                if archive:
+                    file_name, wall, cpu = await loop.run_in_executor(None, timed_call, archive.add, jobs[i], file_name, docx_bytes)
+                else:
+                    _, wall, cpu = await loop.run_in_executor(None, timed_call, write_file, os.path.join(save_file_path, file_name), docx_bytes)
+            except OSError as e:
+                results[i] = JobResult(jobs[i], "", time.perf_counter() - start, repr(e), timings=job_timings(i, start, repr(e)))
+                continue
+            stage_times[i]["save"] = (wall, cpu)
+            stats.latencies["save"].append(time.perf_counter() - stage_start)
+            results[i] = JobResult(jobs[i], file_name, time.perf_counter() - start, "", inputs_hash, timings=job_timings(i, start))
+
+    with render_executor:
+        renderers: List[asyncio.Task] = [asyncio.ensure_future(render()) for _ in range(render_tasks)]
+        saver: asyncio.Task = asyncio.ensure_future(save())
+        await load()
+        await asyncio.gather(*renderers)
+        await save_queue.put(None)
+        await saver
+    return results, stats
+
+def timed_call(function: Callable[..., Any], *args: Any) -> Tuple[Any, float, float]:
+    """Return the result of a call plus its wall and CPU seconds. The CPU time is the one of the calling thread, so calls can run in executors"""
+    wall: float = time.perf_counter()
+    cpu: float = time.thread_time()
+    result: Any = function(*args)
+    return result, time.perf_counter() - wall, time.thread_time() - cpu
+
+def write_file(file_path: str, content: bytes) -> None:
+    """Write bytes to a file"""
+    with open(file_path, "wb") as output_file:
+        output_file.write(content)
+
+def print_pipeline_summary(stats: PipelineStats) -> None:
+    """Print latency per stage and queue depths of a pipeline run"""
+    summary: Dict[str, Any] = stats.summary()
+    stage: str
+    for stage, latency in summary["stages"].items():
+        print("stage {:<7} {:>5} docs, avg {:8.3f} ms, p95 {:8.3f} ms, max {:8.3f} ms".format(stage, latency["count"], latency["avg_ms"], latency["p95_ms"], latency["max_ms"]))
+    queue: str
+    for queue, depth in summary["queues"].items():
+        print("queue {:<7} max depth {}, avg depth {}".format(queue, depth["max"], depth["avg"]))
+
+def print_batch_summary(results: List[JobResult], total_seconds: float) -> int:
+    """Print per job outcome and wall time plus the totals of a batch run, return the number of failed and skipped jobs"""
+    result: JobResult
+    for result in results:
+        job_label: str = result.job.family + " " + result.job.version
+        if result.error == SKIPPED_JOB_ERROR:
+            print(colored("SKIPPED", 'yellow') + " " + job_label)
+        elif result.error:
+            print(colored("FAILED ", 'red') + job_label + " ({:.3f}s): ".format(result.seconds) + result.error)
+        elif result.unchanged:
+            print(colored("SAME   ", 'cyan') + job_label + " ({:.3f}s): ".format(result.seconds) + result.file_name)
         else:
-            docx_file_name = compose_docx_file_name(
-                iterate_over_json_file(located_json_file, "filebasename"),
-                " ",
-                taxonomy_version,
-                " ",
-                "XBRL Taxonomy - Third Party Software License Approval Form",
-                " ",
-                "YYYYMMDD",
-                ".docx"
-           )
-
-        # write content and save file
-        save_file_path = r"./YYYY-MM-DD"
-        doc.save(os.path.join(save_file_path, docx_file_name))
-        print(colored("\nDocument successfully generated!", 'green')+"\n"+colored("-" * 32, 'green')+"\n"+"Your generated file: "+colored(docx_file_name, 'yellow') + " can be found at './YYYY-MM-DD/'")
+            print(colored("OK     ", 'green') + job_label + " ({:.3f}s): ".format(result.seconds) + colored(result.file_name, 'yellow'))
+    skipped: int = sum(1 for result in results if result.error == SKIPPED_JOB_ERROR)
+    failed: int = sum(1 for result in results if result.error) - skipped
+    unchanged: int = sum(1 for result in results if result.unchanged)
+    print(colored("-" * 32, 'green'))
+    print("{} rebuilt, {} unchanged, {} failed, {} skipped, total {:.3f}s".format(len(results) - failed - skipped - unchanged, unchanged, failed, skipped, total_seconds))
+    return failed + skipped
 
-def add_hyperlink(paragraph: Paragraph, url: str, text: str) -> Run:
+class StageTimings:
+    """
+    Wall and CPU time per stage, per document and per run, written as JSON
+    lines. Stages nest, e.g. 'assemble' includes the 'hyperlinks' of its
+    document. Stages outside of a document (template discovery, skeleton
+    ...) count for the run. While tracemalloc is tracing, the records also
+    hold the peak of traced memory in bytes. Records:
+
+    {"type": "document", "family", "version", "wall_ms", "cpu_ms", "peak_bytes", "stages"[, "error"]}
+    {"type": "run", "pid", "wall_ms", "cpu_ms", "peak_bytes", "stages"}
+
+    with "stages" mapping each stage name to {"wall_ms", "cpu_ms", "calls"}.
+    In parallel batches the documents are timed in the worker processes,
+    the run record covers the parent process only. Pipeline documents
+    overlap, their records hold the pipeline stages (load, render, save)
+    with the CPU time of the executing thread and no peak, see
+    document_record().
+
+    Keyword arguments:
+    output -- text file the JSON lines are written to, None only collects
+    """
+
+    enabled: bool = True
+
+    def __init__(self, output: Any = None):
+        self.output: Any = output
+        self._run_stages: Dict[str, List[float]] = {}      # stage -> [wall seconds, cpu seconds, calls]
+        self._document_stages: Dict[str, List[float]] = None
+        self._peak_bytes: int = 0
+        self._start: Tuple[float, float] = (time.perf_counter(), time.process_time())
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Any:
+        """Time a stage of the current document, or of the run outside of documents"""
+        wall: float = time.perf_counter()
+        cpu: float = time.process_time()
+        try:
+            yield
+        finally:
+            stages: Dict[str, List[float]] = self._run_stages if self._document_stages is None else self._document_stages
+            totals: List[float] = stages.setdefault(name, [0.0, 0.0, 0])
+            totals[0] += time.perf_counter() - wall
+            totals[1] += time.process_time() - cpu
+            totals[2] += 1
+
+    @contextlib.contextmanager
+    def document(self, family: str, version: str) -> Any:
+        """Time one document, yields its record which is completed when the block is left"""
+        import tracemalloc
+        record: Dict[str, Any] = {"type": "document", "family": family, "version": version}
+        self._document_stages = {}
+        if tracemalloc.is_tracing():
+            self._peak_bytes = max(self._peak_bytes, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        wall: float = time.perf_counter()
+        cpu: float = time.process_time()
+        try:
+            yield record
+        finally:
+            record.update(self._summary(wall, cpu, self._document_stages))
+            self._document_stages = None
+
+    def document_record(self, family: str, version: str, wall: float, stages: Dict[str, Tuple[float, float]], error: str = None) -> Dict[str, Any]:
+        """Return the record of a document timed by its caller: total wall seconds and (wall, cpu) seconds by stage"""
+        record: Dict[str, Any] = {
+            "type": "document", "family": family, "version": version,
+            "wall_ms": round(wall * 1000, 3),
+            "cpu_ms": round(sum(cpu for _, cpu in stages.values()) * 1000, 3),
+            "peak_bytes": None,
+            "stages": {name: {"wall_ms": round(stage_wall * 1000, 3), "cpu_ms": round(stage_cpu * 1000, 3), "calls": 1}
+                       for name, (stage_wall, stage_cpu) in stages.items()}}
+        if error:
+            record["error"] = error
+        return record
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        """Write a record as one JSON line"""
+        if record and self.output:
+            self.output.write(json.dumps(record) + "\n")
+
+    def close(self) -> None:
+        """Write the run record and close the output"""
+        if self.output:
+            self.emit(dict({"type": "run", "pid": os.getpid()}, **self._summary(*self._start, self._run_stages)))
+            self.output.close()
+
+    def _summary(self, wall: float, cpu: float, stages: Dict[str, List[float]]) -> Dict[str, Any]:
+        import tracemalloc
+        peak_bytes: int = None
+        if tracemalloc.is_tracing():
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+            self._peak_bytes = max(self._peak_bytes, peak_bytes)
+            if stages is self._run_stages:
+                peak_bytes = self._peak_bytes
+        return {
+            "wall_ms": round((time.perf_counter() - wall) * 1000, 3),
+            "cpu_ms": round((time.process_time() - cpu) * 1000, 3),
+            "peak_bytes": peak_bytes,
+            "stages": {name: {"wall_ms": round(totals[0] * 1000, 3), "cpu_ms": round(totals[1] * 1000, 3), "calls": totals[2]}
+                       for name, totals in stages.items()}}
+
+class NullTimings:
+    """Timings while instrumentation is disabled: every hook returns the same no-op context"""
+
+    enabled: bool = False
+
+    def stage(self, name: str) -> contextlib.nullcontext:
+        return NULL_CONTEXT
+
+    def document(self, family: str, version: str) -> contextlib.nullcontext:
+        return NULL_CONTEXT # yields None as record
+
+    def document_record(self, family: str, version: str, wall: float, stages: Dict[str, Tuple[float, float]], error: str = None) -> Dict[str, Any]:
+        return None
+
+    def emit(self, record: Dict[str, Any]) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+NULL_CONTEXT: contextlib.nullcontext = contextlib.nullcontext()
+
+# Timings of this process, replaced by set_timings() for --timings-json
+_timings: Any = NullTimings()
+
+def set_timings(timings: Any) -> None:
+    """Replace the timings of this process: StageTimings or NullTimings"""
+    global _timings
+    _timings = timings
+
+def write_approval(
+    taxonomy_family_name: str,
+    taxonomy_version: str,
+    resources: ApprovalResources,
+    save_file_path: str = OUTPUT_DIR,
+    build_manifest: BuildManifest = None,
+    force: bool = False,
+    labels: str = None) -> WrittenApproval:
+    """
+    Render the license approval with the backend of the resources and write
+    it to the output folder. The rendering is skipped if the build manifest
+    shows the existing file was rendered from the same inputs. The caller
+    records the returned inputs hash in the manifest.
+
+    Keyword arguments:
+    taxonomy_family_name -- the taxonomy's family name. E.g. eba
+    taxonomy_version     -- the taxonomy's version
+    resources            -- static resources loaded via load_resources()
+    save_file_path       -- output folder
+    build_manifest       -- manifest of the output folder, None renders always
+    force                -- render even if the inputs did not change
+    labels               -- label set, None for the one of the resources
+    """
+    content, inputs_hash, unchanged = prepare_approval(taxonomy_family_name, taxonomy_version, resources, build_manifest, force, labels)
+    if unchanged:
+        return WrittenApproval(content.file_name, inputs_hash, True)
+
+    docx_bytes: bytes = render_approval(content, resources)
+    with _timings.stage("write"), open(os.path.join(save_file_path, content.file_name), "wb") as docx_file:
+        docx_file.write(docx_bytes)
+    return WrittenApproval(content.file_name, inputs_hash, False)
+
+def prepare_approval(
+    taxonomy_family_name: str,
+    taxonomy_version: str,
+    resources: ApprovalResources,
+    build_manifest: BuildManifest = None,
+    force: bool = False,
+    labels: str = None) -> Tuple[ApprovalContent, str, bool]:
+    """
+    Compose the content of an approval and return it with its inputs hash
+    and whether the existing file can be kept, see write_approval().
+    """
+    resources = resources_for_labels(resources, labels)
+    with _timings.stage("compose"):
+        content: ApprovalContent = compose_approval(taxonomy_family_name, taxonomy_version, resources)
+    template: TemplateRecord = resources.templates.template(taxonomy_family_name)
+    inputs_hash: str = hashlib.sha1(json.dumps(
+        [resources.static_inputs_hash, template.sha1, template.get("_name") or taxonomy_family_name, taxonomy_version,
+         resources.backend]).encode("utf-8")).hexdigest()
+    unchanged: bool = bool(build_manifest) and not force and build_manifest.is_current(content.file_name, inputs_hash)
+    return content, inputs_hash, unchanged
+
+@functools.lru_cache(maxsize=None)
+def get_default_resources() -> ApprovalResources:
+    """Return the resources loaded with the defaults of load_resources(), loaded once per process"""
+    return load_resources()
+
+def generate_approval(taxonomy_family_name: str, taxonomy_version: str, resources: ApprovalResources = None, labels: str = None) -> Tuple[str, bytes]:
+    """
+    Render a license approval in memory and return its file name and DOCX
+    bytes. Nothing is written to the output folder.
+
+    Keyword arguments:
+    taxonomy_family_name -- the taxonomy's family name. E.g. eba
+    taxonomy_version     -- the taxonomy's version
+    resources            -- static resources loaded via load_resources(), None for get_default_resources()
+    labels               -- label set, None for the one of the resources
+    """
+    resources = resources_for_labels(resources or get_default_resources(), labels)
+    with _timings.stage("compose"):
+        content: ApprovalContent = compose_approval(taxonomy_family_name, taxonomy_version, resources)
+    return content.file_name, render_approval(content, resources)
+
+def render_request(resources: ApprovalResources, taxonomy_family_name: str, taxonomy_version: str, save: bool, labels: str = None) -> Tuple[str, bytes, str]:
+    """
+    Render one approval for the generation server. Return file name, DOCX
+    bytes and, if save is set, the path the file was written to.
+
+    Keyword arguments:
+    resources            -- static resources loaded via load_resources()
+    taxonomy_family_name -- the taxonomy's family name. E.g. eba
+    taxonomy_version     -- the taxonomy's version
+    save                 -- also write the file to the output folder
+    labels               -- label set, None for the one of the resources
+    """
+    from approval_server import NotFoundError, RequestError
+    # only the lookups answer 'not found', errors while rendering are errors of the server
+    try:
+        resources = resources_for_labels(resources, labels)
+        resources.templates.resolve(taxonomy_family_name)
+    except LookupError as e:
+        raise NotFoundError(str(e)) from e
+    file_name, docx_bytes = generate_approval(taxonomy_family_name, taxonomy_version, resources)
+    docx_file_path: str = None
+    if save:
+        # family and version come from the request and end up in the file name
+        output_dir: str = os.path.realpath(OUTPUT_DIR)
+        docx_file_path = os.path.join(OUTPUT_DIR, file_name)
+        if (os.sep in file_name or (os.altsep and os.altsep in file_name) or ".." in file_name
+                or os.path.dirname(os.path.realpath(docx_file_path)) != output_dir):
+            raise RequestError("File name '{}' leaves the output folder".format(file_name))
+        write_file(docx_file_path, docx_bytes)
+    return file_name, docx_bytes, docx_file_path
+
+def render_approval(content: "ApprovalContent", resources: ApprovalResources) -> bytes:
+    """Return the DOCX bytes of an approval, rendered with the backend of the resources
+
+    Keyword arguments:
+    content   -- content composed by compose_approval()
+    resources -- static resources loaded via load_resources()
+    """
+    resources = resources_for_labels(resources, content.labels)
+    if resources.writer:
+        with _timings.stage("render"):
+            return resources.writer.render(content)
+    docx_bytes: io.BytesIO = io.BytesIO()
+    render_approval_to(content, resources, docx_bytes)
+    return docx_bytes.getvalue()
+
+def render_approval_to(content: "ApprovalContent", resources: ApprovalResources, stream: Any) -> None:
+    """Render an approval with the backend of the resources into a writable binary stream
+
+    Keyword arguments:
+    content   -- content composed by compose_approval()
+    resources -- static resources loaded via load_resources()
+    stream    -- writable binary stream
+    """
+    resources = resources_for_labels(resources, content.labels)
+    if resources.writer:
+        with _timings.stage("render"):
+            stream.write(resources.writer.render(content))
+        return
+    with _timings.stage("assemble"):
+        doc: Document = copy.deepcopy(resources.skeleton)
+        fill_approval(doc, content, resources.fixed_time is not None)
+    with _timings.stage("save"):
+        if not resources.fixed_time:
+            doc.save(stream)
+            return
+        package: io.BytesIO = io.BytesIO()
+        doc.save(package)
+        write_reproducible_package(package.getvalue(), zip_date_time(resources.fixed_time), stream)
+
+def write_reproducible_package(docx_bytes: bytes, date_time: Tuple[int, ...], stream: Any) -> None:
+    """Write a DOCX package again with fixed time and attributes of all parts, in a fixed order, see ooxml_writer.py"""
+    import zipfile
+    from ooxml_writer import part_order, reproducible_zip_info
+    with zipfile.ZipFile(io.BytesIO(docx_bytes)) as source, zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED) as target:
+        name: str
+        for name in sorted(source.namelist(), key=part_order):
+            target.writestr(reproducible_zip_info(name, date_time), source.read(name))
+
+def reproducible_time() -> datetime.datetime:
+    """Return the time of reproducible documents: SOURCE_DATE_EPOCH if set, else REPRODUCIBLE_TIME. Zip times start in 1980"""
+    source_date_epoch: str = os.environ.get("SOURCE_DATE_EPOCH")
+    if not source_date_epoch:
+        return REPRODUCIBLE_TIME
+    return max(REPRODUCIBLE_TIME, datetime.datetime.fromtimestamp(int(source_date_epoch), datetime.timezone.utc).replace(tzinfo=None))
+
+def source_date() -> datetime.date:
+    """Return the UTC date of SOURCE_DATE_EPOCH, None if unset. Unlike reproducible_time() there is no default, a form never shows 01/01/1980"""
+    source_date_epoch: str = os.environ.get("SOURCE_DATE_EPOCH")
+    return datetime.datetime.fromtimestamp(int(source_date_epoch), datetime.timezone.utc).date() if source_date_epoch else None
+
+def zip_date_time(fixed_time: datetime.datetime) -> Tuple[int, ...]:
+    """Return the zip entry time of a fixed time, None for None. Zip times have a resolution of 2 seconds"""
+    return fixed_time.replace(second=fixed_time.second // 2 * 2).timetuple()[:6] if fixed_time else None
+
+class Segment(NamedTuple):
+    """Text shown in the document, as hyperlink if 'url' is set"""
+    text: str
+    url: str = None
+
+class CommentParagraph(NamedTuple):
+    """Paragraph below 'ADDITIONAL COMMENTS', optionally followed by a hyperlink"""
+    text: str
+    font_size: int
+    link: Segment = None
+
+# Rows of the main section whose value cell depends on family or version.
+# Row 7 (products that will introduce the license) is static.
+MAIN_SECTION_VALUE_ROWS: Tuple[int, ...] = (0, 1, 2, 3, 4, 5, 6, 8)
+
+class ApprovalContent(NamedTuple):
+    """
+    Everything of a license approval that depends on family, version or day.
+    The remaining parts are static and come from the document skeleton.
+
+    Keyword arguments:
+    submission_date -- text of the submission date cell in the meta info section
+    cells           -- main section row number -> segments of the value cell
+    comments        -- paragraphs of the final section
+    file_name       -- file name of the license approval
+    labels          -- label set the approval is rendered with, None for the one of the resources
+    """
+    submission_date: str
+    cells: Dict[int, List[Segment]]
+    comments: List[CommentParagraph]
+    file_name: str
+    labels: str = None
+
+def build_skeleton(labels: Labels, logo: MediaImage, fixed_time: datetime.datetime = None) -> Document:
+    """
+    Return the DOCX skeleton shared by all license approvals. It holds every
+    static part of the document: header with logo, title, meta info section,
+    the labels of the main section and the footer. Approvals are filled into
+    deep copies of the skeleton, the skeleton itself must not be accessed.
+
+    Keyword arguments:
+    labels     -- labels of the document
+    logo       -- logo shown in the header section, see prepare_media_image()
+    fixed_time -- creation and modification time of the core properties of
+                  reproducible documents, None keeps the python-docx defaults
+    """
+    from docx import Document
+    skeleton: io.BytesIO = io.BytesIO()
+    doc: Document = Document()
+    build_static_sections(doc, labels, logo)
+    if fixed_time:
+        doc.core_properties.created = fixed_time
+        doc.core_properties.modified = fixed_time
+        doc.core_properties.last_modified_by = ""
+        doc.core_properties.revision = 1
+    doc.save(skeleton)
+    # python-docx caches proxies like the document body on first access, a deep
+    # copy would detach them from the copied part. Hence the skeleton is loaded
+    # again and kept untouched.
+    return Document(skeleton)
+
+def build_slotted_skeleton(skeleton: Document) -> bytes:
+    """
+    Return the DOCX bytes of the skeleton with slot markers in all variable
+    parts, as needed by the fast backend.
+
+    Keyword arguments:
+    skeleton -- skeleton built by build_skeleton()
+    """
+    from ooxml_writer import COMMENTS_SLOT, DATE_SLOT, cell_slot, slot
+    doc: Document = copy.deepcopy(skeleton)
+    fill_approval(doc, ApprovalContent(
+        slot(DATE_SLOT),
+        {row_num: [Segment(slot(cell_slot(row_num)))] for row_num in MAIN_SECTION_VALUE_ROWS},
+        [CommentParagraph(slot(COMMENTS_SLOT), 11)],
+        ""))
+    slotted_skeleton: io.BytesIO = io.BytesIO()
+    doc.save(slotted_skeleton)
+    return slotted_skeleton.getvalue()
+
+def build_static_sections(doc: Document, labels: Labels, logo: MediaImage) -> None:
+    """
+    Add all static parts of the license approval to an empty document.
+
+    Keyword arguments:
+    doc       -- empty document
+    labels    -- labels of the document
+    logo      -- logo shown in the header section, see prepare_media_image()
+    """
+    from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
+    from docx.shared import Inches, Pt
+    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+    # <LICENSE APPROVAL DOCUMENT>
+    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+
+    # Customize document
+    section_style: _ParagraphStyle = doc.styles['Normal']
+    section_style.font.name = 'Calibri (Body)'
+    section_style.font.size = Pt(12)
+    section = doc.sections[0] # provide access to first section
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # header section:
+    # ------------------------------------------------------------------------------------------------------------------
+    header: section._Header = section.header
+    # table contains 1 row and 2 cells
+    header_table: Any = header.add_table(1, 2, Inches(12))
+    cell: _Cell
+    for cell in header_table.columns[1].cells:
+        cell.width = Inches(1)
+    # left cell wih internal refernces internal usage
+    para_l_cell: _Cell = set_paragraph(header_table, 0, 0, 0)
+    run_l_cell: Run = para_l_cell.add_run(labels.header_text)
+    run_l_cell.font.size = Pt(11)
+    # right cell displays logo pict
+    para_r_cell: _Cell = set_paragraph(header_table, 0, 1, 0)
+    run_r_cell = para_r_cell.add_run()
+
+    add_media_image(run_r_cell, logo)
+
+    set_title(doc, WD_ALIGN_PARAGRAPH.CENTER, labels.title_main_section, True, 13)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # meta info section about the document
+    # ------------------------------------------------------------------------------------------------------------------
+    doc_info_section: Any = doc.add_table(rows=3, cols=3)
+    # row = 0, cells = 0,1
+    set_pargraph_meta_section(doc_info_section, 0, 0, 0, WD_LINE_SPACING.SINGLE, labels.sender_form, WD_ALIGN_PARAGRAPH.LEFT)
+    set_pargraph_meta_section(doc_info_section, 0, 1, 0, WD_LINE_SPACING.SINGLE, labels.submission_text_property, WD_ALIGN_PARAGRAPH.RIGHT)
+    set_pargraph_meta_section(doc_info_section, 0, 2, 0, WD_LINE_SPACING.SINGLE, labels.submission_text_name, WD_ALIGN_PARAGRAPH.LEFT)
+    # row = 1, cells = 0,1
+    set_pargraph_meta_section(doc_info_section, 1, 0, 0, WD_LINE_SPACING.SINGLE, labels.submission_to, WD_ALIGN_PARAGRAPH.LEFT)
+    set_pargraph_meta_section(doc_info_section, 1, 1, 0, WD_LINE_SPACING.SINGLE, labels.appt_or_rej_text, WD_ALIGN_PARAGRAPH.RIGHT)
+    set_pargraph_meta_section(doc_info_section, 1, 2, 0, WD_LINE_SPACING.SINGLE, "", WD_ALIGN_PARAGRAPH.LEFT)
+    # row = 2, cells = 0,1 (the submission date is filled per document)
+    set_pargraph_meta_section(doc_info_section, 2, 0, 0, WD_LINE_SPACING.SINGLE, labels.sub_date, WD_ALIGN_PARAGRAPH.LEFT)
+    set_pargraph_meta_section(doc_info_section, 2, 1, 0, WD_LINE_SPACING.SINGLE, labels.date_appr_text, WD_ALIGN_PARAGRAPH.RIGHT)
+    set_pargraph_meta_section(doc_info_section, 2, 2, 0, WD_LINE_SPACING.SINGLE, labels.date_format, WD_ALIGN_PARAGRAPH.LEFT)
+    # set width for cells
+    set_meta_section_table_cell_width(doc_info_section, 0, 3.6)
+    set_meta_section_table_cell_width(doc_info_section, 1, 3.0)
+    set_meta_section_table_cell_width(doc_info_section, 2, 2.2)
+
+    set_sep_line(doc, "________________________________________________________________________", False)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # main section of the document (deals with meta information about the taxonomy)
+    # ------------------------------------------------------------------------------------------------------------------
+    main_table: Any = doc.add_table(rows=9, cols=2)
+    set_main_section_paragraph(main_table, 0, 0, labels.third_party_name_prop)
+    set_main_section_paragraph(main_table, 1, 0, labels.version_year_prop)
+    set_main_section_paragraph(main_table, 2, 0, labels.update_prop)
+    set_main_section_paragraph(main_table, 3, 0, labels.softw_desc_prop)
+    set_main_section_paragraph(main_table, 4, 0, labels.link_property_prop)
+    set_main_section_paragraph(main_table, 5, 0, labels.license_prop)
+    set_main_section_paragraph(main_table, 6, 0, labels.link_lic_prop)
+    set_main_section_paragraph(main_table, 7, 0, labels.prod_prop)
+    set_main_section_paragraph(main_table, 7, 1, labels.affected_products)
+    set_main_section_paragraph(main_table, 8, 0, labels.time_ver_prop)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # final section of the document
+    # ------------------------------------------------------------------------------------------------------------------
+    doc.add_paragraph().add_run("\nADDITIONAL COMMENTS:")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # footer section
+    # ------------------------------------------------------------------------------------------------------------------
+    footer: Paragraph = section.footer
+    set_footer(footer, 0, "Ver: 01/2022", 10)
+
+    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+    # </LICENSE APPROVAL DOCUMENT>
+    # ++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++
+
+def fill_approval(doc: Document, content: ApprovalContent, stable_rel_ids: bool = False) -> None:
+    """
+    Fill the variable parts of a document created from the skeleton.
+
+    Keyword arguments:
+    doc            -- document created from the skeleton
+    content        -- family and version specific content
+    stable_rel_ids -- derive the relationship ids of hyperlinks from their URL, see add_hyperlink()
+    """
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    doc_info_section: Any = doc.tables[0]
+    set_paragraph(doc_info_section, 2, 0, 0).text = content.submission_date
+
+    main_table: Any = doc.tables[1]
+    row_num: int
+    segments: List[Segment]
+    for row_num, segments in content.cells.items():
+        if len(segments) == 1 and segments[0].url is None:
+            set_main_section_paragraph(main_table, row_num, 1, segments[0].text)
+            continue
+        paragraph: Paragraph = set_paragraph(main_table, row_num, 1, 0)
+        segment: Segment
+        for segment in segments:
+            if segment.url is None:
+                paragraph.add_run(segment.text)
+            else:
+                with _timings.stage("hyperlinks"):
+                    add_hyperlink(paragraph, segment.url, segment.text, stable_rel_ids)
+
+    comment: CommentParagraph
+    for comment in content.comments:
+        comment_paragraph: Paragraph = set_additional_comment(doc, WD_ALIGN_PARAGRAPH.LEFT, comment.text, comment.font_size, 82, 82, 82, True, False)
+        if comment.link:
+            with _timings.stage("hyperlinks"):
+                add_hyperlink(comment_paragraph, comment.link.url, comment.link.text, stable_rel_ids)
+
+def compose_approval(taxonomy_family_name: str, taxonomy_version: str, resources: ApprovalResources) -> ApprovalContent:
+    """
+    Return the family and version specific content of a license approval.
+    The content follows the render plan of the family, see FamilyRules.
+
+    Keyword arguments:
+    taxonomy_family_name -- the taxonomy's family name. E.g. eba
+    taxonomy_version     -- the taxonomy's version
+    resources            -- static resources loaded via load_resources()
+    """
+    # Find requested template via family. Aliases and prefixes of a family
+    # are rendered like the family itself, e.g. 'EBA' like 'eba'
+    template: TemplateRecord = resources.templates.template(taxonomy_family_name)
+    plan: RenderPlan = resources.rules.plan(template)
+    fields: TemplateFields = TemplateFields(template.data, version=taxonomy_version, family=template.get("_name") or taxonomy_family_name)
+
+    # american date format, the date of the run unless one is given, see load_resources()
+    submission_date: str = resources.labels.sub_date + (resources.submission_date or datetime.datetime.now()).strftime("%m/%d/%Y")
+
+    cells: Dict[int, List[Segment]] = {
+        # a missing url field leaves the text without hyperlink
+        row_num: [Segment(text(fields), (url(fields) or None) if url else None) for text, url in segments] for row_num, segments in plan.cells}
+
+    # Approximate time/version?
+    # -------------------------
+    cells[8] = [Segment(resources.approximate_version)]
+
+    comments: List[CommentParagraph] = [
+        CommentParagraph(text(fields), font_size, Segment(link[0](fields), link[1](fields)) if link else None)
+        for text, font_size, link in plan.comments]
+
+    docx_file_name: str = compose_docx_file_name(*[part(fields) for part in plan.file_name])
+    return ApprovalContent(submission_date, cells, comments, docx_file_name, resources.labels.name)
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Family rules
+# ----------------------------------------------------------------------------------------------------------------------
+
+# Returns a text of the approval from the fields of a template, see compile_text_spec()
+TextFunction = Callable[["TemplateFields"], str]
+
+class TemplateFields(dict):
+    """Fields of a template plus 'version' and 'family' of the approval. Missing fields format as empty text"""
+
+    def __missing__(self, key: str) -> str:
+        return ""
+
+class RenderPlan(NamedTuple):
+    """Compiled rules of a family: everything compose_approval() needs besides the fields"""
+    cells: Tuple[Tuple[int, Tuple[Tuple[TextFunction, TextFunction], ...]], ...]  # (row, ((text, url or None), ...)), by row
+    comments: Tuple[Tuple[TextFunction, int, Tuple[TextFunction, TextFunction]], ...]  # (text, font size, (link text, url) or None)
+    file_name: Tuple[TextFunction, ...]  # the arguments of compose_docx_file_name()
+
+class FamilyRules:
+    """
+    Family specific content of the approvals, read from the rules file. The
+    'default' rules apply to every family. The rules of a family in
+    'families' (by '_name') and the '_rules' object of its template
+    override them: 'cells' per row, 'comments' and 'file_name' as a whole.
+
+    {"cells": {"<row>": [{"text": <spec>, "url": <spec>}, ...]},   url is optional
+     "comments": [{"text": <spec>, "font_size": 11, "link": {"text": <spec>, "url": <spec>}}],
+     "file_name": [<spec>, ...]}   the 8 arguments of compose_docx_file_name()
+
+    A text spec is a format string of the template fields, e.g. "{swname}",
+    or an object, see compile_text_spec(). The rules of a template are
+    compiled once into a RenderPlan, so rendering a document only evaluates
+    the plan of its family. The rules can be shared by threads, e.g. of the
+    generation server.
+
+    Keyword arguments:
+    rules_path -- path to the rules file
+    max_plans  -- number of compiled render plans kept, least recently used ones are dropped
+    """
+
+    def __init__(self, rules_path: str = RULES_FILE, max_plans: int = 256):
+        self.rules_path: str = rules_path
+        with open(rules_path, "rb") as rules_file:
+            content: bytes = rules_file.read()
+        self.sha1: str = hashlib.sha1(content).hexdigest()
+        rules: dict = json.loads(content)
+        self._default: dict = rules["default"]
+        self._families: Dict[str, dict] = {family.lower(): family_rules for family, family_rules in rules.get("families", {}).items()}
+        self.max_plans: int = max_plans
+        self._plans: OrderedDict = OrderedDict() # (template path, template sha1) -> plan, least recently used first
+        self._lock: threading.Lock = threading.Lock()
+
+    def plan(self, template: "TemplateRecord") -> RenderPlan:
+        """Return the render plan of a template, compiled on first use"""
+        key: Tuple[str, str] = (template.path, template.sha1)
+        with self._lock:
+            plan: RenderPlan = self._plans.get(key)
+            if plan is None:
+                plan = compile_render_plan(*self.rules_of(template.data, template.path))
+                self._plans[key] = plan
+                if len(self._plans) > self.max_plans:
+                    self._plans.popitem(last=False)
+            else:
+                self._plans.move_to_end(key)
+            return plan
+
+    def clear(self) -> None:
+        """Drop all compiled render plans"""
+        with self._lock:
+            self._plans.clear()
+
+    def rules_of(self, data: dict, template_path: str) -> Tuple[dict, dict, dict]:
+        """Return the default rules, the rules of the template's family and its own rules, in override order"""
+        family: str = (data.get("_name") or os.path.splitext(os.path.basename(template_path))[0]).lower()
+        return self._default, self._families.get(family, {}), data.get("_rules") or {}
+
+def merge_rules(*rules: dict) -> Tuple[Dict[int, list], list, list]:
+    """Return cells by row, comments and file name of rules, later rules override earlier ones, see FamilyRules"""
+    cells: Dict[int, list] = {}
+    comments: list = []
+    file_name: list = []
+    rule: dict
+    for rule in rules:
+        cells.update((int(row_num), segments) for row_num, segments in rule.get("cells", {}).items())
+        comments = rule.get("comments", comments)
+        file_name = rule.get("file_name", file_name)
+    return cells, comments, file_name
+
+def compile_render_plan(*rules: dict) -> RenderPlan:
+    """Compile rules into a render plan, later rules override earlier ones, see FamilyRules"""
+    cells, comments, file_name = merge_rules(*rules)
+    if len(file_name) != 8:
+        raise ValueError("'file_name' rule needs the 8 arguments of compose_docx_file_name(), got: " + repr(file_name))
+    return RenderPlan(
+        tuple((row_num, tuple(compile_segment_spec(segment) for segment in cells[row_num])) for row_num in sorted(cells)),
+        tuple((compile_text_spec(comment.get("text", "")), comment["font_size"],
+               compile_segment_spec(comment["link"]) if comment.get("link") else None) for comment in comments),
+        tuple(compile_text_spec(part) for part in file_name))
+
+def compile_segment_spec(segment: dict) -> Tuple[TextFunction, TextFunction]:
+    """Return the text and url functions of a segment rule, url is None for plain text"""
+    return compile_text_spec(segment["text"]), compile_text_spec(segment["url"]) if "url" in segment else None
+
+def compile_text_spec(spec: Any) -> TextFunction:
+    """
+    Return the function computing a text of the approval from the fields:
+
+    "{swname}"                   the field itself, empty if the template lacks it
+    "FASB {version} Taxonomy"    format string of fields, missing fields are empty
+    {"field": "version", "split": " ", "index": 1, "replace": [" DICT", ""], "format": "v{}"}
+                                 a field, split at a separator and the part at
+                                 index picked, text replaced, then formatted.
+                                 Without index the format gets all parts, e.g.
+                                 "{0} bdp v{1}". All keys besides field are optional.
+    """
+    if isinstance(spec, str):
+        match: Any = re.fullmatch(r"\{(\w+)\}", spec)
+        if match:
+            return operator.itemgetter(match.group(1))
+        if "{" not in spec:
+            return lambda fields: spec
+        return spec.format_map
+
+    field: str = spec["field"]
+    separator: str = spec.get("split")
+    index: int = spec.get("index")
+    replace: List[str] = spec.get("replace")
+    text_format: str = spec.get("format", "{}")
+
+    def text(fields: TemplateFields) -> str:
+        value: Any = fields[field]
+        if separator is not None:
+            value = value.split(separator)
+            if index is not None:
+                value = value[index]
+        if replace:
+            value = value.replace(*replace)
+        return text_format.format(*value) if isinstance(value, list) else text_format.format(value)
+    return text
+
+def text_spec_fields(spec: Any) -> List[str]:
+    """Return the names of the template fields a text spec reads, see compile_text_spec()"""
+    if isinstance(spec, str):
+        return [re.split(r"[.\[]", name)[0] for _, name, _, _ in string.Formatter().parse(spec) if name]
+    return [spec["field"]]
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Template validation
+# ----------------------------------------------------------------------------------------------------------------------
+
+# Schema of the templates, see compile_schema()
+TEMPLATE_SCHEMA_FILE: str = r"./template_schema.json"
+
+# Fields every approval gets besides the template fields, see TemplateFields
+APPROVAL_FIELDS: Tuple[str, str] = ("version", "family")
+
+# Python types of the JSON Schema types
+SCHEMA_TYPES: Dict[str, tuple] = {
+    "object": (dict,), "array": (list,), "string": (str,), "integer": (int,), "number": (int, float), "boolean": (bool,), "null": (type(None),)}
+
+# Checks a value at a location, e.g. 'instances[2]._semver', and appends (location, message) of every violation
+SchemaCheck = Callable[[Any, str, List[Tuple[str, str]]], None]
+
+class TemplateIssue(NamedTuple):
+    """Error or warning of a template found by the validation"""
+    path: str
+    location: str   # field path in the template, e.g. 'instances[2]._semver', or 'line 3, column 7' for JSON syntax errors
+    message: str
+    severity: str   # 'error' or 'warning'
+
+def compile_schema(schema: dict) -> SchemaCheck:
+    """
+    Compile a schema once into a check function. Supported is the subset of
+    JSON Schema the templates need: type, required, properties, items,
+    pattern, minLength and minItems. Other keywords are ignored.
+
+    Keyword arguments:
+    schema -- the schema, e.g. of template_schema.json
+    """
+    checks: List[SchemaCheck] = []
+    expected_type: str = schema.get("type")
+    types: tuple = SCHEMA_TYPES[expected_type] if expected_type else ()
+    if "required" in schema:
+        required: List[str] = schema["required"]
+        checks.append(lambda value, location, errors: errors.extend(
+            (join_location(location, name), "required field is missing") for name in required if name not in value))
+    if "properties" in schema:
+        properties: Dict[str, SchemaCheck] = {name: compile_schema(sub_schema) for name, sub_schema in schema["properties"].items()}
+
+        def check_properties(value: dict, location: str, errors: List[Tuple[str, str]]) -> None:
+            for name, check in properties.items():
+                if name in value:
+                    check(value[name], join_location(location, name), errors)
+        checks.append(check_properties)
+    if "items" in schema:
+        check_item: SchemaCheck = compile_schema(schema["items"])
+        checks.append(lambda value, location, errors: [check_item(item, location + "[" + str(i) + "]", errors) for i, item in enumerate(value)])
+    if "minItems" in schema:
+        min_items: int = schema["minItems"]
+        checks.append(lambda value, location, errors: len(value) < min_items and errors.append((location, "needs at least {} item(s)".format(min_items))))
+    if "minLength" in schema:
+        min_length: int = schema["minLength"]
+        checks.append(lambda value, location, errors: len(value) < min_length and errors.append((location, "needs at least {} character(s)".format(min_length))))
+    if "pattern" in schema:
+        pattern: Any = re.compile(schema["pattern"])
+        checks.append(lambda value, location, errors: pattern.search(value) or errors.append((location, "does not match " + pattern.pattern + ": " + repr(value))))
+
+    def check(value: Any, location: str, errors: List[Tuple[str, str]]) -> None:
+        # bool is a subclass of int, but no JSON number
+        if types and (not isinstance(value, types) or (isinstance(value, bool) and bool not in types)):
+            errors.append((location, "expected {}, got {}".format(expected_type, type(value).__name__)))
+            return
+        for sub_check in checks:
+            sub_check(value, location, errors)
+    return check
+
+def join_location(location: str, name: str) -> str:
+    """Return the location of a field of an object, e.g. 'instances[2]._semver'"""
+    return location + "." + name if location else name
+
+class TemplateValidator:
+    """
+    Checks templates against the template schema and the family rules, both
+    compiled once. Besides the schema, every field the rules of a template's
+    family read must be present: missing fields of cells and comments are
+    errors (the document shows empty text), missing fields of the file name
+    are warnings.
+
+    Keyword arguments:
+    schema_path -- schema of the templates, see compile_schema()
+    rules_path  -- rules file with the family specific content, see FamilyRules
+    """
+
+    def __init__(self, schema_path: str = TEMPLATE_SCHEMA_FILE, rules_path: str = RULES_FILE):
+        with open(schema_path, "rb") as schema_file:
+            self._check: SchemaCheck = compile_schema(json.load(schema_file))
+        self.rules: FamilyRules = FamilyRules(rules_path)
+
+    def validate(self, template_path: str) -> List[TemplateIssue]:
+        """Return all errors and warnings of a template file"""
+        try:
+            with open(template_path, "rb") as data_file:
+                data: Any = json.loads(data_file.read())
+        except json.JSONDecodeError as e:
+            return [TemplateIssue(template_path, "line {}, column {}".format(e.lineno, e.colno), "invalid JSON: " + e.msg, "error")]
+        except (OSError, ValueError) as e:
+            return [TemplateIssue(template_path, "", "cannot be read: " + str(e), "error")]
+
+        errors: List[Tuple[str, str]] = []
+        self._check(data, "", errors)
+        issues: List[TemplateIssue] = [TemplateIssue(template_path, location, message, "error") for location, message in errors]
+        if not isinstance(data, dict) or not isinstance(data.get("_rules", {}), dict):
+            return issues
+        rules: Tuple[dict, dict, dict] = self.rules.rules_of(data, template_path)
+        try:
+            compile_render_plan(*rules)
+        except (KeyError, TypeError, ValueError) as e:
+            return issues + [TemplateIssue(template_path, "_rules", "rules cannot be compiled: " + str(e), "error")]
+        cells, comments, file_name = merge_rules(*rules)
+        location: str
+        for location, spec in rule_text_specs(cells, comments, file_name):
+            field: str
+            for field in text_spec_fields(spec):
+                if field not in data and field not in APPROVAL_FIELDS:
+                    severity: str = "warning" if location.startswith("file_name") else "error"
+                    issues.append(TemplateIssue(template_path, field, "field missing, the rules read it for " + location, severity))
+        return issues
+
+def rule_text_specs(cells: Dict[int, list], comments: list, file_name: list) -> List[Tuple[str, Any]]:
+    """Return (location, text spec) of all text specs of merged rules, e.g. ('cells.6[0].url', '{licweb}')"""
+    specs: List[Tuple[str, Any]] = []
+    for row_num, segments in sorted(cells.items()):
+        for i, segment in enumerate(segments):
+            specs.extend(("cells.{}[{}].{}".format(row_num, i, key), segment[key]) for key in ("text", "url") if key in segment)
+    for i, comment in enumerate(comments):
+        specs.extend(("comments[{}].{}".format(i, key), comment[key]) for key in ("text",) if key in comment)
+        specs.extend(("comments[{}].link.{}".format(i, key), spec) for key, spec in (comment.get("link") or {}).items())
+    specs.extend(("file_name[{}]".format(i), spec) for i, spec in enumerate(file_name))
+    return specs
+
+# Validator of a worker process of the validation pool, set by init_validation_worker()
+_worker_validator: TemplateValidator = None
+
+def init_validation_worker(schema_path: str, rules_path: str) -> None:
+    """Compile schema and rules once when a worker process of the validation pool starts"""
+    global _worker_validator
+    _worker_validator = TemplateValidator(schema_path, rules_path)
+
+def validate_worker_templates(template_paths: List[str]) -> List[TemplateIssue]:
+    """Validate a chunk of templates inside a worker process"""
+    return [issue for template_path in template_paths for issue in _worker_validator.validate(template_path)]
+
+def validate_templates(
+    templates_dir: str = r"./templates",
+    workers: int = 1,
+    schema_path: str = TEMPLATE_SCHEMA_FILE,
+    rules_path: str = RULES_FILE) -> Tuple[int, List[TemplateIssue]]:
+    """
+    Validate all templates of a folder in one pass and return the number of
+    templates and all their issues, ordered by template path. With more than
+    one worker the templates are validated in chunks by a process pool.
+
+    Keyword arguments:
+    templates_dir -- folder with the JSON templates
+    workers       -- number of worker processes. 1 validates in this process
+    schema_path   -- schema of the templates, see compile_schema()
+    rules_path    -- rules file with the family specific content, see FamilyRules
+    """
+    template_paths: List[str] = sorted(path for path in get_all_templates(templates_dir)
+                                       if path.endswith(".json") and not os.path.basename(path).startswith("."))
+    if workers <= 1:
+        validator: TemplateValidator = TemplateValidator(schema_path, rules_path)
+        return len(template_paths), [issue for template_path in template_paths for issue in validator.validate(template_path)]
+
+    from concurrent.futures import ProcessPoolExecutor
+    # a few chunks per worker keep the pool busy without one task per template
+    chunk_size: int = max(1, len(template_paths) // (workers * 4))
+    chunks: List[List[str]] = [template_paths[i:i + chunk_size] for i in range(0, len(template_paths), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_validation_worker, initargs=(schema_path, rules_path)) as executor:
+        return len(template_paths), [issue for chunk_issues in executor.map(validate_worker_templates, chunks) for issue in chunk_issues]
+
+def print_validation_report(template_count: int, issues: List[TemplateIssue], seconds: float) -> bool:
+    """Print every issue as 'path: location: message' plus a summary, return True if there is no error"""
+    issue: TemplateIssue
+    for issue in issues:
+        print(colored(issue.severity.upper(), 'red' if issue.severity == "error" else 'yellow') + " " + issue.path + ": " + issue.location + ": " + issue.message)
+    errors: int = sum(1 for issue in issues if issue.severity == "error")
+    summary: str = "{} templates validated, {} errors, {} warnings in {:.3f}s".format(template_count, errors, len(issues) - errors, seconds)
+    print(colored(summary, 'red' if errors else 'green'))
+    return not errors
+
+def add_media_image(run: Run, image: MediaImage) -> None:
+    """
+    Add a prepared image as inline picture of its display size to a run. In
+    contrast to Run.add_picture() the image is not read, hashed and
+    inspected again, its image part is created from the prepared values.
+
+    Keyword arguments:
+    run   -- run showing the picture
+    image -- image prepared by prepare_media_image()
+    """
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    from docx.opc.packuri import PackURI
+    from docx.oxml.shape import CT_Inline
+    from docx.parts.image import ImagePart
+    part: Any = run.part
+    # same part names as python-docx: /word/media/image1.png, image2.png ...
+    image_num: int = 1 + sum(1 for package_part in part.package.iter_parts() if package_part.partname.startswith("/word/media/"))
+    image_part: ImagePart = ImagePart(PackURI("/word/media/image{}.{}".format(image_num, image.ext)), image.content_type, image.blob)
+    relation_id: str = part.relate_to(image_part, RT.IMAGE)
+    run._r.add_drawing(CT_Inline.new_pic_inline(part.next_id, relation_id, "image." + image.ext, *image.display_size))
+
+def add_hyperlink(paragraph: Paragraph, url: str, text: str, stable_rel_id: bool = False) -> Run:
     """
     Returns an embedded hyperlink in a text string.
     The source of this code is https://github.com/python-openxml/python-docx/issues/384.
     The code has been extended with underlining blue text color.
 
     Keyword arguments:
-    paragraph -- paragraph where text is shown
-    url       -- website
-    text      -- text for embedded url
+    paragraph     -- paragraph where text is shown
+    url           -- website
+    text          -- text for embedded url
+    stable_rel_id -- derive the relationship id from the url instead of numbering it,
+                     so it does not depend on the other links of the document
     """
+    from docx.enum.dml import MSO_THEME_COLOR_INDEX
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    from docx.oxml.shared import OxmlElement, qn
     part: DocumentPart = paragraph.part # get access to document.xml.rels file and new relation id value
-    relation_id: str = part.relate_to(url, RT.HYPERLINK, is_external=True)
+    if stable_rel_id:
+        from ooxml_writer import stable_rel_id as url_rel_id
+        relation_id: str = url_rel_id(url)
+        if relation_id not in part.rels:
+            part.rels.add_relationship(RT.HYPERLINK, url, relation_id, is_external=True)
+    else:
+        relation_id = part.relate_to(url, RT.HYPERLINK, is_external=True)
     hyperlink: _Element = OxmlElement('w:hyperlink') # create w:hyperlink tag and add new value
     hyperlink.set(qn('r:id'), relation_id)
     hyperlink.set(qn('w:history'), '1')
@@ -468,51 +2157,608 @@ def add_hyperlink(paragraph: Paragraph, url: str, text: str) -> Run:
     r.font.underline = True
     return r
 
+# Versions already read, by path: (mtime, size, version)
+_approximate_versions: Dict[str, Tuple[int, int, str]] = {}
+
 def get_approximate_version(path_to_artifact_database: str) -> str:
     """
     Returns the latest major release version of legacy/server products as a string.
     The approximate version is the major release version of the legacy/server products.
     This version is hardcoded in the 'C:/Projects/installer/ArtifactDatabase.xml' file.
 
+    The database is streamed and parsing stops at the first element with
+    'Version' in its tag and a 'MajorVersionYear' attribute. Every finished
+    element is cleared and removed from its parent, so memory stays flat for
+    large databases. The result is cached until modification time or size
+    of the file change.
+
     Keyword arguments
     path_toartifact_database -- path to the 'ArtifactDatabase.xml'
     """
+    import xml.etree.ElementTree as ET
     try:
-        tree: ET.ElementTree = ET.parse(path_to_artifact_database)
-        root: ET.Element = tree.getroot()
-        for elem in root.iter():
-            if 'Version' in elem.tag:
-                elemAttributeMap: MutableMapping[str, str] = elem.attrib.items()
-                for elem_name, elem_value in elemAttributeMap:
-                    if elem_name == "MajorVersionYear":
-                        return elem_value
+        stat: os.stat_result = os.stat(path_to_artifact_database)
+        cached: Tuple[int, int, str] = _approximate_versions.get(path_to_artifact_database)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        version: str = None
+        open_elems: List[ET.Element] = [] # root ... parent of the current element
+        event: str
+        elem: ET.Element
+        for event, elem in ET.iterparse(path_to_artifact_database, events=("start", "end")):
+            if event == "start":
+                if 'Version' in elem.tag and "MajorVersionYear" in elem.attrib:
+                    version = elem.attrib["MajorVersionYear"]
+                    break
+                open_elems.append(elem)
+            else:
+                open_elems.pop()
+                elem.clear()
+                if open_elems:
+                    del open_elems[-1][-1] # a finished element is always the last child of its parent
+        _approximate_versions[path_to_artifact_database] = (stat.st_mtime_ns, stat.st_size, version)
+        return version
     except OSError as e:
-        print("ERROR " + str(e.errno) + ": File 'C:/Projects/installer/ArtifactDatabase.xml' not found!")
+        print("ERROR " + str(e.errno) + ": File '" + path_to_artifact_database + "' not found!")
+    except ET.ParseError as e:
+        print("ERROR: File '" + path_to_artifact_database + "' is no valid XML: " + str(e))
 
-def get_all_templates() -> list:
+def get_all_templates(templates_dir: str = r"./templates") -> list:
     """Return a list with all template files plus the relative path"""
     allTemplates: list = []
-    for root, directories, files in os.walk(r"./templates", topdown=False):
+    for root, directories, files in os.walk(templates_dir, topdown=False):
         for name in files:
             allTemplates.append(os.path.join(root, name))
     return allTemplates
 
-def iterate_over_json_file(json_file: str, elem_name: str) -> str:
+class TemplateRecord(NamedTuple):
+    """
+    Parsed JSON template plus the file state it was parsed from.
+
+    Keyword arguments:
+    path     -- path to the json file
+    mtime_ns -- modification time of the file when parsed
+    size     -- size of the file when parsed
+    sha1     -- hash of the file content
+    data     -- the parsed template
+    """
+    path: str
+    mtime_ns: int
+    size: int
+    sha1: str
+    data: dict
+
+    def get(self, elem_name: str) -> Any:
+        """Return the value of a template field or None if it is missing"""
+        return self.data.get(elem_name)
+
+# Default folder of the on-disk template cache
+TEMPLATE_CACHE_DIR: str = r"./.cache/templates"
+
+class TemplateDiskCache:
+    """
+    Keeps a pickled copy of every parsed template on disk, so later runs
+    skip the JSON parsing. An entry is used as is while path, modification
+    time and size of the template are unchanged. Otherwise the template is
+    hashed, and the entry is still used (and refreshed) if the content hash
+    matches. Only changed templates are parsed again.
+
+    Keyword arguments:
+    cache_dir -- folder holding the cache entries
+    """
+
+    def __init__(self, cache_dir: str = TEMPLATE_CACHE_DIR):
+        self.cache_dir: str = cache_dir
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def load(self, json_file: str, stat: os.stat_result) -> Tuple[dict, str]:
+        """Return the parsed template and its content hash"""
+        abs_path: str = os.path.abspath(json_file)
+        entry_path: str = os.path.join(self.cache_dir, hashlib.sha1(abs_path.encode("utf-8")).hexdigest() + ".pickle")
+        entry: dict = None
+        try:
+            with open(entry_path, "rb") as entry_file:
+                entry = pickle.load(entry_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass # no or broken entry, the template is parsed again
+        if entry and (entry["path"], entry["mtime_ns"], entry["size"]) == (abs_path, stat.st_mtime_ns, stat.st_size):
+            self.hits += 1
+            return entry["data"], entry["sha1"]
+
+        with open(json_file, "rb") as data_file:
+            content: bytes = data_file.read()
+        sha1: str = hashlib.sha1(content).hexdigest()
+        if entry and entry["sha1"] == sha1:
+            self.hits += 1
+            data: dict = entry["data"]
+        else:
+            self.misses += 1
+            data = json.loads(content)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # write under a temporary name first, parallel workers may read the entry
+        tmp_path: str = entry_path + "." + str(os.getpid()) + "." + str(threading.get_ident())
+        with open(tmp_path, "wb") as entry_file:
+            pickle.dump({"path": abs_path, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": sha1, "data": data}, entry_file, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+        return data, sha1
+
+    def clear(self) -> None:
+        """Remove all cache entries"""
+        if os.path.isdir(self.cache_dir):
+            entry_name: str
+            for entry_name in os.listdir(self.cache_dir):
+                if entry_name.endswith(".pickle"):
+                    os.remove(os.path.join(self.cache_dir, entry_name))
+
+class TemplateLoader:
+    """
+    Parses each JSON template once and keeps the records of the most
+    recently used templates. A cached record is served as long as the
+    modification time and size of its file are unchanged, otherwise the
+    file is loaded again, through the on-disk cache if there is one. The
+    loader can be shared by threads, e.g. of the generation server.
+
+    Keyword arguments:
+    max_templates -- number of parsed templates kept in memory
+    disk_cache    -- on-disk cache used before parsing a template, None disables it
+    """
+
+    def __init__(self, max_templates: int = 256, disk_cache: TemplateDiskCache = None):
+        self.max_templates: int = max_templates
+        self.disk_cache: TemplateDiskCache = disk_cache
+        self._records: OrderedDict = OrderedDict() # path -> TemplateRecord, least recently used first
+        self._lock: threading.Lock = threading.Lock()
+
+    def load(self, json_file: str) -> TemplateRecord:
+        """Return the record of a template, parsing the file only if it changed"""
+        with self._lock:
+            return self._load(json_file)
+
+    def _load(self, json_file: str) -> TemplateRecord:
+        stat: os.stat_result = os.stat(json_file)
+        record: TemplateRecord = self._records.get(json_file)
+        if record is None or record.mtime_ns != stat.st_mtime_ns or record.size != stat.st_size:
+            with _timings.stage("load_template"):
+                data, sha1 = self._read(json_file, stat)
+            record = TemplateRecord(json_file, stat.st_mtime_ns, stat.st_size, sha1, data)
+            self._records[json_file] = record
+            if len(self._records) > self.max_templates:
+                self._records.popitem(last=False)
+        else:
+            self._records.move_to_end(json_file)
+        return record
+
+    def _read(self, json_file: str, stat: os.stat_result) -> Tuple[dict, str]:
+        """Return the parsed template and its content hash, through the on-disk cache if there is one"""
+        if self.disk_cache:
+            return self.disk_cache.load(json_file, stat)
+        with open(json_file, "rb") as data_file:
+            content: bytes = data_file.read()
+        return json.loads(content), hashlib.sha1(content).hexdigest()
+
+    def clear(self) -> None:
+        """Release all parsed templates kept in memory"""
+        with self._lock:
+            self._records.clear()
+
+    def registry(self, templates_dir: str) -> "TemplateRegistry":
+        """Return a new registry of the templates of a folder served by this loader"""
+        return TemplateRegistry(templates_dir, self)
+
+# Default SQLite file of the template store, see template_store.py
+TEMPLATE_STORE_FILE: str = r"./.cache/templates.sqlite"
+
+class StoredTemplateLoader(TemplateLoader):
+    """
+    Loader serving the templates of one folder from the SQLite template
+    store instead of the JSON files, see template_store.py. A record holds
+    the fields of the template without arrays of objects like the
+    'instances', the versions are listed by StoredTemplateRegistry. The JSON
+    files stay the source: a template whose file changed is imported into
+    the store again before it is served.
+
+    Keyword arguments:
+    store_path    -- path of the SQLite file of the store
+    templates_dir -- folder with the JSON templates
+    max_templates -- number of template records kept in memory
+    """
+
+    def __init__(self, store_path: str, templates_dir: str = r"./templates", max_templates: int = 256):
+        from template_store import TemplateStore
+        super().__init__(max_templates)
+        self.store: TemplateStore = TemplateStore(store_path, templates_dir, semver_key)
+
+    def _read(self, json_file: str, stat: os.stat_result) -> Tuple[dict, str]:
+        path: str = os.path.relpath(json_file, self.store.templates_dir)
+        stored: "StoredTemplate" = self.store.template(path)
+        if stored is None or (stored.mtime_ns, stored.size) != (stat.st_mtime_ns, stat.st_size):
+            invalid: Dict[str, str] = self.store.update([path])
+            stored = self.store.template(path)
+            if path in invalid:
+                raise ValueError("Template '" + json_file + "' cannot be imported: " + invalid[path])
+            if stored is None:
+                raise FileNotFoundError("Template '" + json_file + "' was removed while it was read")
+        return stored.fields, stored.sha1
+
+    def registry(self, templates_dir: str) -> "TemplateRegistry":
+        if os.path.abspath(templates_dir) != os.path.abspath(self.store.templates_dir):
+            raise LookupError("The template store '" + self.store.db_path + "' holds the templates of '" + self.store.templates_dir + "', not of '" + templates_dir + "'")
+        return StoredTemplateRegistry(self)
+
+# Template loader shared by all registries of this process
+_template_loader: TemplateLoader = None
+
+def get_template_loader() -> TemplateLoader:
+    """Return the template loader of this process"""
+    global _template_loader
+    if _template_loader is None:
+        _template_loader = TemplateLoader(disk_cache=TemplateDiskCache())
+    return _template_loader
+
+def set_template_loader(loader: TemplateLoader) -> None:
+    """Replace the template loader of this process, e.g. to use another cache folder"""
+    global _template_loader
+    _template_loader = loader
+    _template_registries.clear()
+
+class TemplateRegistry:
     """
-    Return requested element out of JSON file. The data are retrieved
-    from selected template of get_all_templates()
+    Index of all JSON templates, built once per process by a single walk of
+    the templates folder. Every template is registered under its '_name' and
+    its '_tags' (lower case), so looking up a family is a dict access:
+
+    1. exact key, e.g. 'eba' or the tag 'EBA'. A key of several templates
+       is ambiguous and raises an error
+    2. unique key prefix, e.g. 'acpr-c' for 'acpr-corep'. Ambiguous prefixes
+       raise an error instead of picking one of the matching templates.
+
+    Templates that cannot be read or parsed, or whose '_name' and '_tags'
+    cannot be keys, are left out with a warning, see --validate. Only a family whose file name matches such a template
+    fails, with the reason.
 
     Keyword arguments:
-    json_file -- path to the json file
-    elem_name -- name of the element to retrieve value
+    templates_dir -- folder with the JSON templates
+    loader        -- loader serving the parsed templates
     """
-    with open(json_file, "r") as data_file:
-        data: dict = json.load(data_file)
-        elemName: str
-        elemValue: str
-        for elemName, elemValue in data.items():
-            if elemName == elem_name:
-                return elemValue
+
+    def __init__(self, templates_dir: str = r"./templates", loader: "TemplateLoader" = None):
+        self.templates_dir: str = templates_dir
+        self.loader: TemplateLoader = loader or get_template_loader()
+        self._paths: Dict[str, set] = {}   # family key or alias -> template paths
+        self._names: List[str] = []
+        self._unreadable: Dict[str, str] = {} # file name without extension, lower case -> error
+        from template_store import family_keys
+        template_path: str
+        with _timings.stage("discover_templates"):
+            template_paths: list = get_all_templates(templates_dir)
+        for template_path in template_paths:
+            if not template_path.endswith(".json") or os.path.basename(template_path).startswith("."):
+                continue
+            try:
+                data: dict = self.loader.load(template_path).data
+                keys: List[str] = family_keys(data, template_path)
+            except (ValueError, OSError, TypeError) as e:
+                self._skip_unreadable(template_path, str(e))
+                continue
+            if data.get("_name"):
+                self._names.append(data["_name"])
+            key: str
+            for key in keys:
+                self._paths.setdefault(key, set()).add(template_path)
+        self._sorted_keys: List[str] = sorted(self._paths)
+
+    def families(self) -> List[str]:
+        """Return the '_name' of all registered templates that have one"""
+        return sorted(set(self._names))
+
+    def resolve(self, family: str) -> str:
+        """Return the template path of a family, see class docstring for the rules"""
+        key: str = family.lower()
+        matches: set = self._paths.get(key, set())
+        if not matches:
+            # keys sharing the prefix are adjacent in the sorted key list
+            first: int = bisect.bisect_left(self._sorted_keys, key)
+            for candidate in self._sorted_keys[first:]:
+                if not candidate.startswith(key):
+                    break
+                matches = matches | self._paths[candidate]
+        return self._pick(family, sorted(matches))
+
+    def _pick(self, family: str, paths: List[str]) -> str:
+        """Return the only template path matching a family, raise LookupError for none or several"""
+        if len(paths) == 1:
+            return paths[0]
+        if paths:
+            raise LookupError("Family '" + family + "' is ambiguous: " + ", ".join(paths))
+        key: str = family.lower()
+        if key in self._unreadable:
+            raise LookupError("Template of family '" + family + "' cannot be read: " + self._unreadable[key])
+        raise LookupError("No template found for family '" + family + "' in '" + self.templates_dir + "'")
+
+    def _skip_unreadable(self, template_path: str, error: str) -> None:
+        """Leave out a template that cannot be read, with a warning. Requesting its family fails with the error"""
+        print(colored("WARNING: skipped unreadable template " + template_path + ": " + error, 'yellow'))
+        self._unreadable[os.path.splitext(os.path.basename(template_path))[0].lower()] = template_path + ": " + error
+
+    def template(self, family: str) -> "TemplateRecord":
+        """Return the parsed template of a family"""
+        return self.loader.load(self.resolve(family))
+
+    def versions(self, family: str, since: str = None) -> List[str]:
+        """
+        Return the versions in the 'instances' of the template of a family,
+        in template order. A version is the 'major_version' of its instance,
+        the version the approvals are requested with, e.g. '3.1 Phase 2' for eba.
+        Instances without a '_semver' and a 'major_version' are left out
+        with a warning, as by the template store.
+
+        Keyword arguments:
+        family -- the taxonomy's family name
+        since  -- only versions whose '_semver' is this one or newer. E.g. 3.0 or 3.0.0
+        """
+        from template_store import version_rows
+        template: TemplateRecord = self.template(family)
+        rows, skipped = version_rows(template.path, template.get("instances"), semver_key)
+        self._skip_versions(template.path, skipped)
+        if not rows:
+            raise LookupError("template '{}' lists no versions (instances)".format(template.path))
+        since_key: Tuple[int, ...] = semver_key(since) if since else ()
+        return [version for _, _, version, semver in rows if semver_key(semver) >= since_key]
+
+    def _skip_versions(self, template_path: str, positions: List[int]) -> None:
+        """Warn about the instances of a template left out as versions, see template_store.version_rows()"""
+        if positions:
+            print(colored("WARNING: skipped versions without '_semver' or 'major_version' in " + template_path + ": "
+                          + ", ".join("instances[{}]".format(position) for position in positions), 'yellow'))
+
+class StoredTemplateRegistry(TemplateRegistry):
+    """
+    Registry of the templates in the SQLite template store. Building it
+    imports the changed templates of the folder into the store, without
+    parsing the others. Families are looked up with the same rules as
+    TemplateRegistry, by queries of the family key index, and versions by
+    the version rows of the template, so neither loads all keys nor any
+    template. Templates the import leaves out are reported like unreadable
+    JSON templates.
+
+    Keyword arguments:
+    loader -- loader serving the templates of the store
+    """
+
+    def __init__(self, loader: StoredTemplateLoader):
+        self.templates_dir: str = loader.store.templates_dir
+        self.loader: StoredTemplateLoader = loader
+        self._unreadable: Dict[str, str] = {}
+        with _timings.stage("discover_templates"):
+            stats: "ImportStats" = loader.store.sync()
+        path: str
+        for path, error in sorted(stats.invalid.items()):
+            self._skip_unreadable(os.path.join(self.templates_dir, path), error)
+        for path, positions in sorted(stats.skipped_versions.items()):
+            self._skip_versions(os.path.join(self.templates_dir, path), positions)
+
+    def families(self) -> List[str]:
+        return self.loader.store.names()
+
+    def resolve(self, family: str) -> str:
+        key: str = family.lower()
+        paths: List[str] = self.loader.store.paths_of_key(key) or self.loader.store.paths_of_prefix(key)
+        return self._pick(family, sorted(os.path.join(self.templates_dir, path) for path in paths))
+
+    def versions(self, family: str, since: str = None) -> List[str]:
+        template_path: str = self.resolve(family)
+        path: str = os.path.relpath(template_path, self.templates_dir)
+        versions: List[str] = self.loader.store.versions(path, semver_key(since) if since else None)
+        if not versions and not (since and self.loader.store.versions(path)):
+            raise LookupError("template '{}' lists no versions (instances)".format(template_path))
+        return versions
+
+# Registries already built in this process, by templates folder
+_template_registries: Dict[str, TemplateRegistry] = {}
+
+def get_template_registry(templates_dir: str = r"./templates") -> TemplateRegistry:
+    """Return the template registry of a folder, building it on first use only"""
+    if templates_dir not in _template_registries:
+        _template_registries[templates_dir] = get_template_loader().registry(templates_dir)
+    return _template_registries[templates_dir]
+
+# ----------------------------------------------------------------------------------------------------------------------
+# Template search
+# ----------------------------------------------------------------------------------------------------------------------
+
+# Template fields of the search index. 'provider' is derived: host of the homepage
+SEARCH_FIELDS: Tuple[str, ...] = ("_tags", "_name", "lictype", "licweb", "homepage", "swname", "provider")
+
+# Short names of search fields accepted in queries
+SEARCH_ALIASES: Dict[str, str] = {"tag": "_tags", "name": "_name", "license": "lictype"}
+
+# File of the search index, inside the templates folder. Hidden, so it is no template.
+# JSON, as the folder is shared: the file can only hold data, see parse_search_index()
+SEARCH_INDEX_FILE: str = ".search-index.json"
+
+# Format of the search index file, an index of another format is built again
+SEARCH_INDEX_VERSION: int = 2
+
+def normalize_search_term(value: str) -> str:
+    """Return the indexed form of a field value: lower case, URLs without scheme and trailing '/'"""
+    term: str = value.strip().lower()
+    term = re.sub(r"^https?://", "", term)
+    return term.rstrip("/")
+
+def template_search_terms(data: dict) -> Dict[str, List[str]]:
+    """Return the normalized terms of every search field of a template"""
+    terms: Dict[str, List[str]] = {}
+    field: str
+    for field in SEARCH_FIELDS[:-1]:
+        values: Any = data.get(field)
+        values = values if isinstance(values, list) else [values]
+        terms[field] = sorted({normalize_search_term(value) for value in values if isinstance(value, str) and value.strip()})
+    homepage: str = data.get("homepage") if isinstance(data.get("homepage"), str) else ""
+    host: str = normalize_search_term(homepage).split("/")[0]
+    terms["provider"] = [host[4:] if host.startswith("www.") else host] if host else []
+    return terms
+
+class TemplateSearchIndex:
+    """
+    Inverted index of the search fields of all templates of a folder: field
+    -> term -> template paths. It is kept in the templates folder and
+    brought up to date on load: only templates whose modification time or
+    size changed are read again, removed templates are dropped, templates
+    that cannot be read are left out with a warning. An index file that
+    fails the checks of parse_search_index() is built again. A query is a
+    few dict lookups, no template is opened.
+
+    Keyword arguments:
+    templates_dir -- folder with the JSON templates
+    loader        -- loader reading changed templates
+    """
+
+    def __init__(self, templates_dir: str = r"./templates", loader: "TemplateLoader" = None):
+        self.templates_dir: str = templates_dir
+        self.index_path: str = os.path.join(templates_dir, SEARCH_INDEX_FILE)
+        self.loader: TemplateLoader = loader or get_template_loader()
+        self.files: Dict[str, tuple] = {}                 # path relative to the folder -> (mtime_ns, size, name)
+        self.postings: Dict[str, Dict[str, set]] = {field: {} for field in SEARCH_FIELDS}
+        self._sorted_terms: Dict[str, List[str]] = {}     # field -> sorted terms, for prefix queries
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as index_file:
+                self.files, self.postings = parse_search_index(json.load(index_file))
+        except (OSError, ValueError):
+            pass # no, broken or foreign index, it is built again
+
+    def refresh(self) -> int:
+        """Update the index for added, changed and removed templates and save it. Return the number of updated templates"""
+        from template_store import family_keys, scan_templates
+        current: Dict[str, Tuple[int, int]] = scan_templates(self.templates_dir)
+        stale: set = {path for path, entry in self.files.items() if current.get(path) != entry[:2]}
+        if stale:
+            self._remove(stale)
+        added: List[str] = [path for path in current if path not in self.files]
+        path: str
+        for path in added:
+            try:
+                data: dict = self.loader.load(os.path.join(self.templates_dir, path)).data
+                family_keys(data, path)
+            except (ValueError, OSError, TypeError) as e:
+                # left out of the index, so it is read again on the next refresh
+                print(colored("WARNING: skipped unreadable template " + os.path.join(self.templates_dir, path) + ": " + str(e), 'yellow'))
+                continue
+            self.files[path] = current[path] + (data.get("_name") or os.path.splitext(os.path.basename(path))[0],)
+            for field, terms in template_search_terms(data).items():
+                for term in terms:
+                    self.postings[field].setdefault(term, set()).add(path)
+        if stale or added:
+            self._sorted_terms.clear()
+            self.save()
+        return len(stale | set(added))
+
+    def search(self, query: List[Tuple[str, str]]) -> List[str]:
+        """
+        Return the relative paths of the templates matching all conditions of
+        a query, sorted. A condition is (field, term): field None matches any
+        search field, a term ending in '*' matches by prefix.
+        """
+        matches: set = None
+        field: str
+        for field, term in query:
+            paths: set = set()
+            for search_field in SEARCH_FIELDS if field is None else [field]:
+                postings: Dict[str, set] = self.postings[search_field]
+                if not term.endswith("*"):
+                    paths |= postings.get(term, set())
+                    continue
+                if search_field not in self._sorted_terms:
+                    self._sorted_terms[search_field] = sorted(postings)
+                sorted_terms: List[str] = self._sorted_terms[search_field]
+                # terms sharing the prefix are adjacent in the sorted term list
+                for candidate in sorted_terms[bisect.bisect_left(sorted_terms, term[:-1]):]:
+                    if not candidate.startswith(term[:-1]):
+                        break
+                    paths |= postings[candidate]
+            matches = paths if matches is None else matches & paths
+        return sorted(matches or ())
+
+    def save(self) -> None:
+        """Write the index under a temporary name first, so readers never see a partial file"""
+        tmp_path: str = self.index_path + "." + str(os.getpid())
+        with open(tmp_path, "w", encoding="utf-8") as index_file:
+            json.dump({"version": SEARCH_INDEX_VERSION, "files": self.files,
+                       "postings": {field: {term: sorted(paths) for term, paths in postings.items()} for field, postings in self.postings.items()}}, index_file)
+        os.replace(tmp_path, self.index_path)
+
+    def _remove(self, paths: set) -> None:
+        """Drop templates from the index. The old terms are not kept, so all postings are checked in one pass"""
+        path: str
+        for path in paths:
+            del self.files[path]
+        field: str
+        for field, postings in self.postings.items():
+            for term in [term for term, term_paths in postings.items() if not term_paths.isdisjoint(paths)]:
+                postings[term] -= paths
+                if not postings[term]:
+                    del postings[term]
+
+def parse_search_index(index: Any) -> Tuple[Dict[str, tuple], Dict[str, Dict[str, set]]]:
+    """
+    Return files and postings of a search index file read as JSON. Anyone
+    writing templates can write the file, so it is checked as a whole:
+    format version, file entries (mtime_ns, size, name) and postings of
+    every search field pointing to indexed files only. Raise ValueError
+    for anything else.
+    """
+    try:
+        if index["version"] != SEARCH_INDEX_VERSION:
+            raise ValueError("search index of format {}, not {}".format(index["version"], SEARCH_INDEX_VERSION))
+        files: Dict[str, tuple] = {path: tuple(entry) for path, entry in index["files"].items()}
+        postings: Dict[str, Dict[str, set]] = {field: {term: set(paths) for term, paths in index["postings"][field].items()} for field in SEARCH_FIELDS}
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError("broken search index: " + repr(e))
+    entry: tuple
+    for entry in files.values():
+        if not (len(entry) == 3 and all(type(number) is int for number in entry[:2]) and isinstance(entry[2], str)):
+            raise ValueError("broken search index entry: " + repr(entry))
+    field: str
+    for field, field_postings in postings.items():
+        if not all(paths <= files.keys() for paths in field_postings.values()):
+            raise ValueError("search index field '{}' lists files that are not indexed".format(field))
+    return files, postings
+
+def parse_search_query(conditions: List[str]) -> List[Tuple[str, str]]:
+    """
+    Return the (field, term) conditions of a search query given as
+    'FIELD=VALUE' or 'VALUE' (any field). E.g. ['lictype=CC-BY-4.0', 'tag=dnb*']
+
+    Keyword arguments:
+    conditions -- conditions as given on the command line
+    """
+    query: List[Tuple[str, str]] = []
+    condition: str
+    for condition in conditions:
+        field, separator, value = condition.partition("=")
+        if not separator:
+            field, value = None, condition
+        else:
+            field = SEARCH_ALIASES.get(field.strip().lower(), field.strip().lower())
+            if field not in SEARCH_FIELDS:
+                raise LookupError("Unknown search field '{}', use one of: {}".format(field, ", ".join(list(SEARCH_FIELDS) + list(SEARCH_ALIASES))))
+        query.append((field, normalize_search_term(value)))
+    return query
+
+def print_search_results(templates_dir: str, conditions: List[str]) -> None:
+    """Print name and path of the templates matching a search query, plus the time to update the index and to query it"""
+    refresh_start: float = time.perf_counter()
+    index: TemplateSearchIndex = TemplateSearchIndex(templates_dir)
+    updated: int = index.refresh()
+    query_start: float = time.perf_counter()
+    paths: List[str] = index.search(parse_search_query(conditions))
+    query_seconds: float = time.perf_counter() - query_start
+    path: str
+    for path in paths:
+        print(index.files[path][2] + "  " + colored(os.path.join(templates_dir, path), 'yellow'))
+    print("{} of {} templates match, query {:.3f} ms (index load and update of {} templates {:.1f} ms)".format(
+        len(paths), len(index.files), query_seconds * 1000, updated, (query_start - refresh_start) * 1000))
 
 def set_paragraph(header_table: Any, row_num: int, cell_num: int, para_num: int) -> Paragraph:
     """Return a paragraph in a table cell
@@ -556,6 +2802,7 @@ def set_title(doc: Document, format: ParagraphFormat, text: str, boldness: bool,
     boldness  -- set boldness of text
     font_size -- set font size for the text
     """
+    from docx.shared import Pt
     title_main_obj: Paragraph = doc.add_paragraph()
     title_main_obj.paragraph_format.alignment = format
     run_main_title: Run = title_main_obj.add_run(text)
@@ -571,6 +2818,7 @@ def set_meta_section_table_cell_width(doc_info_section: Any, colum_num: int, inc
     column_int       -- coumn number in table
     inche_num        -- column width
     """
+    from docx.shared import Inches
     cell: _Cell
     all_cells_info_sec: Tuple[_Cell, _Cell, _Cell] = doc_info_section.columns[colum_num].cells 
     for cell in all_cells_info_sec:
@@ -600,6 +2848,7 @@ def set_main_section_paragraph(main_table, row_num: int, cell_num: int, text: st
 
 def set_footer(footer, row_num: int, text: str, font_size: int) -> Paragraph:
     """Returns footer with text and styling"""
+    from docx.shared import Pt
     footer_para: Paragraph = footer.paragraphs[row_num].add_run(text)
     footer_para.font.size = Pt(font_size)
     return footer_para
@@ -615,6 +2864,7 @@ def set_additional_comment(
     italic_value: bool,
     bold_value: bool) -> Paragraph:
     """Returns footer with text and styling"""
+    from docx.shared import Pt, RGBColor
     additional_comment_obj: Paragraph = doc.add_paragraph()
     additional_comment_obj.paragraph_format.alignment = alignment
     run_main_title: Run = additional_comment_obj.add_run(comment)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Fast DOCX backend for the license approval generation.
+
+The backend bypasses the python-docx object model. It takes the document
+skeleton once, with slot markers in all variable places, and splits its
+'word/document.xml' into precompiled XML fragments. Every approval is then
+written by joining those fragments with the escaped XML of the variable
+parts, and by appending 'word/document.xml' plus its relationships to a
+zip that already holds all static parts (styles, header, footer, logo ...)
+in compressed form.
+
+The content of an approval is passed as 'ApprovalContent' of
+gen_lic_approval.py. The XML written for it is the same python-docx writes
+for that content, so both backends produce equivalent documents. Text
+XML does not allow (control characters besides tab and line breaks) is
+rejected with the ValueError python-docx raises for it.
+
+For reproducible output (date_time given) every zip entry gets the same
+fixed time and attributes, the static parts are stored in a fixed order,
+and hyperlinks get relationship ids derived from their URL, so identical
+content gives byte-identical files.
+"""
+
+import hashlib
+import io
+import re
+import zipfile
+from typing                   import Any, Dict, List, Tuple
+from xml.sax.saxutils         import escape, quoteattr
+
+# Slot marker put into the skeleton text for every variable part
+SLOT_MARKER: str = "@@SLOT:{}@@"
+
+# Slot of the submission date run in the meta info section
+DATE_SLOT: str = "date"
+
+# Slot of all paragraphs below 'ADDITIONAL COMMENTS'
+COMMENTS_SLOT: str = "comments"
+
+# Characters XML 1.0 does not allow in text. python-docx (lxml) rejects them
+XML_ILLEGAL_CHARS: re.Pattern = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+# Relationship type of hyperlinks created by add_hyperlink()
+RT_HYPERLINK: str = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"
+
+DOCUMENT_PART: str = "word/document.xml"
+DOCUMENT_RELS_PART: str = "word/_rels/document.xml.rels"
+CONTENT_TYPES_PART: str = "[Content_Types].xml"
+
+def part_order(name: str) -> Tuple[bool, str]:
+    """Sort key of the parts of a reproducible package: content types first, then by name"""
+    return name != CONTENT_TYPES_PART, name
+
+def reproducible_zip_info(name: str, date_time: Tuple[int, ...]) -> zipfile.ZipInfo:
+    """Return the zip entry of a part with fixed time and attributes, independent of the platform"""
+    info: zipfile.ZipInfo = zipfile.ZipInfo(name, date_time)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    info.create_system = 0
+    info.external_attr = 0
+    return info
+
+def stable_rel_id(url: str) -> str:
+    """Return a relationship id derived from a hyperlink URL: the same URL gets the same id in every document"""
+    return "rIdL" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+
+def slot(name: str) -> str:
+    """Return the marker text of a slot"""
+    return SLOT_MARKER.format(name)
+
+def cell_slot(row_num: int) -> str:
+    """Return the slot name of the value cell of a main section row"""
+    return "cell" + str(row_num)
+
+class FastApprovalWriter:
+    """
+    Writes license approvals as DOCX bytes from precompiled XML fragments.
+
+    Keyword arguments:
+    slotted_skeleton -- DOCX bytes of the skeleton with the text of every
+                        variable run replaced by slot(...) and a single
+                        paragraph with slot(COMMENTS_SLOT) as comments
+    date_time        -- zip time of all parts for reproducible output, see
+                        module docstring. None keeps the times of the skeleton
+    """
+
+    def __init__(self, slotted_skeleton: bytes, date_time: Tuple[int, ...] = None):
+        skeleton_zip: zipfile.ZipFile = zipfile.ZipFile(io.BytesIO(slotted_skeleton))
+        document_xml: str = skeleton_zip.read(DOCUMENT_PART).decode("utf-8")
+        rels_xml: str = skeleton_zip.read(DOCUMENT_RELS_PART).decode("utf-8")
+
+        # the comments slot replaces its whole paragraph, all other slots one run
+        marker_prefix, marker_suffix = (re.escape(part) for part in SLOT_MARKER.split("{}"))
+        slot_pattern: str = ("<w:p>(?:(?!<w:p>).)*?" + marker_prefix + "(" + COMMENTS_SLOT + ")" + marker_suffix + ".*?</w:p>"
+                             + "|<w:r><w:t>" + marker_prefix + r"(\w+)" + marker_suffix + "</w:t></w:r>")
+        parts: List[str] = re.split(slot_pattern, document_xml, flags=re.DOTALL)
+        # re.split yields text, group 1, group 2, text, ... - exactly one group is set per slot
+        self._fragments: List[str] = parts[0::3]
+        self._slots: List[str] = [comments or run for comments, run in zip(parts[1::3], parts[2::3])]
+
+        self._rels_head, self._rels_tail = rels_xml.rsplit("</Relationships>", 1)
+        # None: ids derived from the URL, see stable_rel_id()
+        self._next_rel_num: int = None if date_time else max(int(rel_id) for rel_id in re.findall(r'Id="rId(\d+)"', rels_xml)) + 1
+        self._date_time: Tuple[int, ...] = date_time
+
+        # all static parts are compressed once, approvals append the document part only
+        static_zip: io.BytesIO = io.BytesIO()
+        with zipfile.ZipFile(static_zip, "w", zipfile.ZIP_DEFLATED) as approval_zip:
+            infos: List[zipfile.ZipInfo] = skeleton_zip.infolist()
+            if date_time:
+                infos = [reproducible_zip_info(info.filename, date_time) for info in sorted(infos, key=lambda info: part_order(info.filename))]
+            info: zipfile.ZipInfo
+            for info in infos:
+                if info.filename not in (DOCUMENT_PART, DOCUMENT_RELS_PART):
+                    approval_zip.writestr(info, skeleton_zip.read(info.filename))
+        self._static_zip: bytes = static_zip.getvalue()
+
+    def render(self, content) -> bytes:
+        """Return the DOCX bytes of a license approval
+
+        Keyword arguments:
+        content -- ApprovalContent of the approval
+        """
+        hyperlinks: List[str] = []
+        slot_xml: Dict[str, str] = {DATE_SLOT: run_xml(content.submission_date)}
+        row_num: int
+        for row_num, segments in content.cells.items():
+            slot_xml[cell_slot(row_num)] = "".join(segment_xml(segment, hyperlinks, self._next_rel_num) for segment in segments)
+        slot_xml[COMMENTS_SLOT] = "".join(comment_xml(comment, hyperlinks, self._next_rel_num) for comment in content.comments)
+
+        document: List[str] = [self._fragments[0]]
+        slot_name: str
+        for slot_name, fragment in zip(self._slots, self._fragments[1:]):
+            document.append(slot_xml[slot_name])
+            document.append(fragment)
+
+        approval: io.BytesIO = io.BytesIO(self._static_zip)
+        with zipfile.ZipFile(approval, "a", zipfile.ZIP_DEFLATED) as approval_zip:
+            approval_zip.writestr(self._zip_info(DOCUMENT_PART), "".join(document))
+            approval_zip.writestr(self._zip_info(DOCUMENT_RELS_PART), self._rels_head + "".join(hyperlinks) + "</Relationships>" + self._rels_tail)
+        return approval.getvalue()
+
+    def _zip_info(self, name: str) -> Any:
+        """Return the zip entry of a part written per approval, or just its name to use the current time"""
+        return reproducible_zip_info(name, self._date_time) if self._date_time else name
+
+def check_xml_text(text: str) -> str:
+    """Return the text, raise ValueError like python-docx if it holds characters XML does not allow"""
+    if XML_ILLEGAL_CHARS.search(text):
+        raise ValueError("All strings must be XML compatible: Unicode or ASCII, no NULL bytes or control characters")
+    return text
+
+def text_xml(text: str) -> str:
+    """Return the run content of a text the way python-docx writes it: tabs and line breaks become elements"""
+    check_xml_text(text)
+    chunks: List[str] = []
+    t: str
+    for t in re.split(r"(\t|\r\n|\n|\r)", text):
+        if t == "\t":
+            chunks.append("<w:tab/>")
+        elif t in ("\n", "\r", "\r\n"):
+            # python-docx writes one break per character
+            chunks.append("<w:br/>" * len(t))
+        elif t:
+            space: str = ' xml:space="preserve"' if t != t.strip() else ""
+            chunks.append("<w:t" + space + ">" + escape(t) + "</w:t>")
+    return "".join(chunks)
+
+def run_xml(text: str, run_properties: str = "") -> str:
+    """Return a run with text"""
+    if not run_properties and not text:
+        return "<w:r/>"
+    return "<w:r>" + run_properties + text_xml(text) + "</w:r>"
+
+def hyperlink_xml(url: str, text: str, hyperlinks: List[str], first_rel_num: int) -> str:
+    """
+    Return the run add_hyperlink() creates and register its relationship in
+    hyperlinks. A URL linked twice gets one relationship, like python-docx
+    relates it. With first_rel_num None the id is derived from the URL,
+    otherwise the relationships are numbered from first_rel_num on.
+    """
+    target: str = " Target=" + quoteattr(check_xml_text(url)) + ' TargetMode="External"/>'
+    rel_num: int = next((i for i, relationship in enumerate(hyperlinks) if relationship.endswith(target)), len(hyperlinks))
+    rel_id: str = stable_rel_id(url) if first_rel_num is None else "rId" + str(first_rel_num + rel_num)
+    if rel_num == len(hyperlinks):
+        hyperlinks.append('<Relationship Id="' + rel_id + '" Type="' + RT_HYPERLINK + '"' + target)
+    return ('<w:r><w:rPr><w:color w:val="000000" w:themeColor="hyperlink"/><w:u w:val="single"/></w:rPr>'
+            + '<w:hyperlink r:id="' + rel_id + '" w:history="1">'
+            + run_xml(text, '<w:rPr><w:rStyle w:val="Hyperlink"/></w:rPr>')
+            + '</w:hyperlink></w:r>')
+
+def segment_xml(segment, hyperlinks: List[str], first_rel_num: int) -> str:
+    """Return a run for a text segment or a hyperlink segment"""
+    if segment.url is None:
+        return run_xml(segment.text)
+    return hyperlink_xml(segment.url, segment.text, hyperlinks, first_rel_num)
+
+def comment_xml(comment, hyperlinks: List[str], first_rel_num: int) -> str:
+    """Return the paragraph set_additional_comment() creates, plus its optional hyperlink"""
+    run_properties: str = '<w:rPr><w:b w:val="0"/><w:i/><w:color w:val="525252"/><w:sz w:val="' + str(comment.font_size * 2) + '"/></w:rPr>'
+    link: str = hyperlink_xml(comment.link.url, comment.link.text, hyperlinks, first_rel_num) if comment.link else ""
+    return '<w:p><w:pPr><w:jc w:val="left"/></w:pPr>' + run_xml(comment.text, run_properties) + link + "</w:p>"
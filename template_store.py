@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""SQLite store of the JSON templates of the license approval generation.
+
+The JSON files in the templates folder stay the source format. The store
+is a read path built from them: one bulk import parses every template
+once, later imports parse only templates whose modification time or size
+changed and drop removed ones. Templates that cannot be parsed are left
+out and reported by the import. Versions without a '_semver' and a
+'major_version' are left out as well, their template is kept and the
+import reports their positions, see version_rows(). Looking up a family
+(index of family_keys), listing the versions of a template (primary key of
+versions) and finding the templates of a version (index versions_by_version)
+are indexed queries, so none walks the folder or parses a template.
+
+A stored template holds the fields a form is rendered from. Arrays of
+objects, e.g. 'instances' (the versions) or 'entrypointGroups', are left
+out of its fields: the versions are kept in their own table, the rest is
+only in the JSON file.
+
+The store does not know how templates are rendered or versions compare,
+see StoredTemplateLoader and StoredTemplateRegistry of gen_lic_approval.py.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing                   import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Layout version of the store, a store of another version or folder is imported again
+STORE_VERSION: int = 4
+
+# Template field listing the versions, one object per version
+VERSIONS_FIELD: str = "instances"
+
+# Tables of the store, one row per template, family key and version
+STORE_SCHEMA: str = """
+CREATE TABLE store_info (
+    templates_dir TEXT NOT NULL  -- absolute path of the folder the templates are imported from
+);
+CREATE TABLE templates (
+    path     TEXT PRIMARY KEY,   -- relative to the templates folder
+    name     TEXT NOT NULL,      -- '_name' of the template
+    mtime_ns INTEGER NOT NULL,   -- file state when imported
+    size     INTEGER NOT NULL,
+    sha1     TEXT NOT NULL,      -- hash of the file content
+    fields   TEXT NOT NULL       -- JSON of the template without arrays of objects
+);
+CREATE TABLE family_keys (
+    key  TEXT NOT NULL,          -- '_name' (or file name) and '_tags', lower case
+    path TEXT NOT NULL,
+    PRIMARY KEY (key, path)
+) WITHOUT ROWID;
+CREATE TABLE versions (
+    path     TEXT NOT NULL,
+    position INTEGER NOT NULL,   -- order in the template
+    version  TEXT NOT NULL,      -- 'major_version', the version approvals are requested with
+    semver   TEXT NOT NULL,      -- '_semver', compared with the semver_key of the store
+    PRIMARY KEY (path, position)
+) WITHOUT ROWID;
+CREATE INDEX versions_by_version ON versions (version, path);
+"""
+
+def scan_templates(templates_dir: str) -> Dict[str, Tuple[int, int]]:
+    """Return (modification time, size) of every template of a folder and its subfolders, by path relative to the folder"""
+    current: Dict[str, Tuple[int, int]] = {}
+    folders: List[str] = [""]
+    while folders:
+        folder: str = folders.pop()
+        with os.scandir(os.path.join(templates_dir, folder)) as entries:
+            entry: os.DirEntry
+            for entry in entries:
+                path: str = os.path.join(folder, entry.name) if folder else entry.name
+                if entry.is_dir():
+                    folders.append(path)
+                elif entry.name.endswith(".json") and not entry.name.startswith("."):
+                    stat: os.stat_result = entry.stat()
+                    current[path] = (stat.st_mtime_ns, stat.st_size)
+    return current
+
+def family_keys(data: Any, path: str) -> List[str]:
+    """
+    Return the family keys of a parsed template, lower case: its '_name' (or
+    the file name without extension) and its '_tags'. Raise TypeError for a
+    template that is no object, a '_name' that is no string or '_tags' that
+    are no list of strings.
+    """
+    if not isinstance(data, dict):
+        raise TypeError("template is a JSON {}, not an object".format(type(data).__name__))
+    name: Any = data.get("_name")
+    tags: Any = data.get("_tags", [])
+    if not isinstance(name, (str, type(None))):
+        raise TypeError("'_name' is no string: " + repr(name))
+    if not (isinstance(tags, list) and all(isinstance(tag, str) for tag in tags)):
+        raise TypeError("'_tags' is no list of strings: " + repr(tags))
+    return [key.lower() for key in [name or os.path.splitext(os.path.basename(path))[0]] + tags]
+
+def version_rows(path: str, instances: Any, semver_key: Callable[[str], Tuple[int, ...]]) -> Tuple[List[tuple], List[int]]:
+    """
+    Return the rows of the versions table of a template's 'instances' plus
+    the positions of the instances left out: those that are no object or
+    lack a '_semver' or 'major_version' string the semver_key accepts.
+    """
+    rows: List[tuple] = []
+    skipped: List[int] = []
+    position: int
+    for position, instance in enumerate(instances or []):
+        try:
+            if not (isinstance(instance["major_version"], str) and isinstance(instance["_semver"], str)):
+                raise TypeError
+            semver_key(instance["_semver"])
+        except (ValueError, KeyError, TypeError):
+            skipped.append(position)
+            continue
+        rows.append((path, position, instance["major_version"], instance["_semver"]))
+    return rows, skipped
+
+class StoredTemplate(NamedTuple):
+    """File state and fields of a stored template"""
+    mtime_ns: int
+    size: int
+    sha1: str
+    fields: dict
+
+class ImportStats(NamedTuple):
+    """Number of templates an import added, updated, removed and left unchanged, plus the templates and versions it left out"""
+    added: int
+    updated: int
+    removed: int
+    unchanged: int
+    invalid: Dict[str, str]                 # path -> why the template cannot be imported
+    skipped_versions: Dict[str, List[int]]  # path -> positions of the instances left out, see version_rows()
+
+class TemplateStore:
+    """
+    SQLite store of the templates of one folder, see module docstring. The
+    store can be shared by threads.
+
+    Keyword arguments:
+    db_path       -- path of the SQLite file, created on first use
+    templates_dir -- folder with the JSON templates
+    semver_key    -- returns the comparable numbers of a '_semver', at least 3
+    """
+
+    def __init__(self, db_path: str, templates_dir: str, semver_key: Callable[[str], Tuple[int, ...]]):
+        self.db_path: str = db_path
+        self.templates_dir: str = templates_dir
+        self.semver_key: Callable[[str], Tuple[int, ...]] = semver_key
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._connection: sqlite3.Connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock: threading.Lock = threading.Lock()
+        # worker processes read while the parent may import
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        folder: str = os.path.abspath(templates_dir)
+        if self._connection.execute("PRAGMA user_version").fetchone()[0] != STORE_VERSION or self._stored_folder() != folder:
+            with self._connection:
+                for table in ("store_info", "templates", "family_keys", "versions"):
+                    self._connection.execute("DROP TABLE IF EXISTS " + table)
+                self._connection.executescript(STORE_SCHEMA)
+                self._connection.execute("INSERT INTO store_info VALUES (?)", (folder,))
+                self._connection.execute("PRAGMA user_version = {}".format(STORE_VERSION))
+
+    def sync(self) -> ImportStats:
+        """Import added and changed templates of the folder and drop removed ones, in one transaction"""
+        current: Dict[str, Tuple[int, int]] = scan_templates(self.templates_dir)
+        with self._lock:
+            stored: Dict[str, Tuple[int, int]] = {path: (mtime_ns, size) for path, mtime_ns, size in
+                                                  self._connection.execute("SELECT path, mtime_ns, size FROM templates")}
+        changed: List[str] = [path for path, state in current.items() if stored.get(path) != state]
+        removed: List[str] = [path for path in stored if path not in current]
+        skipped_versions: Dict[str, List[int]] = {}
+        invalid: Dict[str, str] = self.update(changed + removed, skipped_versions)
+        added: int = sum(1 for path in changed if path not in stored and path not in invalid)
+        updated: int = sum(1 for path in changed if path in stored and path not in invalid)
+        return ImportStats(added, updated, len(removed), len(current) - len(changed), invalid, skipped_versions)
+
+    def update(self, paths: Iterable[str], skipped_versions: Dict[str, List[int]] = None) -> Dict[str, str]:
+        """
+        Import templates again by path relative to the folder, in one
+        transaction. Missing files are dropped, so are templates that cannot
+        be parsed: return why, by path. The positions of versions left out
+        are added to skipped_versions, by path, if given.
+        """
+        paths = list(paths)
+        template_rows: List[tuple] = []
+        key_rows: List[tuple] = []
+        all_version_rows: List[tuple] = []
+        invalid: Dict[str, str] = {}
+        path: str
+        for path in paths:
+            try:
+                with open(os.path.join(self.templates_dir, path), "rb") as data_file:
+                    stat: os.stat_result = os.fstat(data_file.fileno())
+                    content: bytes = data_file.read()
+                data: dict = json.loads(content)
+                keys: List[str] = family_keys(data, path)
+                versions, skipped = version_rows(path, data.get(VERSIONS_FIELD), self.semver_key)
+            except FileNotFoundError:
+                continue
+            except (ValueError, OSError, TypeError) as e:
+                invalid[path] = str(e) if isinstance(e, (ValueError, OSError)) else repr(e)
+                continue
+            name: str = data.get("_name", "")
+            fields: dict = {field: value for field, value in data.items()
+                            if not (isinstance(value, list) and any(isinstance(item, dict) for item in value))}
+            template_rows.append((path, name, stat.st_mtime_ns, stat.st_size, hashlib.sha1(content).hexdigest(), json.dumps(fields)))
+            key_rows.extend((key, path) for key in set(keys))
+            all_version_rows.extend(versions)
+            if skipped and skipped_versions is not None:
+                skipped_versions[path] = skipped
+        with self._lock, self._connection:
+            deleted: List[tuple] = [(path,) for path in paths]
+            for table in ("templates", "family_keys", "versions"):
+                self._connection.executemany("DELETE FROM " + table + " WHERE path = ?", deleted)
+            self._connection.executemany("INSERT INTO templates VALUES (?, ?, ?, ?, ?, ?)", template_rows)
+            self._connection.executemany("INSERT INTO family_keys VALUES (?, ?)", key_rows)
+            self._connection.executemany("INSERT INTO versions VALUES (?, ?, ?, ?)", all_version_rows)
+        return invalid
+
+    def template(self, path: str) -> Optional[StoredTemplate]:
+        """Return a stored template by path relative to the folder, None if it is not stored"""
+        with self._lock:
+            row: tuple = self._connection.execute("SELECT mtime_ns, size, sha1, fields FROM templates WHERE path = ?", (path,)).fetchone()
+        return StoredTemplate(row[0], row[1], row[2], json.loads(row[3])) if row else None
+
+    def names(self) -> List[str]:
+        """Return the '_name' of all templates that have one, sorted, without duplicates"""
+        with self._lock:
+            return [name for name, in self._connection.execute("SELECT DISTINCT name FROM templates WHERE name != '' ORDER BY name")]
+
+    def paths_of_key(self, key: str) -> List[str]:
+        """Return the paths of the templates registered under a family key, sorted"""
+        with self._lock:
+            return [path for path, in self._connection.execute("SELECT path FROM family_keys WHERE key = ? ORDER BY path", (key,))]
+
+    def paths_of_prefix(self, prefix: str) -> List[str]:
+        """Return the paths of the templates with a family key starting with the prefix, sorted"""
+        with self._lock:
+            # keys sharing the prefix are a range of the key index
+            return [path for path, in self._connection.execute(
+                "SELECT DISTINCT path FROM family_keys WHERE key >= ? AND key < ? ORDER BY path", (prefix, prefix + "\U0010ffff"))]
+
+    def versions(self, path: str, since: Tuple[int, ...] = None) -> List[str]:
+        """Return the versions of a template in template order, only those whose semver_key is since or newer if given"""
+        with self._lock:
+            rows: List[tuple] = self._connection.execute("SELECT version, semver FROM versions WHERE path = ? ORDER BY position", (path,)).fetchall()
+        # all parts of the versions count, as for the JSON templates
+        return [version for version, semver in rows if since is None or self.semver_key(semver) >= since]
+
+    def paths_of_version(self, version: str) -> List[str]:
+        """Return the paths of the templates listing a version ('major_version'), sorted"""
+        with self._lock:
+            return [path for path, in self._connection.execute("SELECT DISTINCT path FROM versions WHERE version = ? ORDER BY path", (version,))]
+
+    def close(self) -> None:
+        """Close the database"""
+        self._connection.close()
+
+    def _stored_folder(self) -> str:
+        """Return the folder the store was imported from, None for a new store"""
+        try:
+            return self._connection.execute("SELECT templates_dir FROM store_info").fetchone()[0]
+        except (sqlite3.OperationalError, TypeError):
+            return None
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""Shared fixtures of the tests. The generator reads templates, rules,
+labels and logo relative to the working directory, so every test runs in
+the repository root."""
+
+import datetime
+import json
+import os
+import sys
+import types
+from typing                   import Callable, List, Tuple
+
+import pytest
+
+# Repository root, holds the modules under test and their input files
+REPO_DIR: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, REPO_DIR)
+
+def pytest_configure(config: pytest.Config) -> None:
+    config.addinivalue_line("markers", "slow: runs for more than a few seconds, deselect with -m 'not slow'")
+
+@pytest.fixture(autouse=True)
+def repo_cwd(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Run the test in the repository root"""
+    monkeypatch.chdir(REPO_DIR)
+
+@pytest.fixture(autouse=True)
+def template_loader() -> None:
+    """Parse templates without the on-disk cache of the working tree, restore the loader of the process afterwards"""
+    import gen_lic_approval as gen
+    previous: gen.TemplateLoader = gen._template_loader
+    gen.set_template_loader(gen.TemplateLoader(disk_cache=None))
+    yield
+    gen.set_template_loader(previous)
+
+@pytest.fixture
+def template_corpus(tmp_path) -> Callable[[int, int], Tuple[str, list]]:
+    """
+    Return a function writing a synthetic corpus based on templates/eba.json
+    into the temporary folder: (families, max_versions) -> (templates folder,
+    one job per family for its newest version). Family i is named
+    'family<i>' with the tag 'FAMILY<i>' and lists 1 + i % max_versions versions.
+    """
+    import gen_lic_approval as gen
+
+    def write_corpus(families: int, max_versions: int) -> Tuple[str, List[gen.ApprovalJob]]:
+        with open(os.path.join(REPO_DIR, "templates", "eba.json"), "r", encoding="utf-8") as template_file:
+            base: dict = json.load(template_file)
+        base_instance: dict = base["instances"][0]
+        templates_dir: str = str(tmp_path / "corpus")
+        os.makedirs(templates_dir)
+        jobs: List[gen.ApprovalJob] = []
+        i: int
+        for i in range(families):
+            name: str = "family{:05d}".format(i)
+            instances: List[dict] = [dict(base_instance, _semver="{}.{}.0".format(1 + v // 10, v % 10), major_version="{}.{}".format(1 + v // 10, v % 10))
+                                     for v in range(1 + i % max_versions)]
+            with open(os.path.join(templates_dir, name + ".json"), "w", encoding="utf-8") as template_file:
+                json.dump(dict(base, _name=name, _tags=[name.upper()], name=name.upper(), swname=name.upper() + " Reporting Framework", instances=instances), template_file)
+            jobs.append(gen.ApprovalJob(name, instances[-1]["major_version"]))
+        return templates_dir, jobs
+    return write_corpus
+
+@pytest.fixture
+def set_clock(monkeypatch: pytest.MonkeyPatch) -> Callable[[datetime.datetime], None]:
+    """Return a function letting the generator see a day as the current time"""
+    import gen_lic_approval as gen
+
+    def set_day(day: datetime.datetime) -> None:
+        class FrozenDatetime(datetime.datetime):
+            @classmethod
+            def now(cls, tz=None) -> datetime.datetime:
+                return day
+        monkeypatch.setattr(gen, "datetime", types.SimpleNamespace(datetime=FrozenDatetime, timezone=datetime.timezone))
+    return set_day
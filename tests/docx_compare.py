@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+
+"""Comparison of DOCX files by their parts, for the tests."""
+
+import io
+import xml.etree.ElementTree  as ET
+import zipfile
+from typing                   import List
+
+def compare_documents(docx_a: bytes, docx_b: bytes) -> List[str]:
+    """Return the names of all parts whose canonical XML (or bytes) differ between two DOCX files"""
+    zip_a: zipfile.ZipFile = zipfile.ZipFile(io.BytesIO(docx_a))
+    zip_b: zipfile.ZipFile = zipfile.ZipFile(io.BytesIO(docx_b))
+    differences: List[str] = sorted(set(zip_a.namelist()) ^ set(zip_b.namelist()))
+    name: str
+    for name in sorted(set(zip_a.namelist()) & set(zip_b.namelist())):
+        part_a: bytes = zip_a.read(name)
+        part_b: bytes = zip_b.read(name)
+        if name.endswith((".xml", ".rels")):
+            part_a, part_b = ET.canonicalize(part_a.decode("utf-8")), ET.canonicalize(part_b.decode("utf-8"))
+        if part_a != part_b:
+            differences.append(name)
+    return differences
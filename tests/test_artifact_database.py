@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+
+"""The streaming lookup of the approximate version keeps memory flat from
+small to multi-hundred-MB artifact databases."""
+
+import os
+import tracemalloc
+from typing                   import List
+
+import pytest
+
+import gen_lic_approval       as gen
+
+# Allowed growth of the peak traced memory from the smallest to the largest database
+ARTIFACT_DB_TOLERANCE: float = 0.1
+
+# Artifact element of the synthetic databases, about 100 bytes
+ARTIFACT: str = '  <Artifact Name="component-{}" Path="C:/Projects/build/component/artifact.dll" Checksum="0123456789abcdef"/>\n'
+
+def write_artifact_database(database_path: str, size_mb: int) -> None:
+    """Write a synthetic artifact database of about size_mb MB, its version element at the very end"""
+    with open(database_path, "w") as database:
+        database.write("<ArtifactDatabase>\n <Artifacts>\n")
+        i: int = 0
+        while database.tell() < size_mb * 2**20:
+            database.write("".join(ARTIFACT.format(i + j) for j in range(1000)))
+            i += 1000
+        database.write(' </Artifacts>\n <ProductVersion MajorVersionYear="2025" MinorVersion="1"/>\n</ArtifactDatabase>\n')
+
+def test_version_is_read_and_cached(tmp_path) -> None:
+    database_path: str = str(tmp_path / "ArtifactDatabase.xml")
+    write_artifact_database(database_path, 1)
+    assert gen.get_approximate_version(database_path) == "2025"
+    assert gen._approximate_versions[database_path][2] == "2025"
+
+@pytest.mark.slow
+def test_peak_memory_is_flat_from_10_to_300_mb(tmp_path) -> None:
+    peaks: List[int] = []
+    size_mb: int
+    for size_mb in (10, 300):
+        database_path: str = str(tmp_path / "ArtifactDatabase-{}.xml".format(size_mb))
+        write_artifact_database(database_path, size_mb)
+        tracemalloc.start()
+        try:
+            assert gen.get_approximate_version(database_path) == "2025"
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        os.remove(database_path)
+    assert peaks[1] <= peaks[0] * (1 + ARTIFACT_DB_TOLERANCE), peaks
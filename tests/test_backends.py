@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+"""The python-docx backend and the fast backend write equivalent documents
+for the same content, and reject the same content."""
+
+import copy
+import json
+import os
+from typing                   import Dict, List
+
+import pytest
+
+import gen_lic_approval       as gen
+from docx_compare             import compare_documents
+
+# Version rendered for every family, with the separators the family rules split at
+FAMILY_VERSION: str = "2024-01 v1.0"
+
+# Optional fields of a template, the rules render them as empty text
+OPTIONAL_FIELDS: List[str] = ["swname", "swdescription", "homepage", "lictype", "licweb", "licweb1", "fasbhome", "home", "comment"]
+
+def family_templates(templates_dir: str, missing: List[str] = ()) -> List[str]:
+    """Write a template for every family of rules.json, based on templates/eba.json and without the missing fields, and return the families"""
+    with open(os.path.join("templates", "eba.json"), "r", encoding="utf-8") as template_file:
+        base: dict = json.load(template_file)
+    with open(gen.RULES_FILE, "r", encoding="utf-8") as rules_file:
+        families: List[str] = ["eba"] + list(json.load(rules_file)["families"])
+    os.makedirs(templates_dir)
+    family: str
+    for family in families:
+        template: dict = dict(base, _name=family, _tags=[family.upper()], licweb1="https://example.com/" + family + "/license",
+                              fasbhome="https://example.com/fasb", home="https://example.com/" + family)
+        template = {field: value for field, value in template.items() if field not in missing}
+        with open(os.path.join(templates_dir, family + ".json"), "w", encoding="utf-8") as template_file:
+            json.dump(template, template_file)
+    return families
+
+def render_both(content: gen.ApprovalContent, resources: Dict[str, gen.ApprovalResources]) -> Dict[str, bytes]:
+    """Return the document of each backend for the content"""
+    return {backend: gen.render_approval(content, resources[backend]) for backend in gen.BACKENDS}
+
+@pytest.fixture
+def resources() -> Dict[str, gen.ApprovalResources]:
+    """Resources of both backends for the templates folder"""
+    return {backend: gen.load_resources(backend=backend, approximate_version=gen.DEFAULT_APPROXIMATE_VERSION) for backend in gen.BACKENDS}
+
+@pytest.mark.parametrize("reproducible", [False, True])
+def test_backends_are_equivalent_for_every_family(tmp_path, reproducible: bool) -> None:
+    templates_dir: str = str(tmp_path / "templates")
+    families: List[str] = family_templates(templates_dir)
+    resources: Dict[str, gen.ApprovalResources] = {backend: gen.load_resources(
+        templates_dir, backend=backend, approximate_version=gen.DEFAULT_APPROXIMATE_VERSION, reproducible=reproducible) for backend in gen.BACKENDS}
+    family: str
+    for family in families:
+        content: gen.ApprovalContent = gen.compose_approval(family, FAMILY_VERSION, resources["docx"])
+        documents: Dict[str, bytes] = render_both(content, resources)
+        assert compare_documents(documents["docx"], documents["fast"]) == [], family
+
+def test_missing_fields_render_empty(tmp_path) -> None:
+    templates_dir: str = str(tmp_path / "templates")
+    families: List[str] = family_templates(templates_dir, OPTIONAL_FIELDS)
+    resources: Dict[str, gen.ApprovalResources] = {backend: gen.load_resources(
+        templates_dir, backend=backend, approximate_version=gen.DEFAULT_APPROXIMATE_VERSION) for backend in gen.BACKENDS}
+    family: str
+    for family in families:
+        content: gen.ApprovalContent = gen.compose_approval(family, FAMILY_VERSION, resources["docx"])
+        assert all(isinstance(segment.text, str) for segments in content.cells.values() for segment in segments), family
+        documents: Dict[str, bytes] = render_both(content, resources)
+        assert compare_documents(documents["docx"], documents["fast"]) == [], family
+
+def test_backends_are_equivalent_for_every_version(resources: Dict[str, gen.ApprovalResources]) -> None:
+    job: gen.ApprovalJob
+    for job in gen.expand_versions(resources["docx"].templates, "eba"):
+        documents: Dict[str, bytes] = render_both(gen.compose_approval(job.family, job.version, resources["docx"]), resources)
+        assert compare_documents(documents["docx"], documents["fast"]) == [], job.version
+
+def test_backends_are_equivalent_for_special_text(resources: Dict[str, gen.ApprovalResources]) -> None:
+    content: gen.ApprovalContent = gen.compose_approval("eba", "3.1", resources["docx"])
+    cells: dict = copy.copy(content.cells)
+    cells[0] = [gen.Segment(" <&\"'> leading and trailing space ")]
+    cells[1] = [gen.Segment("tab\there"), gen.Segment("line\nbreaks\r\nand\rreturns")]
+    cells[4] = [gen.Segment("same link", "https://example.com/?a=1&b=\"2\""), gen.Segment("same link", "https://example.com/?a=1&b=\"2\"")]
+    cells[6] = [gen.Segment("ünïcödé €", "https://example.com/ü")]
+    documents: Dict[str, bytes] = render_both(content._replace(cells=cells), resources)
+    assert compare_documents(documents["docx"], documents["fast"]) == []
+
+@pytest.mark.parametrize("character", ["\x00", "\x01", "\x08", "\x0b", "\x0c", "\x1f", "￾"])
+@pytest.mark.parametrize("place", ["cell", "url", "comment"])
+def test_both_backends_reject_xml_illegal_characters(resources: Dict[str, gen.ApprovalResources], character: str, place: str) -> None:
+    content: gen.ApprovalContent = gen.compose_approval("eba", "3.1", resources["docx"])
+    if place == "cell":
+        content = content._replace(cells={**content.cells, 0: [gen.Segment("a" + character + "b")]})
+    elif place == "url":
+        content = content._replace(cells={**content.cells, 4: [gen.Segment("link", "https://example.com/" + character)]})
+    else:
+        content = content._replace(comments=[gen.CommentParagraph("a" + character + "b", 11, None)])
+    backend: str
+    for backend in gen.BACKENDS:
+        with pytest.raises(ValueError):
+            gen.render_approval(content, resources[backend])
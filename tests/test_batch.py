@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+"""A batch with worker processes reports every job, even when a worker dies."""
+
+import multiprocessing
+import os
+
+import pytest
+
+import gen_lic_approval       as gen
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="the workers must inherit the patched run_job")
+def test_dead_worker_fails_its_job(tmp_path, monkeypatch):
+    run_job = gen.run_job
+    def dying_run_job(job: gen.ApprovalJob, *args) -> gen.JobResult:
+        if job.version == "3.2":
+            os._exit(1)
+        return run_job(job, *args)
+    monkeypatch.setattr(gen, "run_job", dying_run_job)
+    build_manifest: gen.BuildManifest = gen.BuildManifest(str(tmp_path))
+    jobs = [gen.ApprovalJob("eba", "3.1"), gen.ApprovalJob("eba", "3.2")]
+    results = gen.run_batch(jobs, gen.load_resources(), workers=2, build_manifest=build_manifest)
+    assert [result.job for result in results] == jobs
+    assert "BrokenProcessPool" in results[1].error
+    # jobs finished before the worker died are still recorded
+    assert all(result.file_name in build_manifest.entries for result in results if not result.error)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""Approvals are rendered again only when one of their inputs changed."""
+
+import datetime
+import json
+import os
+import shutil
+
+import pytest
+
+import gen_lic_approval       as gen
+
+def rendered(resources: gen.ApprovalResources, build_manifest: gen.BuildManifest, force: bool = False, version: str = "3.1") -> bool:
+    """Write an eba approval, return whether it was rendered instead of kept"""
+    written: gen.WrittenApproval = gen.write_approval("eba", version, resources, build_manifest.save_file_path, build_manifest, force)
+    build_manifest.record(written)
+    return not written.unchanged
+
+@pytest.fixture
+def build_manifest(tmp_path) -> gen.BuildManifest:
+    return gen.BuildManifest(str(tmp_path))
+
+def test_unchanged_inputs_are_kept(build_manifest):
+    resources: gen.ApprovalResources = gen.load_resources()
+    assert rendered(resources, build_manifest)
+    assert not rendered(resources, build_manifest)
+    assert rendered(resources, build_manifest, force=True)
+
+def test_kept_approval_keeps_its_submission_date(build_manifest, set_clock):
+    resources: gen.ApprovalResources = gen.load_resources()
+    set_clock(datetime.datetime(2024, 1, 2))
+    assert rendered(resources, build_manifest)
+    set_clock(datetime.datetime(2024, 1, 3))
+    assert not rendered(resources, build_manifest)
+
+def test_other_backend_renders_again(build_manifest):
+    assert rendered(gen.load_resources(backend="docx"), build_manifest)
+    assert rendered(gen.load_resources(backend="fast"), build_manifest)
+    assert not rendered(gen.load_resources(backend="fast"), build_manifest)
+
+def changed_copy(tmp_path, source: str, change) -> str:
+    """Copy a JSON input file into the temporary folder with change(data) applied, return the copy's path"""
+    with open(source, encoding="utf-8") as source_file:
+        data = json.load(source_file)
+    change(data)
+    copy = tmp_path / os.path.basename(source)
+    copy.write_text(json.dumps(data), encoding="utf-8")
+    return str(copy)
+
+def test_changed_template_renders_again(tmp_path, build_manifest):
+    templates_dir = tmp_path / "templates"
+    templates_dir.mkdir()
+    shutil.copy(os.path.join("templates", "eba.json"), str(templates_dir))
+    assert rendered(gen.load_resources(str(templates_dir)), build_manifest)
+    assert not rendered(gen.load_resources(str(templates_dir)), build_manifest)
+    changed_copy(templates_dir, os.path.join("templates", "eba.json"), lambda data: data.update(title="Changed title"))
+    # a new run: the loader of the previous one keeps the parsed template
+    gen.set_template_loader(gen.TemplateLoader(disk_cache=None))
+    assert rendered(gen.load_resources(str(templates_dir)), build_manifest)
+    assert not rendered(gen.load_resources(str(templates_dir)), build_manifest)
+
+def test_other_version_renders_again(build_manifest):
+    resources: gen.ApprovalResources = gen.load_resources()
+    assert rendered(resources, build_manifest)
+    assert rendered(resources, build_manifest, version="3.2")
+    assert not rendered(resources, build_manifest)
+    assert not rendered(resources, build_manifest, version="3.2")
+
+def test_changed_label_set_renders_again(tmp_path, build_manifest):
+    assert rendered(gen.load_resources(), build_manifest)
+    labels_path: str = changed_copy(tmp_path, gen.LABELS_FILE, lambda data: data["default"].update(header_text="CONFIDENTIAL"))
+    assert rendered(gen.load_resources(labels_path=labels_path), build_manifest)
+    assert not rendered(gen.load_resources(labels_path=labels_path), build_manifest)
+
+def test_changed_logo_renders_again(tmp_path, build_manifest):
+    assert rendered(gen.load_resources(), build_manifest)
+    logo_path = tmp_path / "logo.png"
+    with open(gen.LOGO_FILE, "rb") as logo_file:
+        # bytes after the end of a PNG are ignored by viewers but change the file
+        logo_path.write_bytes(logo_file.read() + b"\0")
+    assert rendered(gen.load_resources(logo_path=str(logo_path)), build_manifest)
+    assert not rendered(gen.load_resources(logo_path=str(logo_path)), build_manifest)
+
+def test_changed_rules_render_again(tmp_path, build_manifest):
+    assert rendered(gen.load_resources(), build_manifest)
+    rules_path: str = changed_copy(tmp_path, gen.RULES_FILE, lambda data: data.update(_comment="changed"))
+    assert rendered(gen.load_resources(rules_path=rules_path), build_manifest)
+    assert not rendered(gen.load_resources(rules_path=rules_path), build_manifest)
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""Exit status of the command line, checked by scripts and CI jobs."""
+
+import json
+import subprocess
+import sys
+import zipfile
+from typing                   import List
+
+import pytest
+
+def run_cli(*args: str) -> subprocess.CompletedProcess:
+    """Run gen_lic_approval.py with arguments and return the finished process"""
+    return subprocess.run([sys.executable, "gen_lic_approval.py", *args], capture_output=True, text=True)
+
+def test_dry_run_of_known_family_exits_0() -> None:
+    process: subprocess.CompletedProcess = run_cli("-family", "eba", "-version", "3.1", "--dry-run")
+    assert process.returncode == 0, process.stdout + process.stderr
+
+@pytest.mark.parametrize("args", [
+    ["-family", "no-such-family", "-version", "1"],
+    ["-family", "no-such-family", "-version", "1", "--dry-run"],
+    ["--show-template", "no-such-family"]])
+def test_unknown_family_exits_1(args: List[str]) -> None:
+    process: subprocess.CompletedProcess = run_cli(*args)
+    assert process.returncode == 1
+    assert "No template found" in process.stdout
+
+def test_dry_run_of_manifest_with_unknown_family_exits_1(tmp_path) -> None:
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text('{"family": "eba", "version": "3.1"}\n{"family": "no-such-family", "version": "1"}\n')
+    process: subprocess.CompletedProcess = run_cli("--manifest", str(manifest), "--dry-run")
+    assert process.returncode == 1
+    assert "EBA 3.1" in process.stdout
+
+@pytest.mark.parametrize("mode", [[], ["--pipeline"], ["--jobs", "2"]])
+def test_batch_with_failed_job_exits_1(tmp_path, mode: List[str]) -> None:
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text('{"family": "eba", "version": "3.1"}\n{"family": "no-such-family", "version": "1"}\n')
+    process: subprocess.CompletedProcess = run_cli("--manifest", str(manifest), "--zip", str(tmp_path / "approvals.zip"), *mode)
+    assert process.returncode == 1, process.stdout + process.stderr
+    assert "1 failed" in process.stdout
+
+def test_batch_without_failed_job_exits_0(tmp_path) -> None:
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text('{"family": "eba", "version": "3.1"}\n')
+    process: subprocess.CompletedProcess = run_cli("--manifest", str(manifest), "--zip", str(tmp_path / "approvals.zip"))
+    assert process.returncode == 0, process.stdout + process.stderr
+
+@pytest.fixture
+def templates_with_broken_one(tmp_path) -> str:
+    """Templates folder with eba.json and a broken.json that is not valid JSON"""
+    templates_dir = tmp_path / "templates"
+    templates_dir.mkdir()
+    (templates_dir / "eba.json").write_bytes(open("templates/eba.json", "rb").read())
+    (templates_dir / "broken.json").write_text('{"_name": "broken",')
+    return str(templates_dir)
+
+@pytest.mark.parametrize("mode", [["--dry-run"], ["--zip", "approvals.zip"]])
+def test_broken_template_of_other_family_is_skipped(tmp_path, templates_with_broken_one: str, mode: List[str]) -> None:
+    mode = [str(tmp_path / arg) if arg.endswith(".zip") else arg for arg in mode]
+    process: subprocess.CompletedProcess = run_cli("-family", "eba", "-version", "3.1", "--templates-dir", templates_with_broken_one, *mode)
+    assert process.returncode == 0, process.stdout + process.stderr
+    assert "WARNING: skipped unreadable template" in process.stdout and "broken.json" in process.stdout
+
+def test_broken_template_of_requested_family_exits_1(templates_with_broken_one: str) -> None:
+    process: subprocess.CompletedProcess = run_cli("-family", "broken", "-version", "1", "--dry-run", "--templates-dir", templates_with_broken_one)
+    assert process.returncode == 1
+    assert "cannot be read" in process.stdout
+
+@pytest.mark.parametrize("mode", [[], ["--pipeline"], ["--jobs", "2"]])
+def test_families_with_the_same_file_name_are_all_archived(tmp_path, mode: List[str]) -> None:
+    templates_dir = tmp_path / "templates"
+    templates_dir.mkdir()
+    family: str
+    for family in ["alpha", "beta"]:
+        (templates_dir / (family + ".json")).write_text(json.dumps(dict(json.load(open("templates/eba.json")), _name=family, _tags=[])))
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text('{"family": "alpha", "version": "3.1"}\n{"family": "beta", "version": "3.1"}\n{"family": "beta", "version": "3.1"}\n')
+    zip_path: str = str(tmp_path / "approvals.zip")
+    process: subprocess.CompletedProcess = run_cli("--manifest", str(manifest), "--zip", zip_path, "--templates-dir", str(templates_dir), *mode)
+    assert process.returncode == 1, process.stdout + process.stderr
+    assert "2 rebuilt, 0 unchanged, 1 failed" in process.stdout and "already in the archive" in process.stdout
+    with zipfile.ZipFile(zip_path) as archive:
+        assert sorted(name.split("/")[0] for name in archive.namelist()) == ["alpha", "beta"]
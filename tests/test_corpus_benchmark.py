@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+"""The corpus benchmark measures every mode on synthetic corpora and writes
+results that a later run can be compared with."""
+
+import json
+import subprocess
+import sys
+from typing                   import List
+
+import pytest
+
+def run_corpus_benchmark(*args: str) -> subprocess.CompletedProcess:
+    """Run the corpus benchmark on two small corpora and return the finished process"""
+    return subprocess.run([sys.executable, "benchmark.py", "--bench", "corpus", "--corpus-families", "3", "12",
+                           "--corpus-max-versions", "4", "--corpus-docs", "6", "--corpus-backend", "fast",
+                           "--corpus-workers", "2", *args], capture_output=True, text=True)
+
+@pytest.mark.slow
+def test_results_cover_every_corpus_and_mode(tmp_path) -> None:
+    results_path: str = str(tmp_path / "before.json")
+    process: subprocess.CompletedProcess = run_corpus_benchmark("--results-json", results_path)
+    assert process.returncode == 0, process.stdout + process.stderr
+    with open(results_path, "r") as results_file:
+        results: dict = json.load(results_file)
+    assert results["docs"] == 6 and results["backend"] == "fast"
+    assert [(result["families"], result["mode"]) for result in results["results"]] == [
+        (families, mode) for families in (3, 12) for mode in ("single", "batch", "parallel", "pipeline")]
+    result: dict
+    for result in results["results"]:
+        assert result["docs_per_sec"] > 0
+        assert 0 < result["per_doc_ms"]["p50"] <= result["per_doc_ms"]["p95"]
+
+@pytest.mark.slow
+def test_results_are_compared_with_earlier_run(tmp_path) -> None:
+    before_path: str = str(tmp_path / "before.json")
+    assert run_corpus_benchmark("--results-json", before_path).returncode == 0
+    process: subprocess.CompletedProcess = run_corpus_benchmark("--results-json", str(tmp_path / "after.json"), "--compare-json", before_path)
+    assert process.returncode == 0, process.stdout + process.stderr
+    compared: List[str] = [line for line in process.stdout.splitlines() if "docs/s" in line and "%" in line]
+    assert len(compared) == 8
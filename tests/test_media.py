@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+"""Every document gets the logo as the image part prepared once per
+process, optionally downsampled to its display size."""
+
+import hashlib
+import io
+import re
+import sys
+import zipfile
+from typing                   import List
+
+import pytest
+
+import gen_lic_approval       as gen
+
+def media_parts(docx_bytes: bytes) -> List[bytes]:
+    """Return the bytes of all media parts of a document"""
+    with zipfile.ZipFile(io.BytesIO(docx_bytes)) as docx_zip:
+        return [docx_zip.read(name) for name in docx_zip.namelist() if name.startswith("word/media/")]
+
+@pytest.mark.parametrize("backend", gen.BACKENDS)
+def test_documents_hold_the_prepared_logo(backend: str) -> None:
+    resources: gen.ApprovalResources = gen.load_resources(backend=backend)
+    with open(gen.LOGO_FILE, "rb") as logo_file:
+        logo_blob: bytes = logo_file.read()
+    assert resources.logo.blob == logo_blob
+    assert resources.logo.sha1 == hashlib.sha1(logo_blob).hexdigest()
+    version: str
+    for version in ("3.1", "3.0"):
+        docx_bytes: bytes = gen.generate_approval("eba", version, resources)[1]
+        assert media_parts(docx_bytes) == [logo_blob]
+        with zipfile.ZipFile(io.BytesIO(docx_bytes)) as docx_zip:
+            header_xml: str = docx_zip.read("word/header1.xml").decode("utf-8")
+        assert re.search(r'<wp:extent cx="{}" cy="{}"'.format(*gen.LOGO_SIZE), header_xml)
+
+def test_logo_is_kept_without_pillow(monkeypatch) -> None:
+    monkeypatch.setitem(sys.modules, "PIL", None)
+    resources: gen.ApprovalResources = gen.load_resources(logo_dpi=96)
+    with open(gen.LOGO_FILE, "rb") as logo_file:
+        assert resources.logo.blob == logo_file.read()
+
+def test_logo_is_downsampled_to_display_size() -> None:
+    pytest.importorskip("PIL")
+    resources: gen.ApprovalResources = gen.load_resources(logo_dpi=24)
+    assert resources.logo.px_width <= round(gen.LOGO_SIZE[0] / gen.EMU_PER_INCH * 24)
+    assert resources.logo.px_height <= round(gen.LOGO_SIZE[1] / gen.EMU_PER_INCH * 24)
+    assert len(resources.logo.blob) < resources.logo.source_bytes
+    assert media_parts(gen.generate_approval("eba", "3.1", resources)[1]) == [resources.logo.blob]
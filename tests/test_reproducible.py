@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""Reproducible documents do not depend on the day or the process they are
+rendered in."""
+
+import datetime
+import io
+import os
+import subprocess
+import sys
+import zipfile
+from typing                   import Callable, List
+
+import pytest
+
+import gen_lic_approval       as gen
+
+def render_on(day: datetime.datetime, set_clock: Callable[[datetime.datetime], None], resources: gen.ApprovalResources) -> bytes:
+    """Return the DOCX bytes of an eba approval rendered with the clock set to the day"""
+    set_clock(day)
+    return gen.generate_approval("eba", "3.1", resources)[1]
+
+@pytest.mark.parametrize("backend", ["docx", "fast"])
+def test_reproducible_ignores_the_clock(backend, monkeypatch, set_clock):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    resources: gen.ApprovalResources = gen.load_resources(backend=backend, reproducible=True)
+    assert render_on(datetime.datetime(2024, 1, 2), set_clock, resources) == render_on(datetime.datetime(2025, 6, 7), set_clock, resources)
+    assert gen.compose_approval("eba", "3.1", resources).submission_date.endswith("11/14/2023")
+
+def test_submission_date_follows_the_clock(set_clock):
+    resources: gen.ApprovalResources = gen.load_resources()
+    assert render_on(datetime.datetime(2024, 1, 2), set_clock, resources) != render_on(datetime.datetime(2025, 6, 7), set_clock, resources)
+
+def test_reproducible_submission_date_is_the_date_of_the_run(monkeypatch, set_clock):
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    resources: gen.ApprovalResources = gen.load_resources(render=False, reproducible=True)
+    set_clock(datetime.datetime(2025, 6, 7))
+    assert gen.compose_approval("eba", "3.1", resources).submission_date.endswith("06/07/2025")
+
+def test_submission_date_is_taken_as_given(monkeypatch):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    resources: gen.ApprovalResources = gen.load_resources(render=False, reproducible=True, submission_date=datetime.date(2024, 3, 4))
+    assert gen.compose_approval("eba", "3.1", resources).submission_date.endswith("03/04/2024")
+
+
+@pytest.mark.parametrize("backend", ["docx", "fast"])
+def test_reproducible_documents_are_identical_across_processes(backend, tmp_path):
+    documents: List[bytes] = []
+    run: int
+    for run in range(2):
+        zip_path: str = str(tmp_path / "approvals{}.zip".format(run))
+        process: subprocess.CompletedProcess = subprocess.run(
+            [sys.executable, "gen_lic_approval.py", "-family", "eba", "-version", "3.1", "--backend", backend, "--reproducible", "--zip", zip_path],
+            capture_output=True, text=True, env=dict(os.environ, SOURCE_DATE_EPOCH="1700000000"))
+        assert process.returncode == 0, process.stdout + process.stderr
+        with zipfile.ZipFile(zip_path) as archive:
+            assert [info.date_time for info in archive.infolist()] == [(2023, 11, 14, 22, 13, 20)]
+            documents.append(archive.read(archive.namelist()[0]))
+    assert documents[0] == documents[1]
+    with zipfile.ZipFile(io.BytesIO(documents[0])) as docx_zip:
+        assert {info.date_time for info in docx_zip.infolist()} == {(2023, 11, 14, 22, 13, 20)}
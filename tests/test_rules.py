@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""Family rules compile render plans once and serve them to all threads,
+and the plans of rules.json compose what the if/elif family chains did."""
+
+import json
+import os
+import threading
+from collections              import OrderedDict
+from typing                   import Any, List, Tuple
+
+import pytest
+
+import gen_lic_approval       as gen
+
+def test_plan_evicted_by_another_thread_meanwhile(template_corpus):
+    templates_dir, jobs = template_corpus(3, 1)
+    registry: gen.TemplateRegistry = gen.TemplateRegistry(templates_dir, gen.TemplateLoader(disk_cache=None))
+    first, *others = [registry.template(job.family) for job in jobs]
+    rules: gen.FamilyRules = gen.FamilyRules(max_plans=2)
+    rules.plan(first)
+    threads: List[threading.Thread] = []
+
+    class InterleavedPlans(OrderedDict):
+        """Plans letting another thread evict all cached plans right after the first cache hit"""
+        def get(self, key: Any, default: Any = None) -> Any:
+            plan: Any = super().get(key, default)
+            if plan is not None and not threads:
+                threads.append(threading.Thread(target=lambda: [rules.plan(template) for template in others]))
+                threads[0].start()
+                # with the lock the other thread waits until this plan() returns
+                threads[0].join(0.2)
+            return plan
+    rules._plans = InterleavedPlans(rules._plans)
+
+    assert rules.plan(first) is not None
+    threads[0].join()
+    assert len(rules._plans) == 2
+
+# Fields of the synthetic templates of the rules tests, one template per family
+RULES_FIELDS: dict = {
+    "name": "DNB DICT-2.0", "swname": "Banco de Portugal XBRL Taxonomy", "swdescription": "xbrl taxonomy", "filebasename": "Base",
+    "homepage": "https://example.org/home", "fasbhome": "https://fasb.org", "home": "https://example.org/sfrdp",
+    "lictype": "https://creativecommons.org/licenses/by/4.0/", "licweb": "https://example.org/license", "licweb1": "https://example.org/license1",
+    "comment": "https://example.org/comment"}
+
+@pytest.fixture
+def rules_resources(tmp_path) -> gen.ApprovalResources:
+    """Resources with one template per family named in the rules tests, all based on templates/eba.json"""
+    with open(os.path.join("templates", "eba.json"), "r", encoding="utf-8") as template_file:
+        base: dict = dict(json.load(template_file), **RULES_FIELDS)
+    templates_dir: str = str(tmp_path / "templates")
+    os.makedirs(templates_dir)
+    family: str
+    for family in ("bdp", "dnb-dict", "us-gaap", "lei", "default-family"):
+        with open(os.path.join(templates_dir, family + ".json"), "w", encoding="utf-8") as template_file:
+            json.dump(dict(base, _name=family, _tags=[]), template_file)
+    return gen.load_resources(templates_dir, render=False)
+
+def file_name_arguments(family: str, version: str, resources: gen.ApprovalResources) -> List[str]:
+    """Return the arguments the plan of a family passes to compose_docx_file_name()"""
+    template: gen.TemplateRecord = resources.templates.template(family)
+    fields: gen.TemplateFields = gen.TemplateFields(template.data, version=version, family=family)
+    return [part(fields) for part in resources.rules.plan(template).file_name]
+
+def cell_texts(content: gen.ApprovalContent, row: int) -> List[Tuple[str, str]]:
+    """Return (text, url) of the segments of a cell of the main section"""
+    return [(segment.text, segment.url) for segment in content.cells[row]]
+
+# compose_docx_file_name() names every family 'EBA', as the if/elif chains did,
+# so the arguments of the plans are compared as well
+
+def test_bdp_version_cell_and_file_name(rules_resources) -> None:
+    content: gen.ApprovalContent = gen.compose_approval("bdp", "2.10.1 5.0.0", rules_resources)
+    assert cell_texts(content, 1) == [("2.10.1 bdp v5.0.0", None)]
+    assert cell_texts(content, 6) == [("Disclaimer and Copyright", "https://example.org/license")]
+    assert [(comment.text, comment.font_size) for comment in content.comments] == [("", 8), ("https://example.org/comment", 10)]
+    # the chains checked 'BDP' in 'bdp' and never reached this branch, see test_case_sensitive_branches_now_match
+    assert file_name_arguments("bdp", "2.10.1 5.0.0", rules_resources) == [
+        "Banco de Portugal", " ", "5.0.0", " ", " XBRL Taxonomy - Third Party Software License Approval Form", " ", "YYYYMMDD", ".docx"]
+    assert content.file_name == "EBA 5.0.0  XBRL Taxonomy - Third Party Software License Approval Form YYYYMMDD.docx"
+
+def test_dnb_dict_cells_and_file_name(rules_resources) -> None:
+    content: gen.ApprovalContent = gen.compose_approval("dnb-dict", "2.0", rules_resources)
+    assert cell_texts(content, 2) == [("No", None)]
+    assert cell_texts(content, 5) == [("CC-BY-4.0", "https://creativecommons.org/licenses/by/4.0/")]
+    assert file_name_arguments("dnb-dict", "2.0", rules_resources) == [
+        "Full DNB Data Dictionary", " ", "2.0", " ", " - Third Party Software License Approval Form ", " ", "YYYYMMDD", ".docx"]
+    assert content.file_name == "EBA 2.0  - Third Party Software License Approval Form  YYYYMMDD.docx"
+
+def test_us_gaap_name_homepage_and_license_link(rules_resources) -> None:
+    content: gen.ApprovalContent = gen.compose_approval("us-gaap", "2024", rules_resources)
+    assert cell_texts(content, 0) == [("FASB 2024 SEC and US GAAP Reporting Taxonomy", None)]
+    assert cell_texts(content, 2) == [("YES", None)]
+    assert cell_texts(content, 4) == [("SEC and US GAAP Taxonomies", "https://fasb.org")]
+    assert cell_texts(content, 6) == [("Terms and Conditions", "https://example.org/license")]
+    assert [(comment.text, comment.font_size) for comment in content.comments] == [("https://example.org/comment", 8)]
+    assert file_name_arguments("us-gaap", "2024", rules_resources) == [
+        "FASB 2024 SEC and US GAAP Reporting Taxonomy", "", "", "", "", "", " - Third Party Software License Approval Form YYYYMMDD", ".docx"]
+    assert content.file_name == "EBA - Third Party Software License Approval Form YYYYMMDD.docx"
+
+def test_lei_update_cell_and_file_name(rules_resources) -> None:
+    content: gen.ApprovalContent = gen.compose_approval("lei", "2022-07-02 (REC)", rules_resources)
+    assert cell_texts(content, 2) == [("Yes, update of the ESMA ESEF Common Recommendation (CR) version", None)]
+    assert file_name_arguments("lei", "2022-07-02 (REC)", rules_resources) == [
+        "lei", " ", "2022", " ", "(REC) Taxonomy - Third Party Software License Approval Form", " ", "YYYYMMDD", ".docx"]
+    assert content.file_name == "EBA 2022 (REC) Taxonomy - Third Party Software License Approval Form YYYYMMDD.docx"
+
+def test_default_family(rules_resources) -> None:
+    content: gen.ApprovalContent = gen.compose_approval("default-family", "3.1", rules_resources)
+    assert {row: cell_texts(content, row) for row in range(7)} == {
+        0: [("Banco de Portugal XBRL Taxonomy", None)],
+        1: [("3.1", None)],
+        2: [("Yes", None)],
+        3: [("xbrl taxonomy", None)],
+        4: [("https://example.org/home", "https://example.org/home")],
+        5: [("https://creativecommons.org/licenses/by/4.0/", None)],
+        6: [("https://example.org/license", "https://example.org/license")]}
+    assert [(comment.text, comment.font_size, comment.link) for comment in content.comments] == [("https://example.org/comment", 11, None)]
+    assert file_name_arguments("default-family", "3.1", rules_resources) == [
+        "Base", " ", "3.1", " ", "XBRL Taxonomy - Third Party Software License Approval Form", " ", "YYYYMMDD", ".docx"]
+    assert content.file_name == "EBA 3.1 XBRL Taxonomy - Third Party Software License Approval Form YYYYMMDD.docx"
+
+@pytest.mark.parametrize("family, version, chains_file_name", [
+    ("bdp", "2.10.1 5.0.0", "EBA 2.10.1 5.0.0 XBRL Taxonomy - Third Party Software License Approval Form YYYYMMDD.docx"),
+    ("lei", "2022-07-02 (REC)", "EBA 2022-07-02 (REC) XBRL Taxonomy - Third Party Software License Approval Form YYYYMMDD.docx")])
+def test_case_sensitive_branches_now_match(rules_resources, family: str, version: str, chains_file_name: str) -> None:
+    # the chains tested 'BDP' and 'LEI' against the lower case _name and fell through to the default file name
+    file_name: str = gen.compose_approval(family, version, rules_resources).file_name
+    assert file_name != chains_file_name
+    assert file_name == gen.compose_docx_file_name(*file_name_arguments(family, version, rules_resources))
+
+def test_family_rules_are_case_insensitive(rules_resources) -> None:
+    template: gen.TemplateRecord = rules_resources.templates.template("BDP")
+    assert rules_resources.rules.plan(template) is rules_resources.rules.plan(rules_resources.templates.template("bdp"))
+    assert cell_texts(gen.compose_approval("BDP", "2.10.1 5.0.0", rules_resources), 1) == [("2.10.1 bdp v5.0.0", None)]
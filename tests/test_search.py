@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""The template search index answers queries by field, prefix and any
+field, follows changed and removed templates, and stays in milliseconds
+at 10,000 templates."""
+
+import json
+import os
+import time
+from typing                   import List, Tuple
+
+import pytest
+
+import gen_lic_approval       as gen
+
+# Budget of one query at 10,000 templates
+QUERY_BUDGET_MS: float = 10.0
+
+def search(templates_dir: str, *conditions: str) -> List[str]:
+    """Return the names of the templates matching a query, from an index refreshed first"""
+    index: gen.TemplateSearchIndex = gen.TemplateSearchIndex(templates_dir)
+    index.refresh()
+    return [os.path.splitext(path)[0] for path in index.search(gen.parse_search_query(list(conditions)))]
+
+def test_queries_by_field_prefix_and_any_field(template_corpus) -> None:
+    templates_dir, _ = template_corpus(30, 1)
+    assert search(templates_dir, "tag=FAMILY00012") == ["family00012"]
+    assert search(templates_dir, "name=family0001*") == ["family{:05d}".format(i) for i in range(10, 20)]
+    assert search(templates_dir, "family00003") == ["family00003"]
+    assert len(search(templates_dir, "licweb=https://www.eba.europa.eu/legal-notice/")) == 30
+    assert search(templates_dir, "provider=eba.europa.eu", "tag=family0002*") == ["family{:05d}".format(i) for i in range(20, 30)]
+    assert search(templates_dir, "tag=family00012", "name=family00013") == []
+
+def test_unknown_field_is_rejected() -> None:
+    with pytest.raises(LookupError, match="Unknown search field"):
+        gen.parse_search_query(["colour=red"])
+
+def test_index_follows_changed_and_removed_templates(template_corpus) -> None:
+    templates_dir, _ = template_corpus(5, 1)
+    assert gen.TemplateSearchIndex(templates_dir).refresh() == 5
+    assert gen.TemplateSearchIndex(templates_dir).refresh() == 0
+
+    template_path: str = os.path.join(templates_dir, "family00002.json")
+    with open(template_path, "r") as template_file:
+        template: dict = json.load(template_file)
+    with open(template_path, "w") as template_file:
+        json.dump(dict(template, lictype="CC-BY-4.0", padding="changes the size"), template_file)
+    os.remove(os.path.join(templates_dir, "family00004.json"))
+
+    index: gen.TemplateSearchIndex = gen.TemplateSearchIndex(templates_dir)
+    assert index.refresh() == 2
+    assert index.search(gen.parse_search_query(["license=cc-by-4.0"])) == ["family00002.json"]
+    assert search(templates_dir, "name=family*") == ["family0000{}".format(i) for i in range(4)]
+
+@pytest.mark.slow
+def test_queries_at_10000_templates_stay_in_budget(template_corpus) -> None:
+    templates_dir, _ = template_corpus(10000, 1)
+    index: gen.TemplateSearchIndex = gen.TemplateSearchIndex(templates_dir)
+    index.refresh()
+    query: List[str]
+    for query in (["tag=family00042"], ["name=family0004*"], ["licweb=www.eba.europa.eu/legal-notice"], ["provider=eba.europa.eu", "tag=family0001*"]):
+        conditions: List[Tuple[str, str]] = gen.parse_search_query(query)
+        index.search(conditions)
+        query_seconds: List[float] = []
+        for _ in range(5):
+            start: float = time.perf_counter()
+            index.search(conditions)
+            query_seconds.append(time.perf_counter() - start)
+        assert min(query_seconds) * 1000 < QUERY_BUDGET_MS, query
+
+def test_unreadable_template_is_left_out(template_corpus, capsys) -> None:
+    templates_dir, _ = template_corpus(3, 1)
+    with open(os.path.join(templates_dir, "broken.json"), "w") as template_file:
+        template_file.write('{"_name": "broken",')
+    assert search(templates_dir, "name=*") == ["family00000", "family00001", "family00002"]
+    assert "skipped unreadable template" in capsys.readouterr().out
+
+@pytest.mark.parametrize("content", [
+    b"\x80\x04\x95 not json",
+    b'{"version": 2, "files": {"family00000.json": [1, 2, "family00000"]}, "postings": {}}',
+    b'{"version": 2, "files": {}, "postings": {"_tags": {"x": ["elsewhere.json"]}}}'])
+def test_invalid_index_file_is_built_again(template_corpus, content: bytes) -> None:
+    templates_dir, _ = template_corpus(3, 1)
+    with open(os.path.join(templates_dir, gen.SEARCH_INDEX_FILE), "wb") as index_file:
+        index_file.write(content)
+    index: gen.TemplateSearchIndex = gen.TemplateSearchIndex(templates_dir)
+    assert index.files == {}
+    assert index.refresh() == 3
+    assert gen.TemplateSearchIndex(templates_dir).search(gen.parse_search_query(["name=*"])) == ["family00000.json", "family00001.json", "family00002.json"]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""The generation server answers 404 only for unknown families and label
+sets, and saves approvals only inside the output folder."""
+
+import functools
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from typing                   import Tuple
+
+import pytest
+
+import approval_server
+import gen_lic_approval       as gen
+
+@pytest.fixture
+def server(tmp_path, monkeypatch) -> approval_server.ApprovalServer:
+    monkeypatch.setattr(gen, "OUTPUT_DIR", str(tmp_path))
+    resources: gen.ApprovalResources = gen.load_resources()
+    server: approval_server.ApprovalServer = approval_server.ApprovalServer(functools.partial(gen.render_request, resources), port=0)
+    thread: threading.Thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def post(server: approval_server.ApprovalServer, body: dict) -> Tuple[int, bytes]:
+    """Return status and body of a POST /approvals"""
+    request = urllib.request.Request(
+        "http://{}:{}/approvals".format(*server.server_address[:2]), data=json.dumps(body).encode("utf-8"))
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+def test_render_and_save(server, tmp_path):
+    status, body = post(server, {"family": "eba", "version": "3.1", "save": True})
+    assert status == 200
+    assert os.path.dirname(json.loads(body)["path"]) == str(tmp_path)
+
+@pytest.mark.parametrize("version", ["../../escaped", "3.1/..", "..", "a" + os.sep + "b"])
+def test_file_name_leaving_output_dir_is_rejected(server, tmp_path, version):
+    status, body = post(server, {"family": "eba", "version": version, "save": True})
+    assert status == 400, body
+    assert os.listdir(tmp_path) == []
+    assert not os.path.exists(os.path.join(os.path.dirname(str(tmp_path)), "escaped"))
+
+def test_path_in_version_without_save_renders(server):
+    status, _ = post(server, {"family": "eba", "version": "../../escaped"})
+    assert status == 200
+
+@pytest.mark.parametrize("body", [{"family": "no-such-family", "version": "1.0"},
+                                  {"family": "eba", "version": "3.1", "labels": "no-such-labels"}])
+def test_unknown_family_or_labels_is_not_found(server, body):
+    status, _ = post(server, body)
+    assert status == 404
+
+def test_lookup_error_while_rendering_is_server_error(server, monkeypatch):
+    def fail(*args):
+        raise KeyError("field")
+    monkeypatch.setattr(gen, "generate_approval", fail)
+    status, _ = post(server, {"family": "eba", "version": "3.1"})
+    assert status == 500
+
+@pytest.mark.parametrize("body", [{"family": "eba", "version": 3.1},
+                                  {"family": ["eba"], "version": "3.1"},
+                                  {"family": "eba", "version": "3.1", "labels": 1},
+                                  ["eba", "3.1"]])
+def test_malformed_request_is_bad_request(server, body):
+    status, response = post(server, body)
+    assert status == 400, response
+    assert server.metrics.summary()["errors"] == 1
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+"""The commands that do not render a document start without importing
+python-docx or lxml."""
+
+import subprocess
+import sys
+from typing                   import List, Set
+
+import pytest
+
+def imported_modules(*args: str) -> Set[str]:
+    """Return the names of all modules 'python -X importtime gen_lic_approval.py' imports with arguments"""
+    process: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, "-X", "importtime", "gen_lic_approval.py", *args], capture_output=True, text=True)
+    assert process.returncode in (0, 1, 2), process.stdout + process.stderr
+    return {line.split("|")[-1].strip() for line in process.stderr.splitlines()
+            if line.startswith("import time:") and "cumulative" not in line}
+
+@pytest.mark.parametrize("args", [
+    ["--help"],
+    ["--list-families"],
+    ["--show-template", "eba"],
+    ["-family", "eba", "-version", "3.1", "--dry-run"],
+    ["-family", "no-such-family", "-version", "1", "--dry-run"],
+    ["--no-such-option"]])
+def test_non_rendering_command_does_not_import_docx(args: List[str]) -> None:
+    modules: Set[str] = imported_modules(*args)
+    assert not {module.split(".")[0] for module in modules} & {"docx", "lxml"}
+
+def test_rendering_command_imports_docx(tmp_path) -> None:
+    modules: Set[str] = imported_modules("-family", "eba", "-version", "3.1", "--zip", str(tmp_path / "approvals.zip"))
+    assert "docx" in modules
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+"""The streaming mode keeps memory bounded by the current job, not by the batch size."""
+
+import os
+import tracemalloc
+from typing                   import List
+
+import pytest
+
+import gen_lic_approval       as gen
+
+# Families of the synthetic corpus, more than the template cache holds, so
+# templates are evicted during the run
+STREAM_FAMILIES: int = 300
+
+# Allowed growth of the peak traced memory from the smallest to the largest batch
+STREAM_TOLERANCE: float = 0.1
+
+@pytest.fixture
+def traced() -> None:
+    """Trace memory for the test, stop afterwards if it was not traced before"""
+    was_tracing: bool = tracemalloc.is_tracing()
+    tracemalloc.start()
+    yield
+    if not was_tracing:
+        tracemalloc.stop()
+
+@pytest.mark.slow
+def test_peak_memory_is_flat_from_100_to_10000_documents(tmp_path, template_corpus, traced) -> None:
+    templates_dir, jobs = template_corpus(STREAM_FAMILIES, 5)
+    gen.set_template_loader(gen.TemplateLoader(STREAM_FAMILIES // 3, disk_cache=None))
+    resources: gen.ApprovalResources = gen.load_resources(templates_dir, backend="fast")
+    # first documents import the writer modules and fill the plan cache
+    gen.run_stream(jobs[:10], resources, gen.BuildManifest(str(tmp_path)), force=True)
+    peaks: List[int] = []
+    docs: int
+    for docs in (100, 1000, 10000):
+        output_dir: str = str(tmp_path / "out-{}".format(docs))
+        os.mkdir(output_dir)
+        tracemalloc.reset_peak()
+        stats: gen.StreamStats = gen.run_stream((jobs[i % len(jobs)] for i in range(docs)), resources, gen.BuildManifest(output_dir), force=True)
+        assert (stats.rebuilt, stats.failed) == (docs, 0)
+        peaks.append(stats.peak_bytes)
+    assert peaks[-1] <= peaks[0] * (1 + STREAM_TOLERANCE), "peak traced memory grew from {} to {} bytes".format(peaks[0], peaks[-1])
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""The SQLite template store serves the templates of the JSON files."""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+from typing                   import Dict, List
+
+import pytest
+
+import gen_lic_approval       as gen
+import template_store
+
+@pytest.fixture
+def templates_dir(tmp_path) -> str:
+    folder: str = str(tmp_path / "templates")
+    os.makedirs(os.path.join(folder, "sub"))
+    shutil.copy(os.path.join("templates", "eba.json"), folder)
+    shutil.copy(os.path.join("templates", "eba.json"), os.path.join(folder, "sub", "copy.json"))
+    open(os.path.join(folder, ".hidden.json"), "w").close()
+    return folder
+
+def test_scan_templates(templates_dir):
+    assert sorted(template_store.scan_templates(templates_dir)) == ["eba.json", os.path.join("sub", "copy.json")]
+
+def test_store_serves_the_json_templates(templates_dir, tmp_path):
+    loader: gen.StoredTemplateLoader = gen.StoredTemplateLoader(str(tmp_path / "templates.sqlite"), templates_dir)
+    assert loader.store.sync() == template_store.ImportStats(2, 0, 0, 0, {}, {})
+    json_file: str = os.path.join(templates_dir, "eba.json")
+    record: gen.TemplateRecord = loader.load(json_file)
+    assert record.get("_name") == gen.TemplateLoader(disk_cache=None).load(json_file).get("_name")
+
+def test_template_removed_while_read(templates_dir, tmp_path):
+    loader: gen.StoredTemplateLoader = gen.StoredTemplateLoader(str(tmp_path / "templates.sqlite"), templates_dir)
+    json_file: str = os.path.join(templates_dir, "eba.json")
+    stat: os.stat_result = os.stat(json_file)
+    os.remove(json_file)
+    assert loader.store.template("eba.json") is None
+    with pytest.raises(FileNotFoundError):
+        loader._read(json_file, stat)
+
+def write_template(templates_dir: str, file_name: str, **fields) -> None:
+    """Write a template based on templates/eba.json with fields replaced"""
+    with open(os.path.join("templates", "eba.json"), "r", encoding="utf-8") as template_file:
+        template: dict = dict(json.load(template_file), **fields)
+    with open(os.path.join(templates_dir, file_name), "w", encoding="utf-8") as template_file:
+        json.dump(template, template_file)
+
+def registries(templates_dir: str, tmp_path) -> Dict[str, gen.TemplateRegistry]:
+    """Return the registry of the JSON files and of the store for a folder"""
+    return {"json": gen.TemplateRegistry(templates_dir, gen.TemplateLoader(disk_cache=None)),
+            "store": gen.StoredTemplateRegistry(gen.StoredTemplateLoader(str(tmp_path / "templates.sqlite"), templates_dir))}
+
+def test_duplicate_family_key_is_ambiguous_in_both(templates_dir, tmp_path):
+    registry: gen.TemplateRegistry
+    for registry in registries(templates_dir, tmp_path).values():
+        with pytest.raises(LookupError, match="ambiguous"):
+            registry.resolve("eba")
+
+def test_unreadable_template_is_skipped_by_both(tmp_path, capsys):
+    templates_dir: str = str(tmp_path / "templates")
+    os.makedirs(templates_dir)
+    write_template(templates_dir, "eba.json")
+    with open(os.path.join(templates_dir, "broken.json"), "w") as template_file:
+        template_file.write('{"_name": "broken",')
+    store: template_store.TemplateStore = template_store.TemplateStore(str(tmp_path / "check.sqlite"), templates_dir, gen.semver_key)
+    stats: template_store.ImportStats = store.sync()
+    assert (stats.added, sorted(stats.invalid)) == (1, ["broken.json"])
+    assert store.names() == ["eba"]
+    registry: gen.TemplateRegistry
+    for mode, registry in registries(templates_dir, tmp_path).items():
+        assert registry.resolve("eba").endswith("eba.json"), mode
+        with pytest.raises(LookupError, match="cannot be read"):
+            registry.resolve("broken")
+    assert "WARNING: skipped unreadable template" in capsys.readouterr().out
+
+def test_versions_compare_all_parts_in_both(tmp_path):
+    templates_dir: str = str(tmp_path / "templates")
+    os.makedirs(templates_dir)
+    write_template(templates_dir, "eba.json", instances=[
+        {"_semver": "3.1.0", "major_version": "3.1"}, {"_semver": "3.1.0.2", "major_version": "3.1 Hotfix 2"}, {"_semver": "3.2", "major_version": "3.2"}])
+    versions: List[List[str]] = [[registry.versions("eba", since) for since in ("3.1", "3.1.0.1", "3.1.0.3")]
+                                 for registry in registries(templates_dir, tmp_path).values()]
+    assert versions[0] == versions[1] == [["3.1", "3.1 Hotfix 2", "3.2"], ["3.1 Hotfix 2", "3.2"], ["3.2"]]
+
+def test_versions_without_semver_are_skipped_by_both(tmp_path, capsys):
+    templates_dir: str = str(tmp_path / "templates")
+    os.makedirs(templates_dir)
+    write_template(templates_dir, "eba.json", instances=[
+        {"_semver": "3.0.0", "major_version": "3.0"}, {"major_version": "3.1"}, {"_semver": "3.2.0"}, {"_semver": "3.3.0", "major_version": "3.3"}])
+    store: template_store.TemplateStore = template_store.TemplateStore(str(tmp_path / "check.sqlite"), templates_dir, gen.semver_key)
+    stats: template_store.ImportStats = store.sync()
+    assert (stats.added, stats.invalid, stats.skipped_versions) == (1, {}, {"eba.json": [1, 2]})
+    registry: gen.TemplateRegistry
+    for mode, registry in registries(templates_dir, tmp_path).items():
+        assert registry.resolve("eba").endswith("eba.json"), mode
+        assert registry.versions("eba") == ["3.0", "3.3"], mode
+        assert registry.versions("eba", "3.1") == ["3.3"], mode
+    assert "instances[1], instances[2]" in capsys.readouterr().out
+
+def test_templates_of_a_version(templates_dir, tmp_path):
+    store: template_store.TemplateStore = template_store.TemplateStore(str(tmp_path / "check.sqlite"), templates_dir, gen.semver_key)
+    store.sync()
+    assert store.paths_of_version("2.6") == ["eba.json", os.path.join("sub", "copy.json")]
+    assert store.paths_of_version("no-such-version") == []
+    plan: str = " ".join(row[-1] for row in store._connection.execute("EXPLAIN QUERY PLAN SELECT path FROM versions WHERE version = ?", ("2.6",)))
+    assert "versions_by_version" in plan
+
+def test_template_with_bad_version_renders_from_both(tmp_path):
+    templates_dir: str = str(tmp_path / "templates")
+    os.makedirs(templates_dir)
+    write_template(templates_dir, "eba.json", instances=[{"_semver": "3.1.0", "major_version": "3.1"}, {"major_version": "3.2"}])
+    store: List[str] = []
+    for store in ([], ["--template-store", str(tmp_path / "check.sqlite")]):
+        process: subprocess.CompletedProcess = subprocess.run(
+            [sys.executable, "gen_lic_approval.py", "-family", "eba", "-version", "3.1", "--dry-run", "--templates-dir", templates_dir, *store],
+            capture_output=True, text=True)
+        assert process.returncode == 0, process.stdout + process.stderr
+        assert "unreadable" not in process.stdout
+
+@pytest.mark.parametrize("content", ['[]', '"eba"', '{"_name": "ifrs", "_tags": "ifrs"}', '{"_name": "ifrs", "_tags": [1]}', '{"_name": 7}'])
+def test_template_of_wrong_shape_is_skipped_by_both(tmp_path, capsys, content: str):
+    templates_dir: str = str(tmp_path / "templates")
+    os.makedirs(templates_dir)
+    write_template(templates_dir, "eba.json")
+    with open(os.path.join(templates_dir, "odd.json"), "w") as template_file:
+        template_file.write(content)
+    registry: gen.TemplateRegistry
+    for mode, registry in registries(templates_dir, tmp_path).items():
+        assert registry.families() == ["eba"], mode
+        assert registry.resolve("eba").endswith("eba.json"), mode
+        with pytest.raises(LookupError):
+            registry.resolve("i")
+    assert "WARNING: skipped unreadable template" in capsys.readouterr().out
+
+def test_template_without_name_is_no_family(tmp_path):
+    templates_dir: str = str(tmp_path / "templates")
+    os.makedirs(templates_dir)
+    write_template(templates_dir, "eba.json")
+    write_template(templates_dir, "unnamed.json", _name="", _tags=["UNNAMED"])
+    registry: gen.TemplateRegistry
+    for mode, registry in registries(templates_dir, tmp_path).items():
+        assert registry.families() == ["eba"], mode
+        assert registry.resolve("unnamed").endswith("unnamed.json"), mode
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+"""--timings-json writes one record per document in every batch mode."""
+
+import json
+import subprocess
+import sys
+from typing                   import List
+
+import pytest
+
+@pytest.mark.parametrize("mode", [[], ["--pipeline"], ["--pipeline", "--jobs", "2"]])
+def test_batch_writes_document_records(tmp_path, mode: List[str]) -> None:
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text('{"family": "eba", "version": "3.1"}\n{"family": "eba", "version": "3.2"}\n{"family": "no-such-family", "version": "1"}\n')
+    timings_path = tmp_path / "timings.jsonl"
+    process: subprocess.CompletedProcess = subprocess.run(
+        [sys.executable, "gen_lic_approval.py", "--manifest", str(manifest), "--zip", str(tmp_path / "approvals.zip"), "--timings-json", str(timings_path), *mode],
+        capture_output=True, text=True)
+    assert process.returncode == 1, process.stdout + process.stderr
+    records: List[dict] = [json.loads(line) for line in timings_path.read_text().splitlines()]
+    documents: List[dict] = [record for record in records if record["type"] == "document"]
+    assert [(document["version"], "error" in document) for document in documents] == [("3.1", False), ("3.2", False), ("1", True)]
+    assert all(document["wall_ms"] > 0 and document["stages"] for document in documents[:2])
+    if "--pipeline" in mode:
+        assert set(documents[0]["stages"]) == {"load", "render", "save"}